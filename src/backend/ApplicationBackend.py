@@ -2,6 +2,7 @@ import sys
 import os
 import uvicorn
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
@@ -13,20 +14,22 @@ sys.path.append(os.getcwd())
 
 # Import controllers
 from controller.NewsController import news_router
-from controller.ClassificationController import classification_router
+from controller.ClassificationController import classification_router, classification_service
 from controller.ClusteringController import clustering_router
-from controller.SummationController import summarization_router
+from controller.SummationController import summarization_router, summarization_service
+from controller.SearchController import search_router
 
 # Import clustering initialization
-from src.backend.service.ClusteringService import initialize_clustering_on_startup
+from src.backend.service.ClusteringService import initialize_clustering_on_startup, get_clustering_service
 
 # Lifespan event handler for startup/shutdown
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("🌟 FastAPI application starting up...")
+    # Returns immediately, clustering keeps warming up in the background
     await initialize_clustering_on_startup()
-    print("🎉 Startup initialization complete!")
+    print("🎉 Startup initialization complete, accepting requests!")
     yield
     # Shutdown (if needed)
     print("🔄 FastAPI application shutting down...")
@@ -62,7 +65,8 @@ async def root():
             "News Articles Management",
             "Text Classification", 
             "Text Clustering",
-            "Text Summarization"
+            "Text Summarization",
+            "Semantic Search"
         ],
         "docs": "/docs",
         "redoc": "/redoc"
@@ -71,15 +75,24 @@ async def root():
 # Health check endpoint
 @app.get("/health")
 async def health_check():
+    classification_status = classification_service.get_model_info()["status"]
+    # May query the summarization worker pool over IPC
+    summarization_info = await run_in_threadpool(summarization_service.get_model_info)
+    summarization_status = summarization_info["status"]
+
+    services = {
+        "news": {"ready": True, "status": "active"},
+        "classification": {"ready": classification_status == "active", "status": classification_status},
+        "clustering": get_clustering_service().get_status(),
+        # "extractive" still serves summaries without the abstractive model
+        "summarization": {"ready": summarization_status != "unavailable", "status": summarization_status},
+    }
+    not_ready = [name for name, service in services.items() if not service["ready"]]
     return {
-        "status": "healthy",
-        "message": "All backend services are operational",
-        "services": {
-            "news": "active",
-            "classification": "active",
-            "clustering": "active", 
-            "summarization": "active"
-        }
+        "status": "healthy" if not not_ready else "degraded",
+        "message": "All backend services are operational" if not not_ready
+        else f"Not ready: {', '.join(not_ready)}",
+        "services": services
     }
 
 # Include routers
@@ -87,6 +100,7 @@ app.include_router(news_router, prefix="", tags=["News"])
 app.include_router(classification_router, prefix="", tags=["Text Classification"])
 app.include_router(clustering_router, prefix="", tags=["Text Clustering"])
 app.include_router(summarization_router, prefix="", tags=["Text Summarization"])
+app.include_router(search_router, prefix="", tags=["Search"])
 
 # Run the application
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List
 import sys
 import os
 
@@ -11,6 +12,9 @@ from src.backend.service.ClusteringService import get_clustering_service, Articl
 # Create router for clustering endpoints
 clustering_router = APIRouter()
 
+# Seconds clients should wait before retrying while clustering warms up
+WARMUP_RETRY_AFTER = 5
+
 # Response models
 class ClustersResponse(BaseModel):
     clusters: List[ArticleCluster]
@@ -31,9 +35,17 @@ async def get_clustered_articles(
     
     Returns:
     - List of clusters with their articles
+    - 503 with warm-up progress while clusters are still loading
     """
+    clustering_service = get_clustering_service()
+    if not clustering_service.is_ready:
+        raise HTTPException(
+            status_code=503,
+            detail=clustering_service.get_status(),
+            headers={"Retry-After": str(WARMUP_RETRY_AFTER)}
+        )
+
     try:
-        clustering_service = get_clustering_service() 
         clusters = clustering_service.get_clustered_articles(
             limit_per_cluster=limit_per_cluster,
             max_clusters=max_clusters
@@ -45,4 +57,33 @@ async def get_clustered_articles(
         )
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Clustering error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Clustering error: {str(e)}")
+
+@clustering_router.post("/api/clusters/refit")
+async def refit_clusters(
+    method: str = Query(default="kmeans", pattern="^(kmeans|hdbscan|hierarchical)$", description="Clustering method")
+):
+    """
+    Refit the clustering model in the background and save a new snapshot.
+    The current clusters keep being served until the refit finishes.
+    """
+    clustering_service = get_clustering_service()
+    if clustering_service._clustering_model is None:
+        raise HTTPException(status_code=503, detail="Clustering model not available")
+    started = clustering_service.start_background_refit(method)
+    return {"started": started, "detail": "Refit started" if started else "A refit is already running"}
+
+@clustering_router.post("/api/clusters/update")
+async def update_clusters():
+    """
+    Assign articles appended to the data file to clusters now, without waiting for the
+    background watcher. A full refit is started if drift or inertia crosses its threshold.
+    """
+    clustering_service = get_clustering_service()
+    if not clustering_service.has_model:
+        raise HTTPException(status_code=503, detail="Clustering model not available")
+    try:
+        report = await run_in_threadpool(clustering_service.check_for_updates)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Clustering error: {str(e)}")
+    return {"updated": report is not None, "report": report}
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Optional
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from service.NewService import NewsService, NewsArticle
+# Same import path as ClusteringController so both share the clustering singleton
+sys.path.append(os.getcwd())
+from src.backend.service.ClusteringService import get_clustering_service, RelatedArticle
+from src.models.Text_Clustering.neighbors import NEIGHBOR_K
 
 # Create router for news endpoints
 news_router = APIRouter()
@@ -16,6 +20,11 @@ class NewsResponse(BaseModel):
     page: int
     limit: int
 
+class RelatedNewsResponse(BaseModel):
+    id: int
+    related: List[RelatedArticle]
+    total: int
+
 # Request models
 class CreateNewsRequest(BaseModel):
     url: str
@@ -131,6 +140,47 @@ async def get_news_by_id(news_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Service error: {str(e)}")
 
+@news_router.get("/api/news/{news_id}/related", response_model=RelatedNewsResponse)
+async def get_related_news(
+    news_id: int,
+    k: int = Query(default=10, ge=1, le=NEIGHBOR_K, description="Number of related articles")
+):
+    """
+    Get the articles most similar to a news article
+
+    Parameters:
+    - news_id: ID of the news article (same as /api/news/{news_id}), matched to the
+      clustering corpus by url or title
+    - k: Number of related articles (1-20)
+
+    Returns:
+    - Related articles with cosine similarity, read from the precomputed neighbor table
+    - 404 if the article does not exist or is not in the clustered corpus
+    - 503 while clustering (embeddings and neighbor table) is still loading
+    """
+    clustering_service = get_clustering_service()
+    if not clustering_service.is_ready or not clustering_service.has_model:
+        raise HTTPException(
+            status_code=503,
+            detail=clustering_service.get_status(),
+            headers={"Retry-After": "5"}
+        )
+
+    try:
+        title = news_service.get_news_title(news_id)
+        if title is None:
+            raise HTTPException(status_code=404, detail="News article not found")
+        row = clustering_service.find_corpus_row(title=title)
+        if row is None:
+            raise HTTPException(status_code=404, detail="News article is not in the clustered corpus")
+        related = clustering_service.get_related_articles(row, k)
+        return RelatedNewsResponse(id=news_id, related=related, total=len(related))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Service error: {str(e)}")
+
 @news_router.post("/api/news", response_model=NewsArticle)
 async def create_news(news_data: CreateNewsRequest):
     """Create a new news article"""
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import List, Optional
+import sys
+import os
+
+# Add service path
+sys.path.append(os.getcwd())
+from src.backend.service.SearchService import SearchService, SearchResult
+
+# Create router for search endpoints
+search_router = APIRouter()
+
+# Initialize service
+search_service = SearchService()
+
+# Response models
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchResult]
+    total: int
+    page: int
+    limit: int
+    took_ms: float
+
+# API Routes
+@search_router.get("/api/search", response_model=SearchResponse)
+async def search_news(
+    q: str = Query(..., min_length=1, max_length=500, description="Search query"),
+    category: Optional[str] = Query(default=None, description="Filter by category"),
+    page: int = Query(default=1, ge=1, le=50, description="Page number"),
+    limit: int = Query(default=10, ge=1, le=50, description="Results per page"),
+    rerank: bool = Query(default=True, description="Re-rank candidates with BM25")
+):
+    """
+    Semantic search over the news corpus
+
+    Parameters:
+    - q: Search query
+    - category: Filter by category (optional)
+    - page: Page number (default: 1)
+    - limit: Results per page (default: 10, max: 50)
+    - rerank: Re-rank embedding candidates with BM25 over the cleaned content (default: true)
+
+    Returns:
+    - Ranked articles with hybrid score, cosine similarity and BM25 score
+    - 503 while clustering (embeddings and index) is still loading
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    if not search_service.is_ready:
+        raise HTTPException(
+            status_code=503,
+            detail=search_service.clustering_service.get_status(),
+            headers={"Retry-After": "5"}
+        )
+
+    try:
+        # Query encoding is CPU-bound, keep it off the event loop
+        result = await run_in_threadpool(
+            search_service.search,
+            query=q,
+            page=page,
+            limit=limit,
+            category=category,
+            rerank=rerank
+        )
+        return SearchResponse(query=q, page=page, limit=limit, **result)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
+
+@search_router.get("/api/search/stats")
+async def get_search_stats():
+    """Get search latency percentiles (p50/p95) and query cache statistics"""
+    return search_service.get_stats()
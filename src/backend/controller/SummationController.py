@@ -3,10 +3,12 @@ import os
 sys.path.append(os.getcwd())
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 
 from service.SummationService import SummationService
+from service.SummarizationWorkerPool import QueueFullError, PoolUnavailableError
 
 # Create router for summarization endpoints
 summarization_router = APIRouter()
@@ -20,6 +22,9 @@ class SummarizationRequest(BaseModel):
     nrng: Optional[int] = 3
     sample: Optional[bool] = False
     temp: Optional[float] = 1.0
+    mode: Optional[str] = "abstractive"
+    preselect: Optional[bool] = False
+    deadline_ms: Optional[int] = None
 
 class SummarizationBatchRequest(BaseModel):
     texts: List[str]
@@ -29,12 +34,16 @@ class SummarizationBatchRequest(BaseModel):
     nrng: Optional[int] = 3
     sample: Optional[bool] = False
     temp: Optional[float] = 1.0
+    mode: Optional[str] = "abstractive"
+    preselect: Optional[bool] = False
+    deadline_ms: Optional[int] = None
 
 # Response models
 class SummarizationResponse(BaseModel):
     text: str
     summary: str
     parameters: Dict[str, Any]
+    plan: Optional[Dict[str, Any]] = None
 
 class SummarizationBatchResponse(BaseModel):
     results: List[Dict[str, Any]]
@@ -59,6 +68,10 @@ async def summarize_text(request: SummarizationRequest):
     - nrng: No repeat ngram size (default: 3)
     - sample: Whether to use sampling (default: False)
     - temp: Temperature for sampling (default: 1.0)
+    - mode: "abstractive" (default), "long" for map-reduce summarization of long articles,
+      or "extractive" for a millisecond LexRank summary (also used when the model queue is full)
+    - preselect: Keep only the most central sentences before generation (default: False)
+    - deadline_ms: Latency budget; beams, output length and model variant are chosen to fit it
     
     Returns:
     - Summarization result with original text, summary, and parameters
@@ -67,22 +80,40 @@ async def summarize_text(request: SummarizationRequest):
         if not request.text or not request.text.strip():
             raise HTTPException(status_code=400, detail="Text cannot be empty")
         
-        result = summarization_service.summarize_text(
+        # Run in the threadpool so concurrent requests can reach the worker pool queue
+        result = await run_in_threadpool(
+            summarization_service.summarize_text,
             text=request.text,
             in_max_len=request.in_max_len,
             out_max_len=request.out_max_len,
             beams=request.beams,
             nrng=request.nrng,
             do_sample=request.sample,
-            temp=request.temp
+            temp=request.temp,
+            mode=request.mode,
+            preselect=request.preselect,
+            deadline_ms=request.deadline_ms
         )
         
         return SummarizationResponse(
             text=result["text"],
             summary=result["summary"],
-            parameters=result["parameters"]
+            parameters=result["parameters"],
+            plan=result["plan"]
         )
         
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except PoolUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -107,18 +138,34 @@ async def summarize_texts_batch(request: SummarizationBatchRequest):
         if len(request.texts) > 50:  # Limit batch size for summarization
             raise HTTPException(status_code=400, detail="Maximum 50 texts per batch")
         
-        results = summarization_service.summarize_texts(
+        results = await run_in_threadpool(
+            summarization_service.summarize_texts,
             texts=request.texts,
             in_max_len=request.in_max_len,
             out_max_len=request.out_max_len,
             beams=request.beams,
             nrng=request.nrng,
             do_sample=request.sample,
-            temp=request.temp
+            temp=request.temp,
+            mode=request.mode,
+            preselect=request.preselect,
+            deadline_ms=request.deadline_ms
         )
         
         return SummarizationBatchResponse(results=results)
         
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except PoolUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -156,14 +203,19 @@ async def summarize_text_legacy(request: SummarizationRequest):
         if not request.text or not request.text.strip():
             raise HTTPException(status_code=400, detail="Missing 'text' in JSON body")
         
-        result = summarization_service.summarize_text(
+        # Run in the threadpool so concurrent requests can reach the worker pool queue
+        result = await run_in_threadpool(
+            summarization_service.summarize_text,
             text=request.text,
             in_max_len=request.in_max_len,
             out_max_len=request.out_max_len,
             beams=request.beams,
             nrng=request.nrng,
             do_sample=request.sample,
-            temp=request.temp
+            temp=request.temp,
+            mode=request.mode,
+            preselect=request.preselect,
+            deadline_ms=request.deadline_ms
         )
         
         # Return in original Flask API format
@@ -172,6 +224,18 @@ async def summarize_text_legacy(request: SummarizationRequest):
             "summary": result["summary"]
         }
         
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except PoolUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -81,5 +81,5 @@ class ClassificationService:
         return {
             "model_type": "text_classification",
             "description": "Text classification model for Vietnamese news",
-            "status": "active"
+            "status": "active" if classification is not None else "unavailable"
         }
\ No newline at end of file
@@ -1,6 +1,8 @@
 import os
 import sys
 import json
+import time
+import threading
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 
@@ -9,10 +11,14 @@ sys.path.append(os.getcwd())
 from src.utils.RandomText import pick_random_items
 
 try:
-    from src.models.Text_Clustering.Text_cluster import VietnameseTextClustering
+    from src.models.Text_Clustering.Text_cluster import VietnameseTextClustering, DATA_PATH
 except ImportError as e:
     print(f"Warning: Could not import VietnameseTextClustering: {e}")
     VietnameseTextClustering = None
+    DATA_PATH = None
+
+# Seconds between checks of the clustering data file for newly ingested articles
+DATA_POLL_INTERVAL = 30
 
 try:
     from src.backend.service.OpenAIService import OpenAIService
@@ -38,6 +44,15 @@ class ClusteredArticle(BaseModel):
     cluster_id: int
     cluster_name: str
 
+class RelatedArticle(BaseModel):
+    id: int
+    url: str
+    url_img: str
+    title: str
+    description: str
+    similarity: float
+    cluster_id: Optional[int] = None
+
 class ArticleCluster(BaseModel):
     cluster_info: ClusterInfo
     articles: List[ClusteredArticle]
@@ -61,13 +76,269 @@ class ClusteringService:
         """Initialize the clustering service only once"""
         if not ClusteringService._initialized:
             print(f"🚀 Initializing ClusteringService singleton (this should only happen once)... in in PID={os.getpid()}")
-            self._clustering_model = VietnameseTextClustering()
+            # The clustering model is loaded by warm_up (in the background), not here,
+            # so creating the service never blocks the event loop
+            self._clustering_model = None
+            self._refit_thread = None
+            self._warmup_thread = None
+            self._watcher_thread = None
+            self._update_lock = threading.Lock()
+            self._data_mtime = None
+            # Set when a refit started by the data watcher fails, so the next check retries it
+            self._refit_failed = False
+            self._last_update = None
+            self._row_lookup = None
+            self._row_lookup_corpus = None
+            self._row_lookup_lock = threading.Lock()
+            self._status_lock = threading.Lock()
+            self._status = {"state": "pending", "progress": 0.0, "message": "Waiting for warm-up", "error": None}
             self.openai_service = self._get_openai_service()
             ClusteringService._initialized = True
             print("✅ ClusteringService singleton initialized successfully!")
         else:
             print(f"♻️ Reusing ClusteringService in PID={os.getpid()}")
     
+    def _set_status(self, state: str, progress: float, message: str, error: Optional[str] = None):
+        with self._status_lock:
+            self._status = {"state": state, "progress": progress, "message": message, "error": error}
+        print(f"[clustering] {state} ({progress:.0%}): {message}")
+
+    @property
+    def is_ready(self) -> bool:
+        """True once clusters (or the sample-cluster fallback) can be served"""
+        return self._status["state"] in ("ready", "degraded")
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get the warm-up status of the clustering service
+
+        Returns:
+            Dict[str, Any]: state, progress (0-1), message, error and ready flag
+        """
+        with self._status_lock:
+            status = dict(self._status)
+        status["ready"] = status["state"] in ("ready", "degraded")
+        status["last_update"] = self._last_update
+        return status
+
+    def warm_up(self):
+        """
+        Load articles, embeddings and the clustering snapshot, fitting clusters if
+        no snapshot matches the current corpus. Slow: run it through start_warmup.
+        """
+        if VietnameseTextClustering is None:
+            self._set_status("degraded", 1.0, "Clustering model unavailable, serving sample clusters")
+            return
+        try:
+            self._set_status("loading", 0.1, "Loading articles, embeddings and clustering snapshot")
+            self._data_mtime = os.path.getmtime(DATA_PATH)
+            model = VietnameseTextClustering()
+            if not model.is_fitted:
+                self._set_status("fitting", 0.5, "No snapshot for the current corpus, fitting clusters")
+                model.fit_predict(model.data)
+            self._clustering_model = model
+            self._set_status("ready", 1.0, f"Clusters loaded from snapshot {model.snapshot_version}")
+            self.start_data_watcher()
+        except Exception as e:
+            print(f"Error during clustering warm-up: {e}")
+            self._set_status("degraded", 1.0, "Clustering warm-up failed, serving sample clusters", error=str(e))
+
+    def start_warmup(self) -> bool:
+        """
+        Run warm_up in a background thread
+
+        Returns:
+            bool: False if warm-up is already running or finished
+        """
+        if self._warmup_thread is not None:
+            return False
+        self._set_status("starting", 0.0, "Clustering warm-up started")
+        self._warmup_thread = threading.Thread(target=self.warm_up, name="clustering-warmup", daemon=True)
+        self._warmup_thread.start()
+        return True
+
+    def check_for_updates(self) -> Optional[Dict[str, Any]]:
+        """
+        Pick up articles appended to the clustering data file since the last load: new articles
+        are assigned to clusters incrementally, and a background refit starts when the model
+        reports drift or inertia above its thresholds (or the file was not just appended to).
+
+        Returns:
+            Optional[Dict[str, Any]]: Update report, None if the file is unchanged or an update
+            or refit is already running
+        """
+        if self._clustering_model is None:
+            return None
+        mtime = os.path.getmtime(DATA_PATH)
+        if mtime == self._data_mtime:
+            return None
+        if self._refit_thread is not None and self._refit_thread.is_alive():
+            return None
+        if not self._update_lock.acquire(blocking=False):
+            return None
+        try:
+            with open(DATA_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            report = self._clustering_model.update(data)
+            self._last_update = {**report, "time": time.time(), "snapshot": self._clustering_model.snapshot_version}
+            print(f"🔄 Clustering data updated: {report}")
+            if report["refit_needed"] or self._refit_failed:
+                # Not an append (added == 0): the model still serves the old corpus until the
+                # refit on the new file is swapped in. The file counts as loaded only once the
+                # refit succeeds, otherwise the next check would skip it and never retry
+                self.start_background_refit(self._clustering_model.method or 'kmeans', data=data, data_mtime=mtime)
+            else:
+                self._data_mtime = mtime
+            return report
+        finally:
+            self._update_lock.release()
+
+    def start_data_watcher(self, interval: float = DATA_POLL_INTERVAL) -> bool:
+        """
+        Poll the clustering data file in a background thread and apply updates without a restart
+
+        Args:
+            interval (float): Seconds between checks
+
+        Returns:
+            bool: False if the watcher is already running
+        """
+        if self._watcher_thread is not None:
+            return False
+
+        def _watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check_for_updates()
+                except Exception as e:
+                    print(f"Error while updating clustering data: {e}")
+
+        self._watcher_thread = threading.Thread(target=_watch, name="clustering-data-watcher", daemon=True)
+        self._watcher_thread.start()
+        return True
+
+    def start_background_refit(self, method: str = 'kmeans', data: Optional[List[dict]] = None,
+                               data_mtime: Optional[float] = None) -> bool:
+        """
+        Refit the clustering model in a background thread and save a new snapshot.
+
+        The refit runs on a separate VietnameseTextClustering instance; the model serving
+        requests is left untouched and swapped for the new one in a single step when the
+        fit finishes, so texts, labels, members and neighbor table always stay consistent.
+
+        Args:
+            method (str): Clustering method passed to fit_predict
+            data (Optional[List[dict]]): Corpus to fit, defaults to the serving model's data
+            data_mtime (Optional[float]): Modification time of the data file data was read from,
+                recorded as loaded only after the new model is swapped in
+
+        Returns:
+            bool: False if a refit is already running
+        """
+        if self._clustering_model is None:
+            return False
+        if self._refit_thread is not None and self._refit_thread.is_alive():
+            return False
+        current = self._clustering_model
+        data = current.data if data is None else data
+
+        def _refit():
+            try:
+                print(f"🔄 Refitting clustering model in background (method={method})...")
+                model = VietnameseTextClustering(data=data, load_snapshot=False)
+                # Reuse the already loaded SentenceTransformer for newly added articles
+                model.embedding_method = current.embedding_method
+                model.fit_predict(model.data, method=method)
+                with self._update_lock:
+                    self._clustering_model = model
+                    if data_mtime is not None:
+                        self._data_mtime = data_mtime
+                    self._refit_failed = False
+                print(f"✅ Background refit finished, snapshot {model.snapshot_version}")
+            except Exception as e:
+                print(f"Error during background clustering refit: {e}")
+                if data_mtime is not None:
+                    self._refit_failed = True
+
+        self._refit_thread = threading.Thread(target=_refit, name="clustering-refit", daemon=True)
+        self._refit_thread.start()
+        return True
+
+    @property
+    def has_model(self) -> bool:
+        """True if the clustering model (embeddings, snapshot, neighbor table) is loaded"""
+        return self._clustering_model is not None
+
+    @staticmethod
+    def _normalize_title(title: str) -> str:
+        return " ".join(title.lower().split())
+
+    def _get_row_lookup(self, model) -> Dict[str, int]:
+        """url and title -> corpus row of model, (re)built on first use and when the corpus changes"""
+        with self._row_lookup_lock:
+            if self._row_lookup is None or self._row_lookup_corpus != model.corpus_hash:
+                lookup = {}
+                for row, article in enumerate(model.metadata):
+                    if article.get('url'):
+                        lookup.setdefault("url:" + article['url'], row)
+                    if article.get('title'):
+                        lookup.setdefault("title:" + self._normalize_title(article['title']), row)
+                self._row_lookup = lookup
+                self._row_lookup_corpus = model.corpus_hash
+            return self._row_lookup
+
+    def find_corpus_row(self, url: Optional[str] = None, title: Optional[str] = None) -> Optional[int]:
+        """
+        Find the row of a news article in the clustering corpus
+
+        Args:
+            url (Optional[str]): Article url, matched first
+            title (Optional[str]): Article title, matched case- and whitespace-insensitively
+
+        Returns:
+            Optional[int]: Corpus row, or None if the article is not in the clustered corpus
+        """
+        lookup = self._get_row_lookup(self._clustering_model)
+        if url and "url:" + url in lookup:
+            return lookup["url:" + url]
+        if title:
+            return lookup.get("title:" + self._normalize_title(title))
+        return None
+
+    def get_related_articles(self, row: int, k: int = 10) -> List[RelatedArticle]:
+        """
+        Get the articles most similar to an article from the precomputed neighbor table
+
+        Args:
+            row (int): Row index of the article in the clustering corpus
+            k (int): Number of related articles
+
+        Returns:
+            List[RelatedArticle]: Related articles, most similar first
+
+        Raises:
+            IndexError: If row is not an article of the clustering corpus
+        """
+        model = self._clustering_model
+        if not 0 <= row < len(model.metadata):
+            raise IndexError(f"Article {row} not found in clustering corpus")
+
+        indices, similarities = model.related(row, k)
+        related = []
+        for idx, similarity in zip(indices.tolist(), similarities.tolist()):
+            article = model.metadata[idx]
+            related.append(RelatedArticle(
+                id=idx,
+                url=article.get('url') or '',
+                url_img=article.get('url_img') or 'https://via.placeholder.com/120x96?text=📰&bg=f3f4f6',
+                title=article.get('title') or 'Untitled',
+                description=article.get('description') or '',
+                similarity=similarity,
+                cluster_id=int(model.labels[idx]) if idx < len(model.labels) else None
+            ))
+        return related
+
     def _get_openai_service(self):
         """Get OpenAI service instance (lazy initialization)"""
         print("Initializing OpenAI service...")
@@ -318,21 +589,11 @@ def get_clustering_service():
     return _service_instance
 
 async def initialize_clustering_on_startup():
-    """Initialize clustering model and run initial clustering on app startup"""
+    """Start clustering warm-up in the background so the app accepts traffic immediately"""
     try:
-        # Get the singleton service
         service = get_clustering_service()
-        
-        # Pre-warm the clustering model by running sample_clusters
-        if service._clustering_model is not None:
-            print("🔥 Pre-warming clustering model...")
-            # This will trigger the fit_predict if not already fitted
-            sample_clusters = service.get_clustered_articles(max_clusters=6, limit_per_cluster=4)
-            print(f"✅ Clustering pre-warmed successfully! Generated {len(sample_clusters)} sample clusters")
-        else:
-            print("⚠️ Clustering model not available, skipping pre-warming")
-            
+        if service.start_warmup():
+            print("🔥 Clustering warm-up running in background, /api/clusters returns 503 until ready")
     except Exception as e:
         print(f"Error during clustering initialization: {e}")
         # Don't fail the entire app startup if clustering fails
-        pass
\ No newline at end of file
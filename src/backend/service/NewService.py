@@ -197,6 +197,15 @@ class NewsService:
             )
         return None
 
+    def get_news_title(self, news_id: int) -> Optional[str]:
+        """Get the title of a news article by ID, None if it does not exist"""
+        conn = sqlite3.connect(self.database_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT title FROM news_articles WHERE id = ?", (news_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+
     def create_news(self, url: str, url_img: str, title: str, description: str, content: str, metadata: dict) -> NewsArticle:
         """Create a new news article"""
         # For now, just return a new NewsArticle object with a generated ID
@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Any, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+# Add path to access models and utilities
+sys.path.append(os.getcwd())
+from src.backend.service.ClusteringService import get_clustering_service
+from src.models.Text_Clustering.bm25 import BM25Index
+
+# Query embeddings kept in memory (one e5 forward pass per distinct query string)
+QUERY_CACHE_SIZE = 2048
+# ANN candidates retrieved per request: enough for the requested page, more with a category filter
+MIN_CANDIDATES = 100
+MAX_CANDIDATES = 1000
+CATEGORY_CANDIDATE_FACTOR = 5
+# Weight of the (max-normalized) BM25 score in the hybrid score, the rest is cosine similarity
+BM25_WEIGHT = 0.3
+# Number of recent request latencies kept for the p50/p95 stats
+LATENCY_WINDOW = 1000
+
+
+class SearchResult(BaseModel):
+    id: int
+    url: str
+    url_img: str
+    title: str
+    description: str
+    category: str
+    score: float
+    similarity: float
+    bm25: Optional[float] = None
+
+
+class SearchService:
+    """Semantic search over the clustering corpus: e5 query embedding, ANN candidates, BM25 re-rank"""
+
+    def __init__(self):
+        self.clustering_service = get_clustering_service()
+        self._bm25 = None
+        self._bm25_corpus = None
+        self._bm25_lock = threading.Lock()
+        self._embed_query = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._encode_query)
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def is_ready(self) -> bool:
+        """True once the clustering model (embeddings and ANN index) is loaded"""
+        return self.clustering_service.is_ready and self.clustering_service.has_model
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Cache key of a query: lowercase with collapsed whitespace"""
+        return " ".join(query.lower().split())
+
+    def _encode_query(self, query: str) -> np.ndarray:
+        vector = self.clustering_service._clustering_model.encode_query(query)
+        vector = np.asarray(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        return vector
+
+    def _get_bm25(self, model) -> BM25Index:
+        """BM25 index over content_clean of model, (re)built on first use and when the corpus changes"""
+        with self._bm25_lock:
+            if self._bm25 is None or self._bm25_corpus != model.corpus_hash:
+                t0 = time.perf_counter()
+                self._bm25 = BM25Index(model.texts)
+                self._bm25_corpus = model.corpus_hash
+                print(f"🔎 BM25 index built over {len(model.texts)} articles in {time.perf_counter() - t0:.1f}s")
+            return self._bm25
+
+    def search(
+        self,
+        query: str,
+        page: int = 1,
+        limit: int = 10,
+        category: Optional[str] = None,
+        rerank: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Search articles semantically similar to a query
+
+        Args:
+            query (str): Free-text query
+            page (int): Page number (1-based)
+            limit (int): Results per page
+            category (Optional[str]): Only keep articles of this category (metadata.cat)
+            rerank (bool): Re-rank the ANN candidates with BM25 over content_clean
+
+        Returns:
+            Dict[str, Any]: results, total (matches among the retrieved candidates) and took_ms
+        """
+        t0 = time.perf_counter()
+        model = self.clustering_service._clustering_model
+        end = page * limit
+        pool = max(MIN_CANDIDATES, end * (CATEGORY_CANDIDATE_FACTOR if category else 2))
+        pool = min(pool, MAX_CANDIDATES, len(model.metadata))
+
+        vector = self._embed_query(self.normalize_query(query))
+        ids, similarities = model.similar(vector, pool)
+        # Ids past the loaded metadata can only come from a concurrent corpus update
+        keep = ids < len(model.metadata)
+        ids, similarities = ids[keep], similarities[keep]
+
+        if category:
+            wanted = category.lower()
+            keep = np.fromiter(
+                ((model.metadata[i].get('metadata') or {}).get('cat', '').lower() == wanted for i in ids),
+                dtype=bool, count=len(ids)
+            )
+            ids, similarities = ids[keep], similarities[keep]
+
+        bm25 = None
+        scores = similarities
+        if rerank and len(ids):
+            bm25 = self._get_bm25(model).score(query, ids)
+            if bm25.max() > 0:
+                scores = (1 - BM25_WEIGHT) * similarities + BM25_WEIGHT * bm25 / bm25.max()
+        order = np.argsort(-scores, kind="stable")
+
+        results = []
+        for pos in order[end - limit:end]:
+            idx = int(ids[pos])
+            article = model.metadata[idx]
+            results.append(SearchResult(
+                id=idx,
+                url=article.get('url') or '',
+                url_img=article.get('url_img') or 'https://via.placeholder.com/120x96?text=📰&bg=f3f4f6',
+                title=article.get('title') or 'Untitled',
+                description=article.get('description') or '',
+                category=(article.get('metadata') or {}).get('cat', ''),
+                score=float(scores[pos]),
+                similarity=float(similarities[pos]),
+                bm25=float(bm25[pos]) if bm25 is not None else None
+            ))
+
+        took_ms = (time.perf_counter() - t0) * 1000
+        self._latencies.append(took_ms)
+        return {"results": results, "total": int(len(ids)), "took_ms": round(took_ms, 2)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get search latency percentiles and query cache statistics
+
+        Returns:
+            Dict[str, Any]: p50/p95 latency over recent requests and query cache hits/misses
+        """
+        latencies = np.array(self._latencies) if self._latencies else np.zeros(1)
+        cache = self._embed_query.cache_info()
+        return {
+            "requests": len(self._latencies),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "query_cache": {"hits": cache.hits, "misses": cache.misses, "size": cache.currsize,
+                            "max_size": cache.maxsize},
+            "bm25_ready": self._bm25 is not None,
+        }
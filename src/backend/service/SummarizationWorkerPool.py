@@ -0,0 +1,378 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import itertools
+import threading
+import multiprocessing as mp
+from multiprocessing.connection import Listener, Client
+from typing import Dict, Any, Optional, Tuple
+
+# Add path to access models
+HERE = os.path.dirname(__file__)
+SRC_ROOT = os.path.abspath(os.path.join(HERE, "../../"))
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from utils.ThreadTuner import load_thread_config, pin_threads
+
+DEFAULT_POOL_CONFIG = {
+    "USE_WORKER_POOL": False,
+    "NUM_WORKERS": 2,
+    "THREADS_PER_WORKER": 2,
+    "MAX_QUEUE_SIZE": 16,
+    "RETRY_AFTER": 5,
+    "EXTRACTIVE_FALLBACK": True,
+    "CALIBRATE_ON_STARTUP": True,
+    "ASSISTED_DECODING": False,
+    "QUANTIZED_PLAN": False,
+    "MODELS": {},
+    "REQUEST_TIMEOUT": 120,
+    "WORKER_ADDRESS": ["127.0.0.1", 6100],
+    "WORKER_AUTHKEY": "ctai-summarization",
+}
+
+
+def load_pool_config(config_path: str = "config.json") -> Dict[str, Any]:
+    """Read the SUMMARIZATION section of config.json on top of the defaults"""
+    config = dict(DEFAULT_POOL_CONFIG)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config.update(json.load(f).get("SUMMARIZATION", {}))
+    except FileNotFoundError:
+        pass
+    return config
+
+
+def _parse_address(address):
+    """JSON stores (host, port) as a list, a unix socket as a plain string"""
+    if isinstance(address, (list, tuple)):
+        return (address[0], int(address[1]))
+    return address
+
+
+class QueueFullError(Exception):
+    """Raised when the summarization queue has no free slot"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Summarization queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class PoolUnavailableError(Exception):
+    """Raised when the summarization worker pool is down or unreachable"""
+
+    def __init__(self, retry_after: int, reason: str = ""):
+        super().__init__(f"Summarization pool is unavailable{f' ({reason})' if reason else ''}, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _worker_main(task_queue, result_queue, num_threads: int, calibrate_planner: bool):
+    """Worker process: pin torch threads, load the model once, then serve jobs"""
+    # Only the summarization thread count applies here, any other workload config is ignored
+    pin_threads("summarization", num_threads)
+
+    from models.Text_summarization import infer, planner
+    if calibrate_planner:
+        planner.get_planner()
+
+    result_queue.put(("__ready__", True, os.getpid()))
+    while True:
+        item = task_queue.get()
+        if item is None:
+            break
+        job_id, payload = item
+        try:
+            plan = None
+            if payload.get("deadline_ms") is not None:
+                summary, plan = planner.get_planner().summarize(
+                    payload["text"], payload["deadline_ms"], **payload["params"]
+                )
+            elif payload.get("mode") == "long":
+                summary = infer.summarize_long(payload["text"], **payload["params"])
+            else:
+                summary = infer.summarize_one(payload["text"], **payload["params"])
+            result_queue.put((job_id, True, {"summary": summary, "plan": plan}))
+        except Exception as e:
+            result_queue.put((job_id, False, str(e)))
+
+
+class SummarizationWorkerPool:
+    """Pool of summarization processes fed by a bounded request queue"""
+
+    def __init__(
+        self,
+        num_workers: int = 2,
+        threads_per_worker: int = 2,
+        max_queue_size: int = 16,
+        retry_after: int = 5,
+        calibrate_planner: bool = True
+    ):
+        self.num_workers = max(1, num_workers)
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.max_queue_size = max(1, max_queue_size)
+        self.retry_after = max(1, retry_after)
+        self.calibrate_planner = calibrate_planner
+
+        self._ctx = mp.get_context("spawn")
+        self._task_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        self._processes = []
+        self._slots = threading.BoundedSemaphore(self.max_queue_size)
+        self._job_ids = itertools.count()
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._collector = None
+        self._ready_workers = 0
+        self._avg_latency = None
+        self._completed = 0
+        self._rejected = 0
+
+    def start(self):
+        """Spawn the worker processes and the result collector thread"""
+        for _ in range(self.num_workers):
+            process = self._ctx.Process(
+                target=_worker_main,
+                args=(self._task_queue, self._result_queue, self.threads_per_worker, self.calibrate_planner),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+        print(f"🚀 Started {self.num_workers} summarization workers "
+              f"({self.threads_per_worker} threads each, queue size {self.max_queue_size})")
+
+    def _collect_results(self):
+        """Route results coming back from the workers to the waiting callers"""
+        while True:
+            job_id, ok, value = self._result_queue.get()
+            if job_id == "__ready__":
+                with self._lock:
+                    self._ready_workers += 1
+                print(f"✅ Summarization worker ready in PID={value}")
+                continue
+            if job_id is None:
+                break
+            with self._lock:
+                job = self._pending.pop(job_id, None)
+            if job is None:
+                continue
+            # The slot is held until the worker is done, even if the caller stopped waiting
+            self._slots.release()
+            job["ok"] = ok
+            job["value"] = value
+            job["done"].set()
+
+    def _estimate_retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, never below the configured floor"""
+        if self._avg_latency is None:
+            return self.retry_after
+        waves = self.max_queue_size / self.num_workers
+        return max(self.retry_after, int(math.ceil(self._avg_latency * waves)))
+
+    def submit(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run one summarization job on the pool and wait for its result
+        (the summary and, for deadline requests, the generation plan used).
+        The job keeps its queue slot until a worker returns its result
+
+        Raises:
+            QueueFullError: If all queue slots are taken
+            TimeoutError: If the job does not finish within timeout
+            RuntimeError: If the worker failed to summarize
+        """
+        if not self._slots.acquire(blocking=False):
+            self._rejected += 1
+            raise QueueFullError(self._estimate_retry_after())
+
+        job_id = next(self._job_ids)
+        job = {"done": threading.Event(), "ok": False, "value": None}
+        with self._lock:
+            self._pending[job_id] = job
+
+        started = time.perf_counter()
+        try:
+            self._task_queue.put((job_id, payload))
+        except Exception:
+            with self._lock:
+                self._pending.pop(job_id, None)
+            self._slots.release()
+            raise
+        # On timeout the job stays pending: _collect_results frees its slot when the worker finishes
+        if not job["done"].wait(timeout):
+            raise TimeoutError(f"Summarization did not finish within {timeout}s")
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._completed += 1
+            if self._avg_latency is None:
+                self._avg_latency = elapsed
+            else:
+                self._avg_latency = 0.9 * self._avg_latency + 0.1 * elapsed
+
+        if not job["ok"]:
+            raise RuntimeError(job["value"])
+        return job["value"]
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load of the pool"""
+        with self._lock:
+            in_flight = len(self._pending)
+            return {
+                "num_workers": self.num_workers,
+                "ready_workers": self._ready_workers,
+                "threads_per_worker": self.threads_per_worker,
+                "max_queue_size": self.max_queue_size,
+                "in_flight": in_flight,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_latency_s": round(self._avg_latency, 4) if self._avg_latency is not None else None,
+            }
+
+    def shutdown(self):
+        """Stop all worker processes"""
+        for _ in self._processes:
+            self._task_queue.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._result_queue.put((None, False, None))
+        self._processes = []
+
+
+def _handle_connection(pool: SummarizationWorkerPool, conn, request_timeout: float):
+    """Serve a single request coming from a web worker"""
+    try:
+        message = conn.recv()
+        op = message.get("op")
+        if op == "summarize":
+            try:
+                result = pool.submit(message["payload"], timeout=request_timeout)
+                conn.send({"status": "ok", **result})
+            except QueueFullError as e:
+                conn.send({"status": "queue_full", "retry_after": e.retry_after})
+            except Exception as e:
+                conn.send({"status": "error", "message": str(e)})
+        elif op == "stats":
+            conn.send({"status": "ok", "stats": pool.stats()})
+        else:
+            conn.send({"status": "error", "message": f"Unknown op '{op}'"})
+    except EOFError:
+        pass
+    finally:
+        conn.close()
+
+
+def serve(pool: SummarizationWorkerPool, address, authkey: bytes, request_timeout: float = 120):
+    """Accept requests from web workers over local IPC until interrupted"""
+    with Listener(_parse_address(address), authkey=authkey) as listener:
+        print(f"🎧 Summarization pool listening on {listener.address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, mp.AuthenticationError) as e:
+                print(f"Rejected summarization client: {e}")
+                continue
+            threading.Thread(
+                target=_handle_connection,
+                args=(pool, conn, request_timeout),
+                daemon=True
+            ).start()
+
+
+class SummarizationClient:
+    """Client used by SummationService to talk to the worker pool"""
+
+    def __init__(self, address, authkey: bytes, timeout: float = 120, retry_after: int = 5):
+        self.address = _parse_address(address)
+        self.authkey = authkey
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+    def _request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        with Client(self.address, authkey=self.authkey) as conn:
+            conn.send(message)
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"Summarization pool did not answer within {self.timeout}s")
+            return conn.recv()
+
+    def summarize(
+        self,
+        text: str,
+        mode: str = "abstractive",
+        deadline_ms: Optional[float] = None,
+        **params
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Summarize a text on the worker pool
+
+        Returns:
+            Tuple of the summary and the generation plan used (deadline requests only)
+
+        Raises:
+            QueueFullError: If the pool queue is full
+            PoolUnavailableError: If the pool process is not running or drops the connection
+            RuntimeError: If the pool reported an error
+        """
+        try:
+            reply = self._request({
+                "op": "summarize",
+                "payload": {"text": text, "mode": mode, "deadline_ms": deadline_ms, "params": params}
+            })
+        except (ConnectionError, FileNotFoundError, EOFError) as e:
+            raise PoolUnavailableError(self.retry_after, type(e).__name__)
+        if reply["status"] == "queue_full":
+            raise QueueFullError(reply["retry_after"])
+        if reply["status"] != "ok":
+            raise RuntimeError(reply.get("message", "Unknown summarization pool error"))
+        return reply["summary"], reply.get("plan")
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """Pool statistics, or None when the pool is not reachable"""
+        try:
+            return self._request({"op": "stats"})["stats"]
+        except (OSError, EOFError, TimeoutError):
+            return None
+
+
+def main():
+    config = load_pool_config()
+    # Prefer the counts recommended by utils/ThreadTuner.py when available
+    tuned = load_thread_config("summarization") or {}
+    ap = argparse.ArgumentParser(description="Dedicated summarization worker pool")
+    ap.add_argument("--workers", type=int, default=tuned.get("num_workers", config["NUM_WORKERS"]),
+                    help="Number of worker processes")
+    ap.add_argument("--threads", type=int, default=tuned.get("num_threads", config["THREADS_PER_WORKER"]),
+                    help="torch threads per worker")
+    ap.add_argument("--queue_size", type=int, default=config["MAX_QUEUE_SIZE"], help="Maximum queued + running requests")
+    ap.add_argument("--retry_after", type=int, default=config["RETRY_AFTER"], help="Minimum Retry-After in seconds")
+    args = ap.parse_args()
+
+    pool = SummarizationWorkerPool(
+        num_workers=args.workers,
+        threads_per_worker=args.threads,
+        max_queue_size=args.queue_size,
+        retry_after=args.retry_after,
+        calibrate_planner=config["CALIBRATE_ON_STARTUP"]
+    )
+    pool.start()
+    try:
+        serve(
+            pool,
+            config["WORKER_ADDRESS"],
+            config["WORKER_AUTHKEY"].encode("utf-8"),
+            request_timeout=config["REQUEST_TIMEOUT"]
+        )
+    except KeyboardInterrupt:
+        print("\n🔄 Shutting down summarization pool...")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
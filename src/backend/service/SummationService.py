@@ -1,6 +1,6 @@
 import os
 import sys
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 # Add path to access models
 HERE = os.path.dirname(__file__)
@@ -8,18 +8,70 @@ SRC_ROOT = os.path.abspath(os.path.join(HERE, "../../"))
 if SRC_ROOT not in sys.path:
     sys.path.insert(0, SRC_ROOT)
 
-try:
-    from models.Text_summarization import infer as summarization
-except ImportError as e:
-    print(f"Warning: Could not import summarization model: {e}")
-    summarization = None
+from .SummarizationWorkerPool import SummarizationClient, QueueFullError, PoolUnavailableError, load_pool_config
+from utils.ThreadTuner import apply_thread_config
+from models.Text_summarization import extractive
+
+# The in-process model is only loaded when the worker pool is not used,
+# so web workers stay lightweight in pool mode
+summarization = None
+planner = None
+_summarization_loaded = False
+
+def _load_local_model(calibrate_planner: bool = True):
+    """Import the summarization model (and deadline planner) into this process on first use"""
+    global summarization, planner, _summarization_loaded
+    if not _summarization_loaded:
+        _summarization_loaded = True
+        try:
+            apply_thread_config("summarization")
+            from models.Text_summarization import infer
+            from models.Text_summarization import planner as deadline_planner
+            summarization = infer
+            planner = deadline_planner
+            if calibrate_planner:
+                planner.get_planner()
+        except Exception as e:
+            print(f"Warning: Could not import summarization model: {e}")
+    return summarization
+
+SUMMARY_MODES = ("abstractive", "long", "extractive")
 
 class SummationService:
     """Service for text summarization operations"""
     
     def __init__(self):
         """Initialize the summarization service"""
-        pass
+        self.config = load_pool_config()
+        self._client = None
+        if self.config["USE_WORKER_POOL"]:
+            self._client = SummarizationClient(
+                self.config["WORKER_ADDRESS"],
+                self.config["WORKER_AUTHKEY"].encode("utf-8"),
+                timeout=self.config["REQUEST_TIMEOUT"],
+                retry_after=self.config["RETRY_AFTER"]
+            )
+        else:
+            _load_local_model(self.config["CALIBRATE_ON_STARTUP"])
+    
+    def _generate(
+        self,
+        text: str,
+        mode: str,
+        deadline_ms: Optional[float] = None,
+        **params
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Run the model either on the worker pool or in this process, returning the summary and plan used"""
+        if mode == "extractive":
+            # Extractive summarization runs in milliseconds and needs no model
+            return extractive.summarize_extractive(text, max_words=params["out_max_len"]), None
+        if self._client is not None:
+            return self._client.summarize(text, mode=mode, deadline_ms=deadline_ms, **params)
+        if deadline_ms is not None:
+            return planner.get_planner().summarize(text, deadline_ms, **params)
+        if mode == "long":
+            return summarization.summarize_long(text, **params), None
+        return summarization.summarize_one(text, **params), None
     
     def summarize_text(
         self,
@@ -29,7 +81,10 @@ class SummationService:
         beams: int = 2,
         nrng: int = 3,
         do_sample: bool = False,
-        temp: float = 1.0
+        temp: float = 1.0,
+        mode: str = "abstractive",
+        preselect: bool = False,
+        deadline_ms: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Summarize a single text
@@ -42,16 +97,32 @@ class SummationService:
             nrng (int): No repeat ngram size
             do_sample (bool): Whether to use sampling
             temp (float): Temperature for sampling
+            mode (str): "abstractive" truncates at in_max_len, "long" summarizes
+                token-budgeted chunks then their joined summaries (map-reduce),
+                "extractive" picks the top LexRank sentences without the model
+            preselect (bool): Keep only the most central sentences (TF-IDF) before
+                generation to shorten the encoder input
+            deadline_ms (int): Latency budget; the service picks the beam count, output
+                length and model variant that fit it (abstractive mode only)
             
         Returns:
-            Dict[str, Any]: Summarization result containing original text and summary
+            Dict[str, Any]: Summarization result containing original text, summary
+                and, for deadline requests, the generation plan used
             
         Raises:
             ValueError: If text is empty or None
+            QueueFullError: If the summarization worker pool is saturated
+            PoolUnavailableError: If the worker pool is down and the extractive fallback is off
             Exception: If summarization fails
         """
         if not text or not text.strip():
             raise ValueError("Text cannot be empty or None")
+        if mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summarization mode '{mode}', expected one of {SUMMARY_MODES}")
+        if deadline_ms is not None and mode != "abstractive":
+            raise ValueError("deadline_ms is only supported in abstractive mode")
+        if deadline_ms is not None and deadline_ms <= 0:
+            raise ValueError("deadline_ms must be positive")
         
         # Validate parameters
         in_max_len = max(1, min(in_max_len, 2048))  # Reasonable limits
@@ -60,20 +131,30 @@ class SummationService:
         nrng = max(1, min(nrng, 5))
         temp = max(0.1, min(temp, 2.0))
         
+        params = dict(
+            in_max_len=in_max_len,
+            out_max_len=out_max_len,
+            num_beams=beams,
+            no_repeat_ngram_size=nrng,
+            do_sample=do_sample,
+            temperature=temp,
+            preselect=preselect,
+            # Greedy requests can use the draft model; outputs stay identical
+            assisted=self.config["ASSISTED_DECODING"] and beams == 1 and not do_sample,
+        )
+        requested_mode = mode
+        if self._client is None and summarization is None:
+            # No pool and the local model failed to load: only extractive summaries are possible
+            mode = "extractive"
         try:
-            if summarization is None:
-                # Fallback mock summarization
-                summary = self._mock_summarize(text, out_max_len)
-            else:
-                summary = summarization.summarize_one(
-                    text,
-                    in_max_len=in_max_len,
-                    out_max_len=out_max_len,
-                    num_beams=beams,
-                    no_repeat_ngram_size=nrng,
-                    do_sample=do_sample,
-                    temperature=temp,
-                )
+            try:
+                summary, plan = self._generate(text, mode, deadline_ms=deadline_ms, **params)
+            except (QueueFullError, PoolUnavailableError):
+                if not self.config["EXTRACTIVE_FALLBACK"]:
+                    raise
+                # Abstractive queue is saturated or the pool is down: answer quickly with an extractive summary
+                mode = "extractive"
+                summary, plan = self._generate(text, mode, **params)
             
             return {
                 "text": text,
@@ -84,28 +165,19 @@ class SummationService:
                     "beams": beams,
                     "nrng": nrng,
                     "do_sample": do_sample,
-                    "temperature": temp
-                }
+                    "temperature": temp,
+                    "mode": mode,
+                    "requested_mode": requested_mode,
+                    "preselect": preselect,
+                    "deadline_ms": deadline_ms
+                },
+                "plan": plan
             }
+        except (QueueFullError, PoolUnavailableError):
+            raise
         except Exception as e:
             raise Exception(f"Summarization failed: {str(e)}")
     
-    def _mock_summarize(self, text: str, max_len: int) -> str:
-        """Mock summarization for when the model is not available"""
-        sentences = text.split('.')
-        if len(sentences) <= 1:
-            return text[:max_len] + "..." if len(text) > max_len else text
-        
-        # Take first few sentences up to max_len
-        summary = ""
-        for sentence in sentences:
-            if len(summary + sentence + ".") <= max_len:
-                summary += sentence + "."
-            else:
-                break
-        
-        return summary if summary else text[:max_len] + "..."
-    
     def summarize_texts(
         self,
         texts: list,
@@ -114,7 +186,10 @@ class SummationService:
         beams: int = 2,
         nrng: int = 3,
         do_sample: bool = False,
-        temp: float = 1.0
+        temp: float = 1.0,
+        mode: str = "abstractive",
+        preselect: bool = False,
+        deadline_ms: Optional[int] = None
     ) -> list:
         """
         Summarize multiple texts
@@ -142,9 +217,14 @@ class SummationService:
                     beams=beams,
                     nrng=nrng,
                     do_sample=do_sample,
-                    temp=temp
+                    temp=temp,
+                    mode=mode,
+                    preselect=preselect,
+                    deadline_ms=deadline_ms
                 )
                 results.append(result)
+            except (QueueFullError, PoolUnavailableError):
+                raise
             except Exception as e:
                 results.append({"error": str(e), "text": text})
         
@@ -157,16 +237,28 @@ class SummationService:
         Returns:
             Dict[str, Any]: Model information
         """
+        if self._client is not None:
+            pool_stats = self._client.stats()
+            status = "active" if pool_stats is not None else "unavailable"
+        else:
+            pool_stats = None
+            status = "active" if summarization is not None else "extractive"
+
         return {
             "model_type": "text_summarization",
             "description": "Text summarization model for Vietnamese news",
-            "status": "active" if summarization is not None else "mock",
+            "status": status,
+            "worker_pool": pool_stats,
+            "encoder_cache": summarization.encoder_cache.stats() if summarization is not None else None,
             "default_parameters": {
                 "in_max_len": 512,
                 "out_max_len": 128,
                 "beams": 2,
                 "nrng": 3,
                 "do_sample": False,
-                "temperature": 1.0
-            }
+                "temperature": 1.0,
+                "mode": "abstractive",
+                "preselect": False
+            },
+            "modes": list(SUMMARY_MODES)
         }
\ No newline at end of file
@@ -1,36 +1,173 @@
+import argparse
 import json
-from sklearn.cluster import KMeans, AgglomerativeClustering
+import time
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans, AgglomerativeClustering
 from sklearn.metrics import silhouette_score
 from sentence_transformers import SentenceTransformer
 import re
 import os
 import sys
 import hdbscan
-from sklearn.metrics.pairwise import cosine_distances
 import numpy as np
 import pandas as pd
 
 sys.path.append(os.getcwd())
+from src.utils.ThreadTuner import apply_thread_config
+from src.models.Text_Clustering.embedding_store import EmbeddingStore
+from src.models.Text_Clustering.cluster_snapshot import ClusteringSnapshot, corpus_hash, load_latest_snapshot
+from src.models.Text_Clustering.ann_index import build_index, load_index
+from src.models.Text_Clustering.neighbors import NeighborTable
+from src.models.Text_Clustering.reduction import Reducer
+
+DATA_PATH = "data/processed_data/processed_data_dash.json"
+EMBEDDING_MODEL = 'intfloat/multilingual-e5-large-instruct'
+# e5-instruct: truy vấn cần kèm mô tả tác vụ, văn bản trong corpus thì encode nguyên dạng
+QUERY_INSTRUCTION = 'Given a Vietnamese news search query, retrieve relevant news articles'
+# Chọn k: từ số bài này trở lên dùng MiniBatchKMeans, silhouette tính trên mẫu con
+MINIBATCH_THRESHOLD = 20000
+SILHOUETTE_SAMPLE_SIZE = 5000
+# Cập nhật tăng dần (chỉ cho phương pháp có tâm cụm, nhãn 0..k-1); cần fit lại khi vượt một ngưỡng:
+# tỉ lệ bài thêm từ lần fit gần nhất, inertia trung bình của bài mới so với lúc fit,
+# tổng độ dịch chuyển (Euclid) của một tâm
+INCREMENTAL_METHODS = ("kmeans", "hierarchical")
+REFIT_ADDED_FRACTION = 0.25
+REFIT_INERTIA_RATIO = 1.3
+REFIT_CENTROID_DRIFT = 0.1
+
+
+DEFAULT_CLUSTERING_CONFIG = {
+    # Kiểu lưu embedding trong RAM: float32, float16 hoặc int8
+    "EMBEDDING_DTYPE": "float32",
+    # Giảm chiều trước khi chọn k/phân cụm: null (tắt), "pca" hoặc "truncate"
+    "REDUCTION_METHOD": None,
+    "REDUCTION_DIM": 256,
+    # HDBSCAN: giới hạn bộ nhớ ước tính (MB), fit bị hủy trước khi cấp phát nếu vượt
+    "HDBSCAN_MAX_MEMORY_MB": 2048,
+}
+# HDBSCAN chạy bằng boruvka_kdtree trên vector đã giảm chiều (kd-tree kém hiệu quả ở số chiều cao);
+# với vector đã chuẩn hóa, khoảng cách Euclid ||a-b||^2 = 2 - 2cos nên thứ tự giống cosine
+HDBSCAN_DIM = 32
+HDBSCAN_MIN_CLUSTER_SIZE = 5
+
+
+def load_clustering_config(config_path="config.json"):
+    """Mục CLUSTERING trong config.json, chồng lên giá trị mặc định."""
+    config = dict(DEFAULT_CLUSTERING_CONFIG)
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config.update(json.load(f).get("CLUSTERING", {}))
+    except FileNotFoundError:
+        pass
+    return config
+
+CLUSTERING_CONFIG = load_clustering_config()
+EMBEDDING_DTYPE = CLUSTERING_CONFIG["EMBEDDING_DTYPE"]
 
 # Loại bỏ kí tự chữ số
 def remove_numbers(text):
     return re.sub(r'\d+', '', text)
 
+def _fit_candidate(embeddings, k, sample_idx, random_state, use_minibatch):
+    """Fit một ứng viên k và chấm silhouette (cosine) trên tập mẫu chung."""
+    t0 = time.perf_counter()
+    if use_minibatch:
+        km = MiniBatchKMeans(n_clusters=k, batch_size=4096, n_init=3, random_state=random_state)
+    else:
+        km = KMeans(n_clusters=k, n_init="auto", random_state=random_state)
+    labels_tmp = km.fit_predict(embeddings)
+    fit_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    sample_labels = labels_tmp[sample_idx]
+    if len(np.unique(sample_labels)) > 1:
+        sil = silhouette_score(embeddings[sample_idx], sample_labels, metric="cosine")
+    else:
+        sil = -1.0
+    score_s = time.perf_counter() - t0
+
+    return {
+        "k": k,
+        "silhouette": float(sil),
+        "inertia": float(km.inertia_),
+        "fit_s": round(fit_s, 3),
+        "score_s": round(score_s, 3),
+    }
+
+# Chọn số cụm: fit các ứng viên song song, chấm silhouette trên cùng một mẫu con
+# (silhouette đầy đủ là O(n^2)). Kết quả cố định theo random_state.
+def select_k(embeddings, candidate_k, random_state=42, n_jobs=-1,
+             sample_size=SILHOUETTE_SAMPLE_SIZE, minibatch_threshold=MINIBATCH_THRESHOLD):
+    n = len(embeddings)
+    rng = np.random.default_rng(random_state)
+    sample_idx = np.sort(rng.choice(n, size=sample_size, replace=False)) if n > sample_size else np.arange(n)
+    use_minibatch = n >= minibatch_threshold
+
+    t0 = time.perf_counter()
+    report = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_candidate)(embeddings, k, sample_idx, random_state, use_minibatch)
+        for k in candidate_k
+    )
+    for r in report:
+        print(f"Số cụm: {r['k']}, silhouette score: {r['silhouette']:.4f} "
+              f"(fit {r['fit_s']:.1f}s, score {r['score_s']:.1f}s)")
+    print(f"Chọn k xong trong {time.perf_counter() - t0:.1f}s "
+          f"({'MiniBatchKMeans' if use_minibatch else 'KMeans'}, silhouette trên {len(sample_idx)}/{n} bài)")
+
+    best = max(report, key=lambda r: (r["silhouette"], -r["k"]))
+    return best["k"], report
+
 # Hàm tìm số cụm tốt nhất dựa trên silhouette score
-def find_best_k(embeddings, candidate_k):
-    scores = {}
-    for k in candidate_k:
-        km = KMeans(n_clusters=k, n_init="auto", random_state=42)
-        labels_tmp = km.fit_predict(embeddings)
-
-        # Tính toán silhouette score
-        sil = silhouette_score(embeddings, labels_tmp, metric="cosine")
-        scores[k] = sil
-        print(f"Số cụm: {k}, silhouette score: {sil:.4f}")
-
-    best_k = max(scores, key=scores.get)
+def find_best_k(embeddings, candidate_k, random_state=42):
+    best_k, report = select_k(embeddings, candidate_k, random_state=random_state)
+    scores = {r["k"]: r["silhouette"] for r in report}
     return best_k, scores
 
+# Tâm của từng cụm (bỏ nhiễu -1), theo thứ tự nhãn tăng dần
+def compute_centroids(embeddings, labels):
+    clusters = [cl for cl in np.unique(labels) if cl != -1]
+    if not clusters:
+        return np.empty((0, embeddings.shape[1]), dtype=np.float32)
+    return np.stack([embeddings[labels == cl].mean(axis=0) for cl in clusters]).astype(np.float32)
+
+# Thành viên của từng cụm sắp theo độ gần tâm (cosine) giảm dần: {cluster_id: mảng chỉ số bài}.
+# Tâm theo thứ tự nhãn tăng dần như compute_centroids, bài nhiễu (-1) bị bỏ.
+def build_cluster_members(embeddings, labels, centroids, block_size=8192):
+    labels = np.asarray(labels)
+    cluster_ids = np.unique(labels[labels != -1])
+    centroids = np.asarray(centroids, dtype=np.float32)
+    unit_centroids = centroids / np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    sims = np.full(len(labels), -np.inf, dtype=np.float32)
+    for start in range(0, len(labels), block_size):
+        block_labels = labels[start:start + block_size]
+        mask = block_labels != -1
+        block = np.asarray(embeddings[start:start + block_size], dtype=np.float32)[mask]
+        block_centroids = unit_centroids[np.searchsorted(cluster_ids, block_labels[mask])]
+        norms = np.maximum(np.linalg.norm(block, axis=1), 1e-12)
+        sims[start:start + block_size][mask] = np.einsum("ij,ij->i", block, block_centroids) / norms
+
+    # Sắp theo nhãn rồi theo độ tương đồng giảm dần, cắt thành từng cụm
+    order = np.lexsort((-sims, labels))
+    order = order[labels[order] != -1]
+    bounds = np.searchsorted(labels[order], cluster_ids[1:])
+    return {int(cl): members for cl, members in zip(cluster_ids, np.split(order, bounds))}
+
+# Ước lượng bộ nhớ của HDBSCAN boruvka_kdtree (byte): bản float64 của dữ liệu và kd-tree,
+# khoảng cách tới min_samples láng giềng, cây khung nhỏ nhất và cây condensed
+def estimate_hdbscan_memory(n, dim, min_samples):
+    return 2 * n * dim * 8 + n * (min_samples + 1) * 16 + n * 64
+
+# Bình phương khoảng cách Euclid trung bình tới tâm của cụm (bỏ nhiễu), tính theo khối
+def mean_sq_distance(embeddings, labels, centroids, block_size=4096):
+    total, count = 0.0, 0
+    for start in range(0, len(labels), block_size):
+        block_labels = np.asarray(labels[start:start + block_size])
+        mask = block_labels >= 0
+        diffs = np.asarray(embeddings[start:start + block_size])[mask] - centroids[block_labels[mask]]
+        total += float(np.einsum("ij,ij->", diffs, diffs))
+        count += int(mask.sum())
+    return total / max(count, 1)
+
 # Hàm tính toán MSE
 def compute_mse(embeddings, labels):
     mse_list = []
@@ -63,26 +200,58 @@ def compute_mse(embeddings, labels):
     
 
 class VietnameseTextClustering:
-    def __init__(self):
+    def __init__(self, fit_if_stale=False, data=None, load_snapshot=True):
         # Load data but don't run clustering yet
-        with open("data/processed_data/processed_data_dash.json", "r", encoding="utf-8") as f:
-            self.data = json.load(f)
-            print(f"Đã tải {len(self.data)} bài báo từ file JSON.")
+        if data is None:
+            with open(DATA_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                print(f"Đã tải {len(data)} bài báo từ file JSON.")
+        self.data = data
 
         self.embedding_method = None  # Lazy load this too
+        # Embedding đã tính được lưu trên đĩa, chỉ bài mới mới phải encode
+        self.embedding_store = EmbeddingStore(EMBEDDING_MODEL, dtype=EMBEDDING_DTYPE)
         self.vectors = None
         self.labels = None
         self.texts = None
         self.metadata = None
+        self.model = None
+        self.centroids = None
+        # Chỉ số bài của từng cụm, sắp theo khoảng cách tới tâm (tính khi fit/load snapshot)
+        self.cluster_members = {}
+        self.k = None
+        self.method = None
+        self.snapshot_extra = {}
+        self.k_report = None
+        self.fit_report = {}
+        # Giảm chiều trước khi phân cụm (None = dùng embedding đầy đủ), reducer được lưu cùng snapshot
+        self.reduction_method = CLUSTERING_CONFIG["REDUCTION_METHOD"]
+        self.reduction_dim = CLUSTERING_CONFIG["REDUCTION_DIM"]
+        self.reducer = None
+        self.corpus_hash = None
+        self.snapshot_version = None
+        self.snapshot_dir = None
+        # Index ANN trên embedding của corpus (id = số thứ tự bài trong self.data)
+        self.ann_index = None
+        # Bảng top-k bài liên quan tính sẵn cho /api/news/{id}/related
+        self.neighbor_table = None
 
-        # Pre compute the clusters
-        self.fit_predict(self.data, method='kmeans')
+        # Load clusters from the snapshot of this corpus. Fitting only happens when
+        # explicitly requested (fit_if_stale, Text_cluster.py --refit or a background job).
+        # load_snapshot=False: instance rỗng để fit riêng (vd. refit nền rồi thay model đang phục vụ).
+        if load_snapshot:
+            self.load_or_fit(self.data, method='kmeans', fit_if_stale=fit_if_stale)
+
+    @property
+    def is_fitted(self):
+        return self.labels is not None
 
     def _get_embedding_method(self):
         """Lazy load the embedding model"""
         if self.embedding_method is None:
             print("Loading SentenceTransformer model...")
-            self.embedding_method = SentenceTransformer('intfloat/multilingual-e5-large-instruct')
+            apply_thread_config("embedding")
+            self.embedding_method = SentenceTransformer(EMBEDDING_MODEL)
         return self.embedding_method
 
     def process_texts(self, texts):
@@ -90,90 +259,373 @@ class VietnameseTextClustering:
         return [remove_numbers(text) for text in texts]
 
     def vectorize(self, texts):
+        """Lấy embedding cho danh sách văn bản, dùng lại embedding đã lưu trong store."""
+        return self.embedding_store.get_or_encode(texts, self.encode)
+
+    def encode(self, texts, show_progress_bar=True):
         """Tạo embedding cho danh sách văn bản."""
         embedding_method = self._get_embedding_method()
         vectors = embedding_method.encode(
             texts,
             batch_size=16,
-            show_progress_bar=True,
+            show_progress_bar=show_progress_bar,
             convert_to_numpy=True,
             normalize_embeddings=True
         )
         return vectors
 
+    def encode_query(self, query):
+        """Embedding (đã chuẩn hóa) của một truy vấn tìm kiếm, cùng không gian với corpus."""
+        return self.encode([f"Instruct: {QUERY_INSTRUCTION}\nQuery: {query}"], show_progress_bar=False)[0]
+
+    def _clustering_vectors(self, method='kmeans'):
+        """
+        Vector để chọn k và phân cụm: embedding đầy đủ (giải nén một lần nếu lưu dạng float16/int8),
+        hoặc đã giảm chiều và chuẩn hóa lại khi bật reduction. HDBSCAN luôn dùng tối đa HDBSCAN_DIM chiều.
+        """
+        reduction_method, reduction_dim = self.reduction_method, self.reduction_dim
+        if method == 'hdbscan' and (not reduction_method or reduction_dim > HDBSCAN_DIM):
+            reduction_method, reduction_dim = "pca", HDBSCAN_DIM
+        if not reduction_method:
+            self.reducer = None
+            return np.asarray(self.vectors, dtype=np.float32)
+        self.reducer = Reducer(reduction_method, reduction_dim)
+        vectors = self.reducer.fit_transform(self.vectors)
+        print(f"Giảm chiều {self.vectors.shape[1]} -> {vectors.shape[1]} ({reduction_method}) "
+              f"trong {self.reducer.fit_s:.1f}s")
+        return vectors
+
     def cluster(self, method='kmeans'):
-        # Tìm số cụm tối ưu
-        candidate_k = range(8, 20)
-        optimal_k, _ = find_best_k(self.vectors, candidate_k)
-        print("Số cụm tối ưu:", optimal_k)
+        vectors = self._clustering_vectors(method)
+        self.fit_report = {}
+
+        # Tìm số cụm tối ưu (HDBSCAN tự xác định số cụm)
+        if method != 'hdbscan':
+            candidate_k = range(8, 20)
+            optimal_k, k_report = select_k(vectors, candidate_k)
+            print("Số cụm tối ưu:", optimal_k)
+        else:
+            k_report = []
 
         # Phân cụm với KMeans, HDBSCAN hoặc Hierarchical
-        if method == 'kmeans':
+        if method == 'kmeans' and len(vectors) >= MINIBATCH_THRESHOLD:
+            model = MiniBatchKMeans(n_clusters=optimal_k, batch_size=4096, n_init=3, random_state=42)
+            labels = model.fit_predict(vectors)
+
+        elif method == 'kmeans':
             model = KMeans(
                 n_clusters=optimal_k,
                 random_state=42,
                 n_init="auto"
             )
-            labels = model.fit_predict(self.vectors)
+            labels = model.fit_predict(vectors)
 
         elif method == 'hdbscan':
-            cosine_distance_matrix = cosine_distances(self.vectors).astype(np.float64)
-            hdbscan_model = hdbscan.HDBSCAN(min_cluster_size=5, metric='precomputed')
-            labels = hdbscan_model.fit_predict(cosine_distance_matrix)
+            model, labels = self._fit_hdbscan(vectors)
 
         elif method == 'hierarchical':
-            hierarchial = AgglomerativeClustering(n_clusters=optimal_k, metric="euclidean", linkage="ward")
-            labels = hierarchial.fit_predict(self.vectors)
+            model = AgglomerativeClustering(n_clusters=optimal_k, metric="euclidean", linkage="ward")
+            labels = model.fit_predict(vectors)
 
         else:
             raise ValueError(f"Phương pháp phân cụm '{method}' không được hỗ trợ.")
 
+        self.model = model
+        self.k_report = k_report
         return labels
 
-    def fit_predict(self, data, method='kmeans'):
-        
-        # Nhận dữ liệu JSON, chỉ lấy content_clean để phân cụm.
+    def _fit_hdbscan(self, vectors, min_cluster_size=HDBSCAN_MIN_CLUSTER_SIZE):
+        """
+        HDBSCAN (boruvka_kdtree, Euclid) trên vector đã giảm chiều và chuẩn hóa, không tạo ma trận
+        khoảng cách n x n. Kiểm tra bộ nhớ ước tính trước khi fit và ghi báo cáo thời gian vào fit_report.
+        """
+        n, dim = vectors.shape
+        estimate_mb = estimate_hdbscan_memory(n, dim, min_cluster_size) / 2**20
+        limit_mb = CLUSTERING_CONFIG["HDBSCAN_MAX_MEMORY_MB"]
+        if estimate_mb > limit_mb:
+            raise MemoryError(f"HDBSCAN trên {n} bài x {dim} chiều cần khoảng {estimate_mb:.0f} MB, "
+                              f"vượt giới hạn {limit_mb} MB (CLUSTERING.HDBSCAN_MAX_MEMORY_MB)")
+
+        t0 = time.perf_counter()
+        model = hdbscan.HDBSCAN(min_cluster_size=min_cluster_size, metric='euclidean',
+                                algorithm='boruvka_kdtree', core_dist_n_jobs=-1)
+        labels = model.fit_predict(vectors)
+        fit_s = time.perf_counter() - t0
 
+        n_clusters = len(np.unique(labels[labels != -1]))
+        noise = float(np.mean(labels == -1))
+        self.fit_report["hdbscan"] = {
+            "n_items": int(n),
+            "dim": int(dim),
+            "reduce_s": round(self.reducer.fit_s, 3) if self.reducer is not None else 0.0,
+            "fit_s": round(fit_s, 3),
+            "estimated_memory_mb": round(estimate_mb, 1),
+            "n_clusters": int(n_clusters),
+            "noise_fraction": round(noise, 4),
+        }
+        print(f"HDBSCAN: {n_clusters} cụm, {noise:.1%} nhiễu, fit {fit_s:.1f}s trên {n} bài x {dim} chiều "
+              f"(ước tính {estimate_mb:.0f} MB)")
+        return model, labels
+
+    def _prepare(self, data):
+        # Nhận dữ liệu JSON, chỉ lấy content_clean để phân cụm.
         self.texts = [item["content_clean"] for item in data]
         self.metadata = data  # Lưu lại toàn bộ metadata
         self.vectors = self.vectorize(self.texts)
-        self.labels = self.cluster(method)
+        self.corpus_hash = corpus_hash(self.texts, EMBEDDING_MODEL)
+
+    def fit_predict(self, data, method='kmeans', save=True):
+        """Fit lại từ đầu trên data và (mặc định) lưu snapshot mới."""
+        self._prepare(data)
+        labels = self.cluster(method)
+        centroids = compute_centroids(self.vectors, labels)
+
+        snapshot = ClusteringSnapshot(
+            model=self.model,
+            labels=labels,
+            centroids=centroids,
+            k=len(centroids),
+            method=method,
+            corpus_hash=self.corpus_hash,
+            embedding_model=EMBEDDING_MODEL,
+            extra={"k_selection": self.k_report or [], **self.fit_report},
+            reducer=self.reducer,
+        )
+        if method in INCREMENTAL_METHODS:
+            snapshot.extra["incremental"] = self._incremental_baseline(labels, centroids)
+        if save:
+            snapshot.save()
+        self._apply_snapshot(snapshot)
+        return self.labels
+
+    def _incremental_baseline(self, labels, centroids):
+        """Trạng thái cập nhật tăng dần ngay sau một lần fit đầy đủ."""
+        return {
+            "fit_items": int(len(labels)),
+            "fit_mean_sq_dist": mean_sq_distance(self.vectors, labels, centroids),
+            "added": 0,
+            "added_sq_dist": 0.0,
+            "centroid_drift": [0.0] * len(centroids),
+        }
+
+    def update(self, data, save=True):
+        """
+        Cập nhật tăng dần khi data là corpus hiện tại cộng các bài mới nối vào cuối: bài mới được
+        gán vào tâm gần nhất, tâm được cập nhật như MiniBatchKMeans.partial_fit (trung bình cộng dồn
+        theo số bài của cụm), index ANN và bảng bài liên quan được cập nhật, rồi lưu snapshot mới.
+
+        Trả về báo cáo; refit_needed=True khi không cập nhật tăng dần được (corpus bị sửa/xóa,
+        phương pháp không có tâm) hoặc drift/inertia vượt ngưỡng. Trong trường hợp sau bài mới vẫn
+        được gán cụm, người gọi nên fit lại toàn bộ (vd. ClusteringService chạy refit nền).
+        """
+        n_old = len(self.labels)
+        texts = [item["content_clean"] for item in data]
+        report = {"added": len(texts) - n_old, "refit_needed": False, "reason": None}
+
+        if len(texts) >= n_old and corpus_hash(texts[:n_old], EMBEDDING_MODEL) == self.corpus_hash:
+            if len(texts) == n_old:
+                return report
+        else:
+            report.update(added=0, refit_needed=True, reason="Corpus thay đổi không phải dạng nối thêm bài")
+            return report
+        if self.method not in INCREMENTAL_METHODS:
+            report.update(refit_needed=True, reason=f"Phương pháp {self.method} không hỗ trợ cập nhật tăng dần")
+            return report
+
+        t0 = time.perf_counter()
+        vectors = self.vectorize(texts)
+        new_vectors = np.asarray(vectors[n_old:], dtype=np.float32)
+        centroids = np.asarray(self.centroids, dtype=np.float32)
+        k = len(centroids)
+
+        # Gán vào tâm gần nhất theo khoảng cách Euclid (giống KMeans.predict)
+        sq_dists = ((new_vectors ** 2).sum(axis=1)[:, None] - 2 * new_vectors @ centroids.T
+                    + (centroids ** 2).sum(axis=1)[None, :])
+        new_labels = np.argmin(sq_dists, axis=1)
+        new_sq = np.maximum(sq_dists[np.arange(len(new_labels)), new_labels], 0.0)
+
+        # Tâm mới = trung bình của (bài cũ của cụm + bài mới), như MiniBatchKMeans.partial_fit
+        counts = np.bincount(self.labels[self.labels >= 0], minlength=k).astype(np.float64)
+        batch_counts = np.bincount(new_labels, minlength=k)
+        batch_sums = np.zeros((k, centroids.shape[1]), dtype=np.float64)
+        np.add.at(batch_sums, new_labels, new_vectors)
+        touched = batch_counts > 0
+        updated = centroids.astype(np.float64)
+        updated[touched] = ((updated[touched] * counts[touched, None] + batch_sums[touched])
+                            / (counts[touched] + batch_counts[touched])[:, None])
+        updated = updated.astype(np.float32)
+        shift = np.linalg.norm(updated - centroids, axis=1)
+
+        state = dict(self.snapshot_extra.get("incremental")
+                     or self._incremental_baseline(self.labels, centroids))
+        state["added"] += len(new_vectors)
+        state["added_sq_dist"] += float(new_sq.sum())
+        drift = np.asarray(state["centroid_drift"]) + shift
+        state["centroid_drift"] = drift.tolist()
+        added_fraction = state["added"] / max(state["fit_items"], 1)
+        inertia_ratio = state["added_sq_dist"] / state["added"] / max(state["fit_mean_sq_dist"], 1e-12)
+        report.update(
+            added_fraction=round(added_fraction, 4),
+            inertia_ratio=round(inertia_ratio, 4),
+            max_centroid_drift=round(float(drift.max()), 4),
+        )
+        if added_fraction > REFIT_ADDED_FRACTION:
+            report.update(refit_needed=True, reason=f"Đã thêm {added_fraction:.0%} số bài từ lần fit gần nhất")
+        elif inertia_ratio > REFIT_INERTIA_RATIO:
+            report.update(refit_needed=True, reason=f"Inertia của bài mới gấp {inertia_ratio:.2f} lần lúc fit")
+        elif drift.max() > REFIT_CENTROID_DRIFT:
+            report.update(refit_needed=True, reason=f"Tâm cụm dịch chuyển {drift.max():.3f}")
+
+        # Model fit trên vector đã giảm chiều giữ tâm của nó, self.centroids luôn ở không gian embedding
+        if hasattr(self.model, "cluster_centers_") and self.model.cluster_centers_.shape == updated.shape:
+            self.model.cluster_centers_ = updated
+        self.data = data
+        self.texts = texts
+        self.metadata = data
+        self.vectors = vectors
+        self.corpus_hash = corpus_hash(texts, EMBEDDING_MODEL)
+        self.ann_index.add(new_vectors, np.arange(n_old, len(texts)))
+        self.neighbor_table.refresh(vectors)
+
+        snapshot = ClusteringSnapshot(
+            model=self.model,
+            labels=np.concatenate([self.labels, new_labels.astype(self.labels.dtype)]),
+            centroids=updated,
+            k=k,
+            method=self.method,
+            corpus_hash=self.corpus_hash,
+            embedding_model=EMBEDDING_MODEL,
+            extra={**self.snapshot_extra, "incremental": state, "base_version": self.snapshot_version},
+            reducer=self.reducer,
+        )
+        if save:
+            snapshot.save()
+            # Index và bảng hàng xóm đã cập nhật tại chỗ, lưu sang snapshot mới thay vì build lại
+            self.ann_index.save(os.path.join(snapshot.path, "ann"))
+            self.neighbor_table.save(os.path.join(snapshot.path, "neighbors"))
+        self._apply_snapshot(snapshot, ann_index=self.ann_index, neighbor_table=self.neighbor_table)
+        print(f"Cập nhật tăng dần {len(new_vectors)} bài trong {time.perf_counter() - t0:.1f}s "
+              f"(thêm {added_fraction:.1%}, inertia x{inertia_ratio:.2f}, drift {drift.max():.3f}).")
+        return report
+
+    def load_or_fit(self, data, method='kmeans', fit_if_stale=False):
+        """Dùng snapshot nếu được fit trên đúng corpus này, nếu không chỉ fit khi fit_if_stale."""
+        self._prepare(data)
+        snapshot = load_latest_snapshot(self.corpus_hash)
+        if snapshot is not None:
+            self._apply_snapshot(snapshot)
+        elif fit_if_stale:
+            self.fit_predict(data, method=method)
         return self.labels
 
+    def _apply_snapshot(self, snapshot, ann_index=None, neighbor_table=None):
+        self.model = snapshot.model
+        self.centroids = snapshot.centroids
+        self.k = snapshot.k
+        self.method = snapshot.method
+        self.reducer = snapshot.reducer
+        self.snapshot_extra = snapshot.extra
+        self.snapshot_version = snapshot.version
+        self.snapshot_dir = snapshot.path
+        self.ann_index = ann_index if ann_index is not None else self._load_or_build_index()
+        self.neighbor_table = neighbor_table if neighbor_table is not None else self._load_or_build_neighbors()
+        self.cluster_members = build_cluster_members(self.vectors, snapshot.labels, snapshot.centroids)
+        # Gán labels sau cùng: is_fitted chỉ True khi mọi trạng thái đã sẵn sàng
+        self.labels = snapshot.labels
+
+    def _index_dir(self):
+        return os.path.join(self.snapshot_dir, "ann") if self.snapshot_dir else None
+
+    def _load_or_build_index(self):
+        """Index ANN lưu cạnh snapshot; build lại nếu chưa có hoặc không khớp số bài."""
+        index_dir = self._index_dir()
+        index = load_index(index_dir) if index_dir else None
+        if index is not None and len(index) == len(self.vectors):
+            return index
+        print("Đang build index ANN cho embedding...")
+        index = build_index(self.vectors, dtype=EMBEDDING_DTYPE)
+        if index_dir:
+            index.save(index_dir)
+        return index
+
+    def similar(self, vector, k=10):
+        """k bài gần vector nhất (cosine), trả về (chỉ số bài, độ tương đồng)."""
+        return self.ann_index.search(vector, k)
+
+    def add_to_index(self, vectors, ids):
+        """Thêm embedding của bài mới vào index ANN mà không build lại."""
+        self.ann_index.add(vectors, ids)
+        if self._index_dir():
+            self.ann_index.save(self._index_dir())
+
+    def _neighbors_dir(self):
+        return os.path.join(self.snapshot_dir, "neighbors") if self.snapshot_dir else None
+
+    def _load_or_build_neighbors(self):
+        """
+        Bảng bài liên quan lưu cạnh snapshot. Corpus có thêm bài ở cuối thì chỉ tính phần mới,
+        bảng lệch (nhiều bài hơn corpus) thì build lại toàn bộ bằng nhân ma trận theo khối.
+        """
+        neighbors_dir = self._neighbors_dir()
+        table = NeighborTable.load(neighbors_dir) if neighbors_dir else None
+        if table is not None and len(table) == len(self.vectors):
+            return table
+        t0 = time.perf_counter()
+        if table is not None and len(table) < len(self.vectors):
+            print(f"Cập nhật bảng bài liên quan cho {len(self.vectors) - len(table)} bài mới...")
+            table.refresh(self.vectors)
+        else:
+            print("Đang build bảng bài liên quan...")
+            table = NeighborTable.build(self.vectors)
+        print(f"Bảng bài liên quan sẵn sàng sau {time.perf_counter() - t0:.1f}s.")
+        if neighbors_dir:
+            table.save(neighbors_dir)
+        return table
+
+    def refresh_neighbors(self):
+        """Gộp các bài mới ở cuối self.vectors vào bảng bài liên quan và lưu lại."""
+        self.neighbor_table.refresh(self.vectors)
+        if self._neighbors_dir():
+            self.neighbor_table.save(self._neighbors_dir())
+
+    def related(self, idx, k=10):
+        """k bài liên quan nhất tới bài idx, trả về (chỉ số bài, độ tương đồng)."""
+        return self.neighbor_table.get(idx, k)
+
     def sample_clusters(self, n_clusters=3, k_nearest=5, random_state=42):
         """Trả về toàn bộ thông tin bài báo trong các cụm đã phân
-            Lấy k bài gần tâm nhất."""
+            Lấy k bài gần tâm nhất (danh sách thành viên đã sắp sẵn khi fit)."""
         # Chọn ngẫu nhiên n cụm
         rng = np.random.default_rng(random_state)
-        unique_clusters = [c for c in np.unique(self.labels) if c != -1]
+        unique_clusters = list(self.cluster_members)
         chosen_clusters = rng.choice(unique_clusters, size=min(n_clusters, len(unique_clusters)), replace=False)
 
         # Lấy k bài gần centroid nhất từ mỗi cụm
         results = []
         for cluster_id in chosen_clusters:
-            indices = np.where(self.labels == cluster_id)[0]
-            cluster_vectors = self.vectors[indices]
-
-            # Tính khoảng cách đến centroid
-            centroid = np.mean(cluster_vectors, axis=0)
-            distances = cosine_distances(cluster_vectors, centroid.reshape(1, -1)).ravel()
-
-            nearest_indices = indices[np.argsort(distances)[:k_nearest]]
-
-            # Trả về toàn bộ thông tin bài báo cho những bài được chọn
-            for idx in nearest_indices:
-                article_info = self.metadata[idx]  
-                article_info["cluster_id"] = int(cluster_id)
-                results.append(article_info)
+            for idx in self.cluster_members[cluster_id][:k_nearest]:
+                # Bản sao nông kèm cluster_id, không sửa metadata dùng chung của corpus
+                results.append({**self.metadata[idx], "cluster_id": int(cluster_id)})
 
         return results
 
 if __name__ == "__main__":
-    clustering_service = VietnameseTextClustering()
-    # Load data
-    with open("data/processed_data/processed_data_dash.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
-        texts = [item['content'] for item in data if 'content' in item]
-    
+    parser = argparse.ArgumentParser(description="Phân cụm bài báo tiếng Việt")
+    parser.add_argument("--refit", action="store_true",
+                        help="Fit lại và lưu snapshot mới (mặc định dùng snapshot nếu corpus không đổi)")
+    parser.add_argument("--method", default="kmeans", choices=["kmeans", "hdbscan", "hierarchical"])
+    parser.add_argument("--reduce", choices=["none", "pca", "truncate"],
+                        help="Giảm chiều trước khi phân cụm khi --refit (mặc định theo config.json)")
+    parser.add_argument("--dim", type=int, help="Số chiều sau khi giảm")
+    args = parser.parse_args()
+
+    clustering_service = VietnameseTextClustering(fit_if_stale=not args.refit)
+    if args.reduce:
+        clustering_service.reduction_method = None if args.reduce == "none" else args.reduce
+    if args.dim:
+        clustering_service.reduction_dim = args.dim
+    if args.refit:
+        clustering_service.fit_predict(clustering_service.data, method=args.method)
+
     samples = clustering_service.sample_clusters(n_clusters=5, k_nearest=3)
     print("Mẫu từ các cụm:", samples)
@@ -0,0 +1,222 @@
+import json
+import os
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+
+from src.models.Text_Clustering.embedding_store import QuantizedMatrix, inner_product
+
+try:
+    import hnswlib
+except ImportError:
+    # hnswlib là tùy chọn, không có thì dùng IVF bằng numpy
+    hnswlib = None
+
+DEFAULT_NPROBE = 8
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+
+def _top_k(scores, ids, k):
+    """k phần tử có score cao nhất, sắp giảm dần."""
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+        scores, ids = scores[part], ids[part]
+    order = np.argsort(-scores)
+    return ids[order], scores[order]
+
+
+class IVFIndex:
+    """
+    Inverted-file index thuần numpy trên vector đã chuẩn hóa (tích vô hướng = cosine).
+
+    Vector được xếp liền nhau theo cụm (list) nên mỗi truy vấn chỉ nhân ma trận với nprobe
+    khối liên tục. Các file .npy được mở bằng mmap khi load. Vector thêm sau khi build nằm
+    trong phần "extra" (trong RAM) cho tới lần save tiếp theo, khi đó được gộp vào các list.
+    Vector trong các list có thể lưu dạng nén (float16/int8, xem QuantizedMatrix).
+    """
+
+    backend = "ivf"
+
+    def __init__(self, centroids, vectors, ids, offsets, nprobe=DEFAULT_NPROBE):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+        self.nprobe = nprobe
+        self.dtype = vectors.dtype if isinstance(vectors, QuantizedMatrix) else "float32"
+        self._extra_vectors = np.empty((0, centroids.shape[1]), dtype=np.float32)
+        self._extra_ids = np.empty(0, dtype=np.int64)
+        self._extra_lists = np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def build(cls, vectors, ids=None, nlist=None, nprobe=DEFAULT_NPROBE, random_state=42, dtype="float32"):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        ids = np.arange(n, dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+        nlist = nlist or max(1, min(n, int(np.sqrt(n))))
+        km = MiniBatchKMeans(n_clusters=nlist, batch_size=4096, n_init=3, random_state=random_state)
+        lists = km.fit_predict(vectors)
+        centroids = km.cluster_centers_.astype(np.float32)
+        return cls._from_assignments(centroids, vectors, ids, lists, nprobe, dtype)
+
+    @classmethod
+    def _from_assignments(cls, centroids, vectors, ids, lists, nprobe, dtype="float32"):
+        order = np.argsort(lists, kind="stable")
+        counts = np.bincount(lists, minlength=len(centroids))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        vectors = vectors[order]
+        if dtype != "float32":
+            vectors = QuantizedMatrix.from_float(vectors, dtype)
+        return cls(centroids, vectors, ids[order], offsets, nprobe)
+
+    def __len__(self):
+        return len(self.ids) + len(self._extra_ids)
+
+    def _assign(self, vectors):
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def add(self, vectors, ids):
+        """Thêm vector mới (không cần build lại), gộp vào các list khi save."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.centroids.shape[1])
+        self._extra_vectors = np.concatenate([self._extra_vectors, vectors])
+        self._extra_ids = np.concatenate([self._extra_ids, np.asarray(ids, dtype=np.int64)])
+        self._extra_lists = np.concatenate([self._extra_lists, self._assign(vectors)])
+
+    def search(self, query, k=10, nprobe=None):
+        """Trả về (ids, scores) của k vector gần query nhất theo cosine."""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        cand_ids, cand_scores = [], []
+        for l in probe:
+            start, end = self.offsets[l], self.offsets[l + 1]
+            if end > start:
+                vectors = self.vectors.rows(slice(start, end)) if self.dtype != "float32" else self.vectors[start:end]
+                cand_scores.append(inner_product(vectors, query))
+                cand_ids.append(self.ids[start:end])
+        if len(self._extra_ids):
+            mask = np.isin(self._extra_lists, probe)
+            if mask.any():
+                cand_scores.append(self._extra_vectors[mask] @ query)
+                cand_ids.append(self._extra_ids[mask])
+        if not cand_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return _top_k(np.concatenate(cand_scores), np.concatenate(cand_ids), k)
+
+    def save(self, directory):
+        if len(self._extra_ids):
+            lists = np.concatenate([np.repeat(np.arange(len(self.centroids)), np.diff(self.offsets)),
+                                    self._extra_lists])
+            merged = self._from_assignments(
+                self.centroids,
+                np.concatenate([np.asarray(self.vectors), self._extra_vectors]),
+                np.concatenate([np.asarray(self.ids), self._extra_ids]),
+                lists, self.nprobe, self.dtype,
+            )
+            self.__dict__.update(merged.__dict__)
+        os.makedirs(directory, exist_ok=True)
+        arrays = {name: getattr(self, name) for name in ("centroids", "ids", "offsets")}
+        if self.dtype != "float32":
+            arrays["vectors"] = self.vectors.codes
+            if self.vectors.scales is not None:
+                arrays["scales"] = self.vectors.scales
+        else:
+            arrays["vectors"] = self.vectors
+        for name, array in arrays.items():
+            tmp = os.path.join(directory, f"ivf_{name}.tmp.npy")
+            np.save(tmp, np.asarray(array))
+            os.replace(tmp, os.path.join(directory, f"ivf_{name}.npy"))
+        _write_meta(directory, {"backend": self.backend, "dim": int(self.centroids.shape[1]),
+                                "count": len(self), "nprobe": self.nprobe, "dtype": self.dtype})
+
+    @classmethod
+    def load(cls, directory, meta):
+        arrays = {name: np.load(os.path.join(directory, f"ivf_{name}.npy"), mmap_mode="r")
+                  for name in ("centroids", "vectors", "ids", "offsets")}
+        dtype = meta.get("dtype", "float32")
+        if dtype != "float32":
+            scales = np.load(os.path.join(directory, "ivf_scales.npy"), mmap_mode="r") if dtype == "int8" else None
+            arrays["vectors"] = QuantizedMatrix(arrays["vectors"], scales)
+        return cls(nprobe=meta.get("nprobe", DEFAULT_NPROBE), **arrays)
+
+
+class HNSWIndex:
+    """Đồ thị HNSW của hnswlib (space="ip" trên vector đã chuẩn hóa = cosine)."""
+
+    backend = "hnsw"
+
+    def __init__(self, index):
+        self.index = index
+
+    @classmethod
+    def build(cls, vectors, ids=None):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        ids = np.arange(len(vectors)) if ids is None else np.asarray(ids)
+        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        index.init_index(max_elements=max(len(vectors), 1), ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+        index.add_items(vectors, ids)
+        index.set_ef(HNSW_EF_SEARCH)
+        return cls(index)
+
+    def __len__(self):
+        return self.index.get_current_count()
+
+    def add(self, vectors, ids):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.index.dim)
+        needed = len(self) + len(vectors)
+        if needed > self.index.get_max_elements():
+            self.index.resize_index(max(needed, 2 * self.index.get_max_elements()))
+        self.index.add_items(vectors, np.asarray(ids))
+
+    def search(self, query, k=10):
+        k = min(k, len(self))
+        labels, distances = self.index.knn_query(np.asarray(query, dtype=np.float32).reshape(1, -1), k=k)
+        # Khoảng cách "ip" của hnswlib là 1 - tích vô hướng
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.index.save_index(os.path.join(directory, "hnsw.bin"))
+        _write_meta(directory, {"backend": self.backend, "dim": int(self.index.dim), "count": len(self)})
+
+    @classmethod
+    def load(cls, directory, meta):
+        index = hnswlib.Index(space="ip", dim=meta["dim"])
+        index.load_index(os.path.join(directory, "hnsw.bin"), max_elements=meta["count"])
+        index.set_ef(HNSW_EF_SEARCH)
+        return cls(index)
+
+
+def _write_meta(directory, meta):
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def build_index(vectors, backend="auto", dtype="float32"):
+    """
+    Build index ANN: HNSW nếu có hnswlib (hoặc backend="hnsw"), ngược lại IVF numpy.
+    dtype là kiểu lưu vector của IVF; hnswlib luôn lưu float32.
+    """
+    if backend == "hnsw" or (backend == "auto" and hnswlib is not None):
+        if hnswlib is None:
+            raise ImportError("Backend 'hnsw' cần cài hnswlib")
+        return HNSWIndex.build(vectors)
+    return IVFIndex.build(vectors, dtype=dtype)
+
+
+def load_index(directory):
+    """Load index đã lưu trong directory, None nếu chưa có hoặc không đọc được."""
+    meta_path = os.path.join(directory, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta["backend"] == "hnsw":
+        if hnswlib is None:
+            print("Index ANN dạng HNSW nhưng chưa cài hnswlib, sẽ build lại bằng IVF.")
+            return None
+        return HNSWIndex.load(directory, meta)
+    return IVFIndex.load(directory, meta)
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.metrics import adjusted_rand_score
+
+sys.path.append(os.getcwd())
+from src.models.Text_Clustering.embedding_store import EmbeddingStore, QuantizedMatrix
+
+REPORT_PATH = "results/models/Text_Clustering/quantization_report.json"
+
+
+def load_embeddings(args):
+    """Embedding float32 trong store (không encode gì thêm), hoặc dữ liệu giả có cụm với --synthetic."""
+    if args.synthetic:
+        rng = np.random.default_rng(args.seed)
+        centers = rng.normal(size=(args.n_clusters, args.dim))
+        vectors = centers[rng.integers(0, args.n_clusters, args.synthetic)]
+        vectors += 0.5 * rng.normal(size=vectors.shape)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors.astype(np.float32)
+
+    from src.models.Text_Clustering.Text_cluster import EMBEDDING_MODEL
+    store = EmbeddingStore(EMBEDDING_MODEL)
+    if store.matrix is None:
+        raise SystemExit("Embedding store trống, chạy Text_cluster.py trước để tạo embedding.")
+    return np.asarray(store.matrix, dtype=np.float32)
+
+
+def top_k(similarities, query_rows, k):
+    similarities[np.arange(len(query_rows)), query_rows] = -np.inf
+    return np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+
+
+def benchmark(vectors, dtype, query_rows, exact, reference_labels, reference_centroids, args):
+    """Bộ nhớ, thời gian kernel, recall@k và độ khớp phân cụm của một kiểu lưu so với float32."""
+    compact = QuantizedMatrix.from_float(vectors, dtype)
+
+    t0 = time.perf_counter()
+    similarities = compact.dot(compact[query_rows]).T
+    kernel_s = time.perf_counter() - t0
+    approx = top_k(similarities, query_rows, args.k)
+    recall = np.mean([len(np.intersect1d(a, e)) / args.k for a, e in zip(approx, exact)])
+
+    dequantized = compact[:]
+    labels = KMeans(n_clusters=args.n_clusters, n_init="auto", random_state=args.seed).fit_predict(dequantized)
+    # Gán theo tâm float32: tỉ lệ bài giữ nguyên cụm khi chỉ khoảng cách được tính trên dạng nén
+    assigned = np.argmax(compact.dot(reference_centroids)
+                         - 0.5 * (reference_centroids ** 2).sum(axis=1)[None, :], axis=1)
+
+    return {
+        "dtype": dtype,
+        "bytes": int(compact.nbytes),
+        "compression": round(vectors.nbytes / compact.nbytes, 2),
+        "kernel_s": round(kernel_s, 4),
+        f"recall@{args.k}": round(float(recall), 4),
+        "kmeans_ari": round(float(adjusted_rand_score(reference_labels, labels)), 4),
+        "assignment_agreement": round(float(np.mean(assigned == reference_labels)), 4),
+    }
+
+
+def main(args):
+    vectors = load_embeddings(args)
+    n = len(vectors)
+    print(f"Benchmark trên {n} embedding {vectors.shape[1]} chiều.")
+    rng = np.random.default_rng(args.seed)
+    query_rows = np.sort(rng.choice(n, size=min(args.queries, n), replace=False))
+
+    t0 = time.perf_counter()
+    similarities = vectors @ vectors[query_rows].T
+    kernel_s = time.perf_counter() - t0
+    exact = top_k(similarities.T.copy(), query_rows, args.k)
+    km = KMeans(n_clusters=args.n_clusters, n_init="auto", random_state=args.seed)
+    reference_labels = km.fit_predict(vectors)
+    reference_centroids = km.cluster_centers_.astype(np.float32)
+
+    results = [{"dtype": "float32", "bytes": int(vectors.nbytes), "compression": 1.0,
+                "kernel_s": round(kernel_s, 4), f"recall@{args.k}": 1.0,
+                "kmeans_ari": 1.0, "assignment_agreement": 1.0}]
+    for dtype in args.dtypes:
+        results.append(benchmark(vectors, dtype, query_rows, exact, reference_labels, reference_centroids, args))
+
+    for r in results:
+        print(f"{r['dtype']:>8}: {r['bytes'] / 2**20:8.1f} MB (x{r['compression']}), "
+              f"kernel {r['kernel_s'] * 1000:.1f} ms, recall@{args.k} {r[f'recall@{args.k}']:.4f}, "
+              f"ARI {r['kmeans_ari']:.4f}, giữ cụm {r['assignment_agreement']:.4f}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"n_items": n, "dim": int(vectors.shape[1]), "queries": len(query_rows),
+                   "n_clusters": args.n_clusters, "results": results}, f, indent=2)
+    print(f"Đã lưu báo cáo vào {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="So sánh embedding float16/int8 với float32")
+    parser.add_argument("--dtypes", nargs="+", default=["float16", "int8"], choices=["float16", "int8"])
+    parser.add_argument("--queries", type=int, default=500, help="Số bài dùng làm truy vấn khi đo recall")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--n_clusters", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--synthetic", type=int, default=0, help="Dùng N vector giả thay cho embedding store")
+    parser.add_argument("--dim", type=int, default=1024, help="Số chiều của dữ liệu giả")
+    parser.add_argument("--output", default=REPORT_PATH)
+    main(parser.parse_args())
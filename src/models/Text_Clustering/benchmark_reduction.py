@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import adjusted_rand_score
+
+sys.path.append(os.getcwd())
+from src.models.Text_Clustering.benchmark_quantization import load_embeddings
+from src.models.Text_Clustering.reduction import Reducer
+
+REPORT_PATH = "results/models/Text_Clustering/reduction_report.json"
+
+
+def fit_kmeans(vectors, args):
+    """Fit KMeans giống Text_cluster (MiniBatchKMeans từ MINIBATCH_THRESHOLD bài), trả về (labels, giây)."""
+    t0 = time.perf_counter()
+    if len(vectors) >= args.minibatch_threshold:
+        km = MiniBatchKMeans(n_clusters=args.n_clusters, batch_size=4096, n_init=3, random_state=args.seed)
+    else:
+        km = KMeans(n_clusters=args.n_clusters, n_init="auto", random_state=args.seed)
+    labels = km.fit_predict(vectors)
+    return labels, time.perf_counter() - t0
+
+
+def main(args):
+    vectors = load_embeddings(args)
+    print(f"Benchmark giảm chiều trên {len(vectors)} embedding {vectors.shape[1]} chiều, k={args.n_clusters}.")
+
+    reference_labels, reference_s = fit_kmeans(vectors, args)
+    results = [{"method": "full", "dim": int(vectors.shape[1]), "reduce_s": 0.0,
+                "kmeans_s": round(reference_s, 3), "bytes": int(vectors.nbytes), "ari": 1.0}]
+
+    for method in args.methods:
+        for dim in args.dims:
+            if dim >= vectors.shape[1]:
+                continue
+            reducer = Reducer(method, dim, random_state=args.seed)
+            t0 = time.perf_counter()
+            reduced = reducer.fit_transform(vectors)
+            reduce_s = time.perf_counter() - t0
+            labels, kmeans_s = fit_kmeans(reduced, args)
+            results.append({
+                "method": method,
+                "dim": reducer.dim,
+                "reduce_s": round(reduce_s, 3),
+                "kmeans_s": round(kmeans_s, 3),
+                "bytes": int(reduced.nbytes),
+                "ari": round(float(adjusted_rand_score(reference_labels, labels)), 4),
+                **({"explained_variance": reducer.describe()["explained_variance"]} if method == "pca" else {}),
+            })
+
+    for r in results:
+        print(f"{r['method']:>8} {r['dim']:>5}d: giảm chiều {r['reduce_s']:6.2f}s, KMeans {r['kmeans_s']:6.2f}s, "
+              f"{r['bytes'] / 2**20:7.1f} MB, ARI {r['ari']:.4f}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"n_items": len(vectors), "n_clusters": args.n_clusters, "results": results}, f, indent=2)
+    print(f"Đã lưu báo cáo vào {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="So sánh phân cụm trên embedding đã giảm chiều với embedding đầy đủ")
+    parser.add_argument("--methods", nargs="+", default=["pca", "truncate"], choices=["pca", "truncate"])
+    parser.add_argument("--dims", nargs="+", type=int, default=[64, 128, 256, 512])
+    parser.add_argument("--n_clusters", type=int, default=12)
+    parser.add_argument("--minibatch_threshold", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--synthetic", type=int, default=0, help="Dùng N vector giả thay cho embedding store")
+    parser.add_argument("--dim", type=int, default=1024, help="Số chiều của dữ liệu giả")
+    parser.add_argument("--output", default=REPORT_PATH)
+    main(parser.parse_args())
@@ -0,0 +1,49 @@
+import re
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def syllables(text):
+    """
+    Tách văn bản thành âm tiết chữ thường. content_clean đã được tách từ (hà_nội), còn truy vấn
+    thì chưa, nên cả hai đều được đưa về mức âm tiết để khớp nhau mà không cần underthesea.
+    """
+    return re.findall(r"\w+", text.lower().replace("_", " "))
+
+
+class BM25Index:
+    """
+    BM25 trên content_clean, dùng để xếp hạng lại một tập ứng viên nhỏ (không tìm trên toàn corpus).
+
+    Ma trận tần suất từ (thưa, CSR) được tính một lần; chấm điểm một truy vấn chỉ đọc các cột
+    của từ trong truy vấn tại các dòng ứng viên.
+    """
+
+    def __init__(self, texts, k1=BM25_K1, b=BM25_B):
+        self.vectorizer = CountVectorizer(analyzer=syllables, dtype=np.int32)
+        self.tf = self.vectorizer.fit_transform(texts).tocsc()
+        n_docs = self.tf.shape[0]
+        df = np.diff(self.tf.indptr)
+        self.idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        doc_len = np.asarray(self.tf.sum(axis=1)).ravel().astype(np.float32)
+        # Mẫu số chuẩn hóa độ dài của từng bài: k1 * (1 - b + b * len / avg_len)
+        self.norm = k1 * (1.0 - b + b * doc_len / max(doc_len.mean(), 1.0))
+        self.k1 = k1
+
+    def __len__(self):
+        return self.tf.shape[0]
+
+    def score(self, query, doc_ids):
+        """Điểm BM25 của query cho từng bài trong doc_ids (cùng thứ tự)."""
+        vocab = self.vectorizer.vocabulary_
+        terms = sorted({vocab[t] for t in syllables(query) if t in vocab})
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        if not terms or not len(doc_ids):
+            return np.zeros(len(doc_ids), dtype=np.float32)
+        tf = self.tf[:, terms][doc_ids].toarray().astype(np.float32)
+        weights = tf * (self.k1 + 1.0) / (tf + self.norm[doc_ids, None])
+        return weights @ self.idf[terms]
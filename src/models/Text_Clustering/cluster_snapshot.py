@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import joblib
+import numpy as np
+
+from src.models.Text_Clustering.embedding_store import content_hash
+
+SNAPSHOT_DIR = "results/models/Text_Clustering/snapshots"
+# Tăng khi đổi định dạng snapshot để không load nhầm snapshot cũ
+SNAPSHOT_FORMAT = 1
+# Số phiên bản snapshot giữ lại trên đĩa (mỗi phiên bản có bản sao index ANN và bảng láng giềng)
+SNAPSHOT_KEEP = 3
+_VERSION_RE = re.compile(r"^v(\d{8}-\d{6})(?:-(\d+))?$")
+
+
+def corpus_hash(texts, embedding_model):
+    """Hash của corpus theo đúng thứ tự (labels gắn với từng dòng) và model embedding."""
+    h = hashlib.sha1(embedding_model.encode("utf-8"))
+    for text in texts:
+        h.update(content_hash(text).encode("ascii"))
+    return h.hexdigest()
+
+
+@dataclass
+class ClusteringSnapshot:
+    """Trạng thái phân cụm sau một lần fit offline."""
+    model: object
+    labels: np.ndarray
+    centroids: np.ndarray
+    k: int
+    method: str
+    corpus_hash: str
+    embedding_model: str
+    version: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    extra: dict = field(default_factory=dict)
+    root: str = SNAPSHOT_DIR
+    # Reducer (reduction.py) đã dùng trước khi phân cụm, None nếu phân cụm trên embedding đầy đủ
+    reducer: Optional[object] = None
+
+    @property
+    def path(self):
+        """Thư mục của snapshot (None nếu chưa lưu), các artefact đi kèm như index ANN nằm ở đây."""
+        return os.path.join(self.root, self.version) if self.version else None
+
+    def save(self, root=SNAPSHOT_DIR, keep=SNAPSHOT_KEEP):
+        """Ghi snapshot vào thư mục phiên bản mới, trỏ latest.json tới nó rồi xóa các phiên bản cũ hơn keep bản gần nhất."""
+        version = time.strftime("v%Y%m%d-%H%M%S", time.localtime(self.created_at))
+        # Cập nhật tăng dần có thể lưu nhiều snapshot trong cùng một giây
+        suffix = 0
+        self.version = version
+        while os.path.exists(os.path.join(root, self.version)):
+            suffix += 1
+            self.version = f"{version}-{suffix}"
+        self.root = root
+        path = self.path
+        os.makedirs(path, exist_ok=True)
+        joblib.dump(self.model, os.path.join(path, "model.pkl"))
+        np.save(os.path.join(path, "labels.npy"), self.labels)
+        np.save(os.path.join(path, "centroids.npy"), self.centroids)
+        if self.reducer is not None:
+            joblib.dump(self.reducer, os.path.join(path, "reducer.pkl"))
+        meta = {
+            "format": SNAPSHOT_FORMAT,
+            "k": int(self.k),
+            "method": self.method,
+            "corpus_hash": self.corpus_hash,
+            "embedding_model": self.embedding_model,
+            "n_items": int(len(self.labels)),
+            "created_at": self.created_at,
+            "reduction": self.reducer.describe() if self.reducer is not None else None,
+            **self.extra,
+        }
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+        tmp = os.path.join(root, "latest.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version}, f)
+        os.replace(tmp, os.path.join(root, "latest.json"))
+        print(f"Đã lưu snapshot phân cụm {self.version} (k={self.k}, {len(self.labels)} bài).")
+        prune_snapshots(root, keep, current=self.version)
+        return path
+
+    @classmethod
+    def load(cls, version, root=SNAPSHOT_DIR):
+        path = os.path.join(root, version)
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Snapshot {version} có định dạng {meta.get('format')}, cần {SNAPSHOT_FORMAT}")
+        known = {"format", "k", "method", "corpus_hash", "embedding_model", "n_items", "created_at", "reduction"}
+        reducer_path = os.path.join(path, "reducer.pkl")
+        return cls(
+            model=joblib.load(os.path.join(path, "model.pkl")),
+            labels=np.load(os.path.join(path, "labels.npy")),
+            centroids=np.load(os.path.join(path, "centroids.npy")),
+            k=meta["k"],
+            method=meta["method"],
+            corpus_hash=meta["corpus_hash"],
+            embedding_model=meta["embedding_model"],
+            version=version,
+            created_at=meta["created_at"],
+            extra={key: value for key, value in meta.items() if key not in known},
+            root=root,
+            reducer=joblib.load(reducer_path) if os.path.exists(reducer_path) else None,
+        )
+
+
+def prune_snapshots(root=SNAPSHOT_DIR, keep=SNAPSHOT_KEEP, current=None):
+    """
+    Xóa các thư mục phiên bản cũ, chỉ giữ keep bản mới nhất (luôn giữ current).
+    Gọi sau khi latest.json đã trỏ tới phiên bản mới. Index/bảng láng giềng đang mmap từ
+    phiên bản bị xóa vẫn đọc được cho tới khi được thay (Linux chỉ giải phóng khi unmap).
+    """
+    versions = []
+    for name in os.listdir(root):
+        match = _VERSION_RE.match(name)
+        if match and os.path.isdir(os.path.join(root, name)):
+            versions.append((match.group(1), int(match.group(2) or 0), name))
+    versions.sort(reverse=True)
+    removed = []
+    for _, _, name in versions[max(keep, 1):]:
+        if name == current:
+            continue
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        removed.append(name)
+    if removed:
+        print(f"Đã xóa {len(removed)} snapshot phân cụm cũ: {', '.join(removed)}")
+    return removed
+
+
+def load_latest_snapshot(expected_hash=None, root=SNAPSHOT_DIR):
+    """
+    Snapshot mới nhất, hoặc None nếu chưa có / hỏng / corpus hash không khớp expected_hash.
+    """
+    latest = os.path.join(root, "latest.json")
+    if not os.path.exists(latest):
+        print("Chưa có snapshot phân cụm.")
+        return None
+    try:
+        with open(latest, "r", encoding="utf-8") as f:
+            version = json.load(f)["version"]
+        snapshot = ClusteringSnapshot.load(version, root)
+    except Exception as e:
+        print(f"Không load được snapshot phân cụm: {e}")
+        return None
+    if expected_hash is not None and snapshot.corpus_hash != expected_hash:
+        print(f"Snapshot {version} được fit trên corpus khác, cần fit lại.")
+        return None
+    print(f"Đã load snapshot phân cụm {version} (k={snapshot.k}, method={snapshot.method}).")
+    return snapshot
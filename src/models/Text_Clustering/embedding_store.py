@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+
+EMBEDDING_STORE_DIR = "results/models/Text_Clustering/embeddings"
+# Kiểu lưu embedding trong RAM: float32 (gốc), float16 (1/2) hoặc int8 + scale mỗi vector (~1/4)
+EMBEDDING_DTYPES = ("float32", "float16", "int8")
+KERNEL_BLOCK_SIZE = 8192
+
+
+def content_hash(text):
+    """Khóa của một bài báo trong store: sha1 của nội dung dùng để embedding."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class QuantizedMatrix:
+    """
+    Ma trận embedding dạng nén: float16, hoặc int8 với một scale cho mỗi vector (x ~ codes * scale,
+    scale = max|x| / 127). Lấy dòng (slice, chỉ số, mask) trả về float32 đã giải nén nên dùng được
+    thay cho ndarray; dot() tính tích vô hướng trực tiếp trên dạng nén, theo khối.
+    """
+
+    def __init__(self, codes, scales=None):
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def from_float(cls, vectors, dtype, block_size=KERNEL_BLOCK_SIZE):
+        n, dim = vectors.shape
+        if dtype == "float16":
+            codes = np.empty((n, dim), dtype=np.float16)
+            for start in range(0, n, block_size):
+                codes[start:start + block_size] = vectors[start:start + block_size]
+            return cls(codes)
+        if dtype != "int8":
+            raise ValueError(f"Kiểu lưu embedding '{dtype}' không được hỗ trợ, chọn một trong {EMBEDDING_DTYPES}")
+        codes = np.empty((n, dim), dtype=np.int8)
+        scales = np.empty(n, dtype=np.float32)
+        for start in range(0, n, block_size):
+            block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+            block_scales = np.abs(block).max(axis=1) / 127.0
+            block_scales[block_scales == 0] = 1.0
+            codes[start:start + block_size] = np.rint(block / block_scales[:, None])
+            scales[start:start + block_size] = block_scales
+        return cls(codes, scales)
+
+    @property
+    def dtype(self):
+        return "int8" if self.scales is not None else "float16"
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def rows(self, key):
+        """Các dòng key, vẫn ở dạng nén."""
+        return QuantizedMatrix(self.codes[key], self.scales[key] if self.scales is not None else None)
+
+    def __getitem__(self, key):
+        vectors = np.asarray(self.codes[key], dtype=np.float32)
+        if self.scales is not None:
+            vectors = vectors * np.asarray(self.scales[key], dtype=np.float32)[..., None]
+        return vectors
+
+    def __array__(self, dtype=None, copy=None):
+        return self[:] if dtype is None else self[:].astype(dtype)
+
+    def dot(self, queries, block_size=KERNEL_BLOCK_SIZE):
+        """
+        Tích vô hướng của mọi dòng với queries ((m x D) hoặc (D,)), kết quả (n x m) hoặc (n,).
+        Với int8, scale được nhân sau phép nhân ma trận (n phép nhân thay vì n x D).
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        out = np.empty((len(self),) + queries.shape[:-1], dtype=np.float32)
+        for start in range(0, len(self), block_size):
+            block = np.asarray(self.codes[start:start + block_size], dtype=np.float32) @ queries.T
+            if self.scales is not None:
+                block_scales = np.asarray(self.scales[start:start + block_size])
+                block *= block_scales[:, None] if block.ndim == 2 else block_scales
+            out[start:start + block_size] = block
+        return out
+
+
+def inner_product(matrix, queries):
+    """matrix @ queries.T cho cả ndarray lẫn QuantizedMatrix (không giải nén cả ma trận)."""
+    if isinstance(matrix, QuantizedMatrix):
+        return matrix.dot(queries)
+    return np.asarray(matrix, dtype=np.float32) @ np.asarray(queries, dtype=np.float32).T
+
+
+class EmbeddingStore:
+    """
+    Lưu embedding trên đĩa để không phải encode lại toàn bộ corpus mỗi lần khởi động.
+
+    - embeddings.npy: ma trận float32 (N x D), mở bằng mmap nên load gần như tức thì.
+    - index.json: tên model, số chiều, phiên bản của ma trận và ánh xạ content hash -> số thứ tự dòng.
+
+    - embeddings.<dtype>.npy (+ scales.int8.npy): bản nén float16/int8 khi dtype khác float32,
+      tạo lại từ ma trận float32 mỗi khi store thay đổi. embeddings.<dtype>.json ghi phiên bản
+      ma trận mà bản nén được tạo từ đó. Khi đó get_or_encode trả về QuantizedMatrix
+      trên bản nén, ma trận float32 chỉ nằm trên đĩa.
+
+    Chỉ các văn bản có hash chưa nằm trong index mới được encode, rồi nối thêm vào cuối ma trận.
+    """
+
+    def __init__(self, model_name, directory=EMBEDDING_STORE_DIR, dtype="float32"):
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Kiểu lưu embedding '{dtype}' không được hỗ trợ, chọn một trong {EMBEDDING_DTYPES}")
+        self.model_name = model_name
+        self.directory = directory
+        self.dtype = dtype
+        self.matrix_path = os.path.join(directory, "embeddings.npy")
+        self.index_path = os.path.join(directory, "index.json")
+        self.rows = {}
+        self.version = None
+        self.matrix = None
+        self.compact = None
+        self._load()
+
+    def _load(self):
+        if not (os.path.exists(self.matrix_path) and os.path.exists(self.index_path)):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        matrix = np.load(self.matrix_path, mmap_mode="r")
+        # Store của model embedding khác, hoặc index và ma trận lệch nhau: bỏ, encode lại
+        if index.get("model") != self.model_name or len(index.get("rows", {})) != matrix.shape[0]:
+            print(f"Embedding store tại {self.directory} không khớp, sẽ tạo lại.")
+            return
+        self.rows = index["rows"]
+        self.version = index.get("version")
+        self.matrix = matrix
+        if self.version is None and self.dtype != "float32":
+            # Store cũ chưa có phiên bản: gán một phiên bản để bản nén tạo ra từ đây dùng lại được
+            self.version = uuid.uuid4().hex
+            self._write_index(matrix.shape[1])
+        self._load_compact()
+
+    def _load_compact(self):
+        """Mở bản nén (mmap), tạo lại nếu chưa có hoặc được tạo từ phiên bản khác của ma trận float32."""
+        if self.dtype == "float32" or self.matrix is None:
+            return
+        codes_path = os.path.join(self.directory, f"embeddings.{self.dtype}.npy")
+        scales_path = os.path.join(self.directory, "scales.int8.npy")
+        meta_path = os.path.join(self.directory, f"embeddings.{self.dtype}.json")
+        if self.version is not None and self._compact_version(meta_path) == self.version \
+                and os.path.exists(codes_path) and (self.dtype != "int8" or os.path.exists(scales_path)):
+            codes = np.load(codes_path, mmap_mode="r")
+            scales = np.load(scales_path, mmap_mode="r") if self.dtype == "int8" else None
+            if len(codes) == len(self.matrix) and (scales is None or len(scales) == len(codes)):
+                self.compact = QuantizedMatrix(codes, scales)
+                return
+        compact = QuantizedMatrix.from_float(self.matrix, self.dtype)
+        for path, array in ((codes_path, compact.codes), (scales_path, compact.scales)):
+            if array is not None:
+                np.save(path + ".tmp.npy", array)
+                os.replace(path + ".tmp.npy", path)
+        # Ghi phiên bản sau cùng: bị ngắt giữa chừng thì lần sau bản nén được tạo lại
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": self.version}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+        self.compact = QuantizedMatrix(np.load(codes_path, mmap_mode="r"),
+                                       np.load(scales_path, mmap_mode="r") if compact.scales is not None else None)
+        print(f"Embedding store: bản {self.dtype} {self.compact.nbytes / 2**20:.1f} MB "
+              f"(float32 {self.matrix.nbytes / 2**20:.1f} MB).")
+
+    @staticmethod
+    def _compact_version(meta_path):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("version")
+        except (OSError, ValueError):
+            return None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _write_index(self, dim):
+        tmp_index = self.index_path + ".tmp"
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "dim": int(dim), "version": self.version, "rows": self.rows}, f)
+        os.replace(tmp_index, self.index_path)
+
+    def _save(self, matrix):
+        os.makedirs(self.directory, exist_ok=True)
+        # Ghi ra file tạm rồi đổi tên để không để lại store hỏng nếu bị ngắt giữa chừng
+        tmp_matrix = self.matrix_path + ".tmp.npy"
+        np.save(tmp_matrix, matrix)
+        os.replace(tmp_matrix, self.matrix_path)
+        # Phiên bản mới mỗi lần ghi: bản nén của ma trận cũ không được dùng lại dù cùng số dòng
+        self.version = uuid.uuid4().hex
+        self._write_index(matrix.shape[1])
+        self.matrix = np.load(self.matrix_path, mmap_mode="r")
+        self._load_compact()
+
+    def get_or_encode(self, texts, encode_fn):
+        """
+        Trả về embedding của texts (cùng thứ tự), chỉ gọi encode_fn cho các văn bản chưa có.
+        encode_fn nhận list văn bản và trả về mảng (n x D) đã chuẩn hóa.
+        """
+        hashes = [content_hash(t) for t in texts]
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in self.rows and h not in missing:
+                missing[h] = t
+
+        if missing:
+            cached = sum(1 for h in hashes if h in self.rows)
+            print(f"Embedding store: {cached} có sẵn, encode {len(missing)} bài mới.")
+            new_vectors = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            start = len(self.rows)
+            for offset, h in enumerate(missing):
+                self.rows[h] = start + offset
+            matrix = new_vectors if self.matrix is None else np.concatenate([self.matrix, new_vectors])
+            self._save(matrix)
+        else:
+            print(f"Embedding store: dùng lại {len(texts)} embedding từ {self.directory}.")
+
+        rows = np.fromiter((self.rows[h] for h in hashes), dtype=np.int64, count=len(hashes))
+        # Corpus trùng với thứ tự trong store: trả về view trên mmap, không copy
+        if len(rows) and rows[0] == 0 and np.array_equal(rows, np.arange(len(rows))):
+            rows = slice(0, len(rows))
+        if self.compact is not None:
+            return self.compact.rows(rows)
+        return self.matrix[rows]
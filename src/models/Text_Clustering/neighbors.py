@@ -0,0 +1,118 @@
+import json
+import os
+
+import numpy as np
+
+from src.models.Text_Clustering.embedding_store import QuantizedMatrix
+
+# Số hàng xóm lưu sẵn cho mỗi bài, API chỉ trả tối đa chừng này
+NEIGHBOR_K = 20
+BLOCK_SIZE = 512
+
+
+def _merge_top_k(idx, sim, k):
+    """Giữ k cột có sim cao nhất trên mỗi dòng, sắp giảm dần."""
+    if sim.shape[1] > k:
+        part = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+        idx = np.take_along_axis(idx, part, axis=1)
+        sim = np.take_along_axis(sim, part, axis=1)
+    order = np.argsort(-sim, axis=1)
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(sim, order, axis=1)
+
+
+def _similarities(block, corpus):
+    """block @ corpus.T (block_size x n); corpus dạng nén được nhân trực tiếp, không giải nén cả ma trận."""
+    if isinstance(corpus, QuantizedMatrix):
+        return np.ascontiguousarray(corpus.dot(block).T)
+    return block @ np.asarray(corpus, dtype=np.float32).T
+
+
+def blocked_top_k(queries, corpus, k, query_offset=0, block_size=BLOCK_SIZE):
+    """
+    Top-k cosine của từng dòng queries trong corpus (vector đã chuẩn hóa), tính theo khối
+    block_size dòng để bộ nhớ tạm chỉ là block_size x n. Dòng i của queries là bài
+    query_offset + i trong corpus và không được tính là hàng xóm của chính nó.
+    """
+    n = len(corpus)
+    k = min(k, n - 1)
+    all_idx = np.empty((len(queries), k), dtype=np.int32)
+    all_sim = np.empty((len(queries), k), dtype=np.float32)
+    for start in range(0, len(queries), block_size):
+        block = np.asarray(queries[start:start + block_size], dtype=np.float32)
+        sims = _similarities(block, corpus)
+        rows = np.arange(len(block))
+        self_cols = query_offset + start + rows
+        inside = self_cols < n
+        sims[rows[inside], self_cols[inside]] = -np.inf
+        idx = np.broadcast_to(np.arange(n, dtype=np.int32), sims.shape)
+        idx, sim = _merge_top_k(idx, sims, k)
+        all_idx[start:start + len(block)] = idx
+        all_sim[start:start + len(block)] = sim
+    return all_idx, all_sim
+
+
+class NeighborTable:
+    """
+    Bảng k bài liên quan nhất của từng bài (chỉ số dòng trong corpus + độ tương đồng cosine),
+    tính sẵn để API chỉ cần đọc một dòng. Lưu dạng .npy, load bằng mmap.
+    """
+
+    def __init__(self, indices, similarities):
+        self.indices = indices
+        self.similarities = similarities
+
+    def __len__(self):
+        return len(self.indices)
+
+    @classmethod
+    def build(cls, vectors, k=NEIGHBOR_K):
+        return cls(*blocked_top_k(vectors, vectors, k))
+
+    def refresh(self, vectors):
+        """
+        Cập nhật bảng khi corpus có thêm bài ở cuối (vectors[len(self):]):
+        tính top-k cho bài mới trên toàn corpus, và chỉ so bài cũ với các bài mới
+        để gộp vào top-k hiện có, không tính lại toàn bộ.
+        """
+        n_old = len(self)
+        if len(vectors) <= n_old:
+            return self
+        k = self.indices.shape[1]
+        new_vectors = np.asarray(vectors[n_old:], dtype=np.float32)
+        new_idx, new_sim = blocked_top_k(new_vectors, vectors, k, query_offset=n_old)
+
+        old_idx = np.empty((n_old, k), dtype=np.int32)
+        old_sim = np.empty((n_old, k), dtype=np.float32)
+        new_cols = np.arange(n_old, len(vectors), dtype=np.int32)
+        for start in range(0, n_old, BLOCK_SIZE):
+            end = min(start + BLOCK_SIZE, n_old)
+            sims = np.asarray(vectors[start:end], dtype=np.float32) @ new_vectors.T
+            idx = np.concatenate([self.indices[start:end], np.broadcast_to(new_cols, sims.shape)], axis=1)
+            sim = np.concatenate([self.similarities[start:end], sims], axis=1)
+            old_idx[start:end], old_sim[start:end] = _merge_top_k(idx, sim, k)
+
+        self.indices = np.concatenate([old_idx, new_idx])
+        self.similarities = np.concatenate([old_sim, new_sim])
+        return self
+
+    def get(self, row, k=10):
+        """(chỉ số bài, độ tương đồng) của k bài liên quan nhất tới bài row."""
+        k = min(k, self.indices.shape[1])
+        return np.asarray(self.indices[row, :k]), np.asarray(self.similarities[row, :k])
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name, array in (("indices", self.indices), ("similarities", self.similarities)):
+            tmp = os.path.join(directory, f"{name}.tmp.npy")
+            np.save(tmp, np.asarray(array))
+            os.replace(tmp, os.path.join(directory, f"{name}.npy"))
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"count": len(self), "k": int(self.indices.shape[1])}, f)
+
+    @classmethod
+    def load(cls, directory):
+        """Bảng đã lưu trong directory, None nếu chưa có."""
+        if not os.path.exists(os.path.join(directory, "meta.json")):
+            return None
+        return cls(np.load(os.path.join(directory, "indices.npy"), mmap_mode="r"),
+                   np.load(os.path.join(directory, "similarities.npy"), mmap_mode="r"))
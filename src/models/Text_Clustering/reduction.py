@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+from sklearn.decomposition import PCA
+
+REDUCTION_METHODS = ("pca", "truncate")
+# PCA được fit trên mẫu con, đủ để ước lượng các thành phần chính
+PCA_FIT_SAMPLE = 20000
+TRANSFORM_BLOCK_SIZE = 8192
+
+
+class Reducer:
+    """
+    Giảm chiều embedding trước khi chọn k và phân cụm, kết quả được chuẩn hóa lại về độ dài 1.
+
+    - "pca": PCA (randomized) fit trên tối đa PCA_FIT_SAMPLE bài.
+    - "truncate": giữ dim chiều đầu (kiểu Matryoshka). Chỉ hợp với model được huấn luyện
+      cho việc cắt chiều; với e5 nên dùng PCA và đo ARI bằng benchmark_reduction.py.
+
+    Số chiều thực tế (self.dim) được giới hạn bởi số bài và số chiều embedding khi fit
+    (PCA không thể có nhiều thành phần hơn min(n_samples, n_features)); dim yêu cầu giữ ở requested_dim.
+    """
+
+    def __init__(self, method, dim, random_state=42):
+        if method not in REDUCTION_METHODS:
+            raise ValueError(f"Phương pháp giảm chiều '{method}' không được hỗ trợ, chọn một trong {REDUCTION_METHODS}")
+        self.method = method
+        self.requested_dim = dim
+        self.dim = dim
+        self.random_state = random_state
+        self.pca = None
+        self.fit_s = 0.0
+
+    def fit(self, vectors):
+        t0 = time.perf_counter()
+        n, n_features = vectors.shape
+        limit = min(n, PCA_FIT_SAMPLE, n_features) if self.method == "pca" else n_features
+        self.dim = min(self.requested_dim, limit)
+        if self.dim < 1:
+            raise ValueError(f"Không thể giảm chiều {n} vector {n_features} chiều")
+        if self.dim < self.requested_dim:
+            print(f"⚠️ Giảm chiều {self.method}: chỉ còn {self.dim} chiều thay vì {self.requested_dim} "
+                  f"({n} bài, {n_features} chiều)")
+        if self.method == "pca":
+            rng = np.random.default_rng(self.random_state)
+            sample = np.sort(rng.choice(n, size=PCA_FIT_SAMPLE, replace=False)) if n > PCA_FIT_SAMPLE else slice(None)
+            self.pca = PCA(n_components=self.dim, svd_solver="randomized", random_state=self.random_state)
+            self.pca.fit(np.asarray(vectors[sample], dtype=np.float32))
+        self.fit_s = time.perf_counter() - t0
+        return self
+
+    def transform(self, vectors, block_size=TRANSFORM_BLOCK_SIZE):
+        """Vector đã giảm chiều và chuẩn hóa (float32), tính theo khối để không giải nén cả ma trận."""
+        out = np.empty((len(vectors), self.dim), dtype=np.float32)
+        for start in range(0, len(vectors), block_size):
+            block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+            block = self.pca.transform(block) if self.method == "pca" else block[:, :self.dim]
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            out[start:start + block_size] = block / np.maximum(norms, 1e-12)
+        return out
+
+    def fit_transform(self, vectors):
+        return self.fit(vectors).transform(vectors)
+
+    def describe(self):
+        """Thông tin ghi vào meta.json của snapshot."""
+        info = {"method": self.method, "dim": int(self.dim),
+                "requested_dim": int(getattr(self, "requested_dim", self.dim)), "fit_s": round(self.fit_s, 3)}
+        if self.pca is not None:
+            info["explained_variance"] = round(float(self.pca.explained_variance_ratio_.sum()), 4)
+        return info
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import List
+
+import torch
+
+
+@torch.inference_mode()
+def generate_batched(
+    model,
+    tokenizer,
+    texts: List[str],
+    in_max_len: int = 512,
+    out_max_len: int = 128,
+    num_beams: int = 4,
+    no_repeat_ngram_size: int = 3,
+    do_sample: bool = False,
+    temperature: float = 1.0,
+    batch_size: int = 8,
+) -> List[str]:
+    """
+    Tóm tắt nhiều văn bản theo batch với model/tokenizer bất kỳ (dùng chung cho infer.py và eval_summarizer.py).
+    Văn bản được tokenize một lần rồi xếp theo số token để mỗi batch gồm các văn bản dài gần nhau
+    (pad theo văn bản dài nhất trong batch), kết quả trả về đúng thứ tự đầu vào.
+    """
+    input_ids = tokenizer(list(texts), truncation=True, max_length=in_max_len)["input_ids"]
+    order = sorted(range(len(texts)), key=lambda i: len(input_ids[i]))
+    summaries = [None] * len(texts)
+    for i in range(0, len(order), batch_size):
+        idx = order[i:i + batch_size]
+        enc = tokenizer.pad(
+            {"input_ids": [input_ids[j] for j in idx]},
+            padding="longest",
+            return_tensors="pt",
+        ).to(model.device)
+        gen_ids = model.generate(
+            input_ids=enc["input_ids"],
+            attention_mask=enc["attention_mask"],
+            max_length=out_max_len,
+            num_beams=num_beams,
+            no_repeat_ngram_size=no_repeat_ngram_size,
+            early_stopping=True,
+            do_sample=do_sample,
+            temperature=temperature,
+        )
+        for j, summary in zip(idx, tokenizer.batch_decode(gen_ids, skip_special_tokens=True)):
+            summaries[j] = summary
+    return summaries
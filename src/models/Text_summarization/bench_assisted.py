@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+SRC_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from models.Text_summarization import infer
+from models.Text_summarization.bench_preselect import load_samples
+
+RESULTS_PATH = "results/models/Text_summarization/bench_assisted.json"
+
+
+def timed_summaries(texts, assisted: bool, out_max_len: int):
+    summaries, latencies = [], []
+    for text in texts:
+        t0 = time.perf_counter()
+        # Không dùng cache encoder: lượt chạy trước không được làm nhanh lượt chạy sau
+        summaries.append(infer.summarize_one(text, out_max_len=out_max_len, num_beams=1, assisted=assisted,
+                                             use_encoder_cache=False))
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return summaries, np.array(latencies)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark greedy decoding thường và assisted decoding với model nháp")
+    ap.add_argument("--n", type=int, default=50, help="Số bài báo đánh giá")
+    ap.add_argument("--out_max_len", type=int, default=128)
+    args = ap.parse_args()
+
+    draft = infer.load_draft_model()
+    if draft is None:
+        sys.exit(f"Chưa có model nháp tại {infer.DRAFT_DIR}, chạy select_draft.py --save trước.")
+
+    texts = [content for content, _ in load_samples(args.n)]
+    # Chạy nóng cả hai chế độ
+    for mode in (False, True):
+        infer.summarize_one(texts[0], num_beams=1, assisted=mode, use_encoder_cache=False)
+
+    greedy, greedy_ms = timed_summaries(texts, False, args.out_max_len)
+    assisted, assisted_ms = timed_summaries(texts, True, args.out_max_len)
+
+    accepted, total = 0, 0
+    for text in texts:
+        stats = infer.draft_acceptance(text, draft, out_max_len=args.out_max_len)
+        accepted += stats["accepted"]
+        total += stats["total"]
+
+    report = {
+        "n": len(texts),
+        "greedy_latency_mean_ms": round(float(greedy_ms.mean()), 1),
+        "assisted_latency_mean_ms": round(float(assisted_ms.mean()), 1),
+        "speedup": round(float(greedy_ms.mean() / assisted_ms.mean()), 3),
+        "accepted_token_rate": round(accepted / max(total, 1), 4),
+        # Với greedy, assisted decoding phải cho ra đúng bản tóm tắt như decoding thường
+        "identical_outputs": round(float(np.mean([a == b for a, b in zip(greedy, assisted)])), 4),
+    }
+    print(json.dumps(report, indent=2))
+
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print("Saved report ->", RESULTS_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+SRC_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from models.Text_summarization import infer
+from models.Text_summarization.rouge_utils import rouge_f1
+
+RESULTS_PATH = "results/models/Text_summarization/bench_preselect.json"
+
+
+def load_samples(n: int, seed: int = 42):
+    """Lấy n cặp (content, description) từ corpus đã xử lý, description làm bản tóm tắt tham chiếu."""
+    with open("config.json", "r", encoding="utf-8") as f:
+        config = json.load(f)
+    with open(config["DATA"]["PROCESSED_DATA"], "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    pairs = [(d["content"], d["description"]) for d in data
+             if d.get("content", "").strip() and d.get("description", "").strip()]
+    rng = np.random.default_rng(seed)
+    idx = rng.choice(len(pairs), size=min(n, len(pairs)), replace=False)
+    return [pairs[i] for i in idx]
+
+
+def run(samples, preselect: bool, preselect_len: int, num_beams: int):
+    summaries, latencies, input_lens = [], [], []
+    for content, _ in samples:
+        t0 = time.perf_counter()
+        # Không dùng cache encoder: lần chạy nóng đã encode mẫu đầu tiên
+        summary = infer.summarize_one(content, num_beams=num_beams, preselect=preselect,
+                                      preselect_len=preselect_len, use_encoder_cache=False)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        summaries.append(summary)
+        if preselect:
+            content = infer.preselect_sentences(content, preselect_len, infer.token_lengths)
+        input_lens.append(min(infer.token_lengths([content])[0], 512))
+    return summaries, np.array(latencies), np.array(input_lens)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark latency và ROUGE có/không có bước lọc câu trước khi tóm tắt")
+    ap.add_argument("--n", type=int, default=100, help="Số bài báo đánh giá")
+    ap.add_argument("--preselect_len", type=int, default=256, help="Ngân sách token cho bước lọc câu")
+    ap.add_argument("--beams", type=int, default=2, help="num_beams khi sinh")
+    args = ap.parse_args()
+
+    samples = load_samples(args.n)
+    references = [ref for _, ref in samples]
+    # Chạy nóng cả hai chế độ để lần đo đầu không tính thời gian khởi tạo
+    for preselect in (False, True):
+        infer.summarize_one(samples[0][0], num_beams=args.beams,
+                            preselect=preselect, preselect_len=args.preselect_len, use_encoder_cache=False)
+
+    report = {"n": len(samples), "preselect_len": args.preselect_len, "beams": args.beams}
+    for name, preselect in (("baseline", False), ("preselect", True)):
+        summaries, latencies, input_lens = run(samples, preselect, args.preselect_len, args.beams)
+        scores = rouge_f1(summaries, references)
+        report[name] = {
+            "latency_mean_ms": round(float(latencies.mean()), 1),
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)), 1),
+            "input_tokens_mean": round(float(input_lens.mean()), 1),
+            **{k: round(float(v), 4) for k, v in scores.items()},
+        }
+        print(f"[{name}] {report[name]}")
+
+    speedup = report["baseline"]["latency_mean_ms"] / report["preselect"]["latency_mean_ms"]
+    report["speedup"] = round(speedup, 2)
+    print(f"Speedup: {speedup:.2f}x")
+
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print("Saved report ->", RESULTS_PATH)
+
+
+if __name__ == "__main__":
+    main()
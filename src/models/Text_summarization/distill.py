@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Chưng cất ViT5 đã fine-tune (teacher) thành model nhỏ hơn (student) để chạy trên CPU.
+
+    1. Teacher sinh bản tóm tắt cho corpus (distillation mức chuỗi).
+    2. Student (vit5-base hoặc teacher bị cắt bớt layer) học lại các bản tóm tắt đó.
+    3. Lưu checkpoint tương thích infer.py và báo cáo chất lượng / tốc độ.
+
+Chạy thử nhanh trên CPU:
+    python src/models/Text_summarization/distill.py --tiny
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import time
+
+import evaluate
+import numpy as np
+import torch
+from datasets import Dataset
+from transformers import (
+    AutoTokenizer,
+    AutoModelForSeq2SeqLM,
+    DataCollatorForSeq2Seq,
+    Seq2SeqTrainingArguments,
+    Seq2SeqTrainer,
+)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TEACHER_DIR = os.path.join(HERE, "vit5_finetuned")
+OUTPUT_DIR = os.path.join(HERE, "vit5_distilled")
+# Mặc định khi config.json không có DATA.PROCESSED_DATA
+DATA_PATH = "data/processed_data/processed_data.json"
+TINY_MODEL = "hf-internal-testing/tiny-random-t5"
+RESULTS_PATH = "results/models/Text_summarization/distill_report.json"
+SEED = 42
+
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def default_data_path(config_path: str = "config.json") -> str:
+    """Corpus đã xử lý khai báo trong DATA.PROCESSED_DATA của config.json."""
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("DATA", {}).get("PROCESSED_DATA", DATA_PATH)
+    except FileNotFoundError:
+        return DATA_PATH
+
+
+def load_pairs(path: str, max_samples: int = None):
+    """Các cặp (content, description) hợp lệ của corpus, description làm tham chiếu."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    pairs = [{"input": d["content"].strip(), "reference": d["description"].strip()} for d in data
+             if d.get("content", "").strip() and d.get("description", "").strip()]
+    rng = np.random.default_rng(SEED)
+    rng.shuffle(pairs)
+    return pairs[:max_samples] if max_samples else pairs
+
+
+@torch.inference_mode()
+def generate(model, tokenizer, texts, max_source_len, max_target_len, num_beams, batch_size):
+    """Sinh tóm tắt theo batch, gom các văn bản dài gần nhau để giảm padding."""
+    order = np.argsort([len(t) for t in texts])
+    outputs = [None] * len(texts)
+    for i in range(0, len(texts), batch_size):
+        idx = order[i:i + batch_size]
+        enc = tokenizer([texts[j] for j in idx], return_tensors="pt", truncation=True,
+                        padding="longest", max_length=max_source_len).to(model.device)
+        ids = model.generate(**enc, max_length=max_target_len, num_beams=num_beams, early_stopping=True)
+        for j, summary in zip(idx, tokenizer.batch_decode(ids, skip_special_tokens=True)):
+            outputs[j] = summary
+    return outputs
+
+
+def teacher_cache_path(pairs, args):
+    """
+    File cache bản tóm tắt của teacher, khóa theo teacher, tham số sinh và dữ liệu nguồn:
+    đổi teacher, số beam hay độ dài cắt thì sinh lại thay vì dùng nhầm bản cũ.
+    """
+    teacher = os.path.abspath(args.teacher) if os.path.isdir(args.teacher) else args.teacher
+    stat = os.stat(args.data)
+    parts = [
+        teacher, str(args.teacher_beams), str(args.max_source_len), str(args.max_target_len),
+        os.path.abspath(args.data), str(stat.st_size), str(int(stat.st_mtime)), str(len(pairs)),
+    ]
+    key = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(args.output, f"teacher_summaries_{key}.jsonl")
+
+
+def teacher_summaries(teacher, tokenizer, pairs, args, cache_path):
+    """Bản tóm tắt của teacher, lưu ra file để chạy lại không phải sinh lại."""
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = [json.loads(line) for line in f]
+        if len(cached) == len(pairs):
+            print(f"[teacher] Reusing {len(cached)} summaries from {cache_path}")
+            return [c["summary"] for c in cached]
+
+    t0 = time.perf_counter()
+    summaries = generate(teacher, tokenizer, [p["input"] for p in pairs], args.max_source_len,
+                         args.max_target_len, args.teacher_beams, args.batch_size)
+    print(f"[teacher] Generated {len(summaries)} summaries in {time.perf_counter() - t0:.1f}s")
+    with open(cache_path, "w", encoding="utf-8") as f:
+        for s in summaries:
+            f.write(json.dumps({"summary": s}, ensure_ascii=False) + "\n")
+    return summaries
+
+
+def prune_layers(teacher, keep_every: int):
+    """
+    Student = teacher giữ lại 1/keep_every số block của encoder và decoder.
+    Block 0 luôn được giữ vì chứa relative attention bias của T5.
+    """
+    student = copy.deepcopy(teacher)
+    for stack in (student.encoder, student.decoder):
+        keep = list(range(0, len(stack.block), keep_every))
+        stack.block = torch.nn.ModuleList([stack.block[i] for i in keep])
+    student.config.num_layers = len(student.encoder.block)
+    student.config.num_decoder_layers = len(student.decoder.block)
+    return student
+
+
+def build_student(teacher, args):
+    if args.student == "pruned":
+        return prune_layers(teacher, args.keep_every)
+    return AutoModelForSeq2SeqLM.from_pretrained(args.student)
+
+
+def count_params(model) -> int:
+    return sum(p.numel() for p in model.parameters())
+
+
+def train_student(student, tokenizer, inputs, targets, args):
+    def tokenize(batch):
+        features = tokenizer(batch["input"], truncation=True, max_length=args.max_source_len)
+        features["labels"] = tokenizer(text_target=batch["target"], truncation=True,
+                                       max_length=args.max_target_len)["input_ids"]
+        return features
+
+    dataset = Dataset.from_dict({"input": inputs, "target": targets})
+    dataset = dataset.map(tokenize, batched=True, batch_size=1000, remove_columns=["input", "target"])
+
+    training_args = Seq2SeqTrainingArguments(
+        output_dir=os.path.join(args.output, "checkpoints"),
+        per_device_train_batch_size=args.batch_size,
+        gradient_accumulation_steps=args.grad_accum,
+        learning_rate=args.learning_rate,
+        num_train_epochs=args.epochs,
+        lr_scheduler_type="linear",
+        warmup_ratio=0.1,
+        logging_steps=50,
+        save_strategy="epoch",
+        save_total_limit=1,
+        group_by_length=True,
+        fp16=torch.cuda.is_available(),
+        seed=SEED,
+        report_to=[],
+    )
+    trainer = Seq2SeqTrainer(
+        model=student,
+        args=training_args,
+        train_dataset=dataset,
+        data_collator=DataCollatorForSeq2Seq(tokenizer=tokenizer, model=student),
+    )
+    trainer.train()
+    return trainer.model
+
+
+def timed_generate(model, tokenizer, texts, args):
+    t0 = time.perf_counter()
+    # batch_size=1, greedy: giống cách API gọi summarize_one
+    outputs = generate(model, tokenizer, texts, args.max_source_len, args.max_target_len, 1, 1)
+    return outputs, (time.perf_counter() - t0) * 1000 / max(len(texts), 1)
+
+
+def report(teacher, student, tokenizer, eval_pairs, eval_teacher, args):
+    rouge = evaluate.load("rouge")
+    texts = [p["input"] for p in eval_pairs]
+    references = [p["reference"] for p in eval_pairs]
+
+    teacher_out, teacher_ms = timed_generate(teacher, tokenizer, texts, args)
+    student_out, student_ms = timed_generate(student, tokenizer, texts, args)
+
+    def r2(preds, refs):
+        return round(float(rouge.compute(predictions=preds, references=refs, rouge_types=["rouge2"])["rouge2"]), 4)
+
+    result = {
+        "teacher_params": count_params(teacher),
+        "student_params": count_params(student),
+        "teacher_ms_per_sample": round(teacher_ms, 1),
+        "student_ms_per_sample": round(student_ms, 1),
+        "speedup": round(teacher_ms / student_ms, 2) if student_ms else None,
+        "teacher_rouge2_vs_reference": r2(teacher_out, references),
+        "student_rouge2_vs_reference": r2(student_out, references),
+        "student_rouge2_vs_teacher": r2(student_out, eval_teacher),
+        "n_eval": len(eval_pairs),
+    }
+    result["rouge2_loss"] = round(result["teacher_rouge2_vs_reference"] - result["student_rouge2_vs_reference"], 4)
+    return result
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Chưng cất ViT5 fine-tune thành model nhỏ cho CPU")
+    p.add_argument("--teacher", default=TEACHER_DIR, help="Checkpoint teacher (mặc định vit5_finetuned)")
+    p.add_argument("--student", default="pruned",
+                   help="'pruned' (cắt layer của teacher) hoặc tên/đường dẫn model, vd. VietAI/vit5-base")
+    p.add_argument("--keep_every", type=int, default=2, help="Giữ 1 trên keep_every block khi cắt layer")
+    p.add_argument("--data", default=None, help="Corpus đã xử lý (mặc định DATA.PROCESSED_DATA trong config.json)")
+    p.add_argument("--output", default=OUTPUT_DIR)
+    p.add_argument("--max_samples", type=int, default=None)
+    p.add_argument("--eval_size", type=float, default=0.05, help="Tỉ lệ dữ liệu giữ lại để báo cáo")
+    p.add_argument("--max_source_len", type=int, default=512)
+    p.add_argument("--max_target_len", type=int, default=128)
+    p.add_argument("--teacher_beams", type=int, default=4)
+    p.add_argument("--batch_size", type=int, default=8)
+    p.add_argument("--grad_accum", type=int, default=4)
+    p.add_argument("--learning_rate", type=float, default=3e-4)
+    p.add_argument("--epochs", type=float, default=3)
+    p.add_argument("--tiny", action="store_true", help="Cấu hình siêu nhỏ để chạy thử end-to-end trên CPU")
+    args = p.parse_args()
+    args.data = args.data or default_data_path()
+
+    if args.tiny:
+        if args.teacher == TEACHER_DIR:
+            args.teacher = TINY_MODEL
+        args.output = os.path.join(args.output, "tiny") if args.output == OUTPUT_DIR else args.output
+        args.max_samples = args.max_samples or 16
+        args.eval_size = 0.25
+        args.max_source_len, args.max_target_len = 64, 16
+        args.teacher_beams, args.batch_size, args.grad_accum = 1, 4, 1
+        args.epochs = 1
+    return args
+
+
+def main():
+    args = parse_args()
+    os.makedirs(args.output, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.teacher, use_fast=True)
+    teacher = AutoModelForSeq2SeqLM.from_pretrained(args.teacher).to(DEVICE)
+    teacher.eval()
+
+    pairs = load_pairs(args.data, args.max_samples)
+    n_eval = max(1, int(len(pairs) * args.eval_size))
+    train_pairs, eval_pairs = pairs[n_eval:], pairs[:n_eval]
+    print(f"Train: {len(train_pairs)}, eval: {len(eval_pairs)}")
+
+    summaries = teacher_summaries(teacher, tokenizer, pairs, args, teacher_cache_path(pairs, args))
+    eval_teacher, train_teacher = summaries[:n_eval], summaries[n_eval:]
+
+    student = build_student(teacher, args)
+    print(f"Teacher params: {count_params(teacher):,}, student params: {count_params(student):,}")
+    student = train_student(student, tokenizer, [p["input"] for p in train_pairs], train_teacher, args)
+
+    # Checkpoint dùng được trực tiếp với infer.py (model + tokenizer + generation config)
+    student.save_pretrained(args.output)
+    tokenizer.save_pretrained(args.output)
+    print("Saved student ->", args.output)
+
+    student.to(DEVICE).eval()
+    result = report(teacher, student, tokenizer, eval_pairs, eval_teacher, args)
+    print(json.dumps(result, indent=2))
+
+    # Báo cáo của lần chạy --tiny để cạnh checkpoint, không ghi đè báo cáo thật
+    results_path = os.path.join(args.output, "distill_report.json") if args.tiny else RESULTS_PATH
+    os.makedirs(os.path.dirname(results_path), exist_ok=True)
+    with open(results_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print("Saved report ->", results_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import torch
+
+
+class EncoderCache:
+    """
+    Cache LRU cho hidden state của encoder, khóa theo (biến thể model, input_ids).
+    Giới hạn theo tổng số byte và thời gian sống, để các lần tóm tắt lại cùng
+    văn bản với tham số giải mã khác bỏ qua được bước encode.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2 ** 20, ttl_s: float = 600):
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model_variant: str, input_ids: torch.Tensor) -> str:
+        digest = hashlib.sha1(input_ids.detach().cpu().numpy().tobytes()).hexdigest()
+        return f"{model_variant}:{digest}"
+
+    def get(self, key: str) -> Optional[torch.Tensor]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.ttl_s:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, hidden_states: torch.Tensor):
+        size = hidden_states.element_size() * hidden_states.nelement()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (hidden_states, time.monotonic(), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Đánh giá nhanh một checkpoint tóm tắt trên tập test (cùng cách chia với finetune_vit.py),
+không cần chạy Seq2SeqTrainer:
+
+    python src/models/Text_summarization/eval_summarizer.py --checkpoint /data/vit5_finetuned
+    python src/models/Text_summarization/eval_summarizer.py --checkpoint src/models/Text_summarization/vit5_distilled
+
+Chỉ load tokenizer và checkpoint cần đánh giá (không import infer.py nên không load model
+đang triển khai hay merge adapter). Sinh tóm tắt theo batch bằng batching.generate_batched (cùng hàm
+với infer.summarize_batch, xếp theo số token), tính ROUGE và token accuracy song song bằng
+multiprocessing, ghi kết quả từng mẫu (JSONL) và số liệu tổng hợp (JSON).
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+SRC_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from models.Text_summarization.batching import generate_batched
+from models.Text_summarization.finetune_vit import DATA_PATH, load_splits
+from models.Text_summarization.rouge_utils import ROUGE_TYPES, make_scorer
+
+# Model đang triển khai của infer.py (chỉ dùng đường dẫn, không load)
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vit5_finetuned")
+DEVICE = "cuda" if torch.cuda.is_available() else ("mps" if torch.backends.mps.is_available() else "cpu")
+RESULTS_DIR = "results/models/Text_summarization/eval"
+
+
+_scorer = None
+
+
+def _init_worker():
+    global _scorer
+    _scorer = make_scorer()
+
+
+def score_example(example):
+    """ROUGE F1 và token accuracy (so từng vị trí token với tham chiếu) của một mẫu."""
+    prediction, reference, pred_ids, ref_ids = example
+    scores = _scorer.score(reference, prediction)
+    correct = sum(1 for p, r in zip(pred_ids, ref_ids) if p == r)
+    result = {k: round(scores[k].fmeasure, 4) for k in ROUGE_TYPES}
+    result["token_correct"] = correct
+    result["token_total"] = len(ref_ids)
+    return result
+
+
+def load_checkpoint(path: str):
+    """Tokenizer và model của checkpoint; checkpoint không kèm tokenizer thì dùng tokenizer ViT5 của infer.py."""
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(path, use_fast=True)
+    except (OSError, ValueError):
+        tokenizer = AutoTokenizer.from_pretrained(DEFAULT_CHECKPOINT, use_fast=True)
+    model = AutoModelForSeq2SeqLM.from_pretrained(path).to(DEVICE)
+    model.eval()
+    return tokenizer, model
+
+
+def score_all(tokenizer, predictions, references, workers: int):
+    pred_ids = tokenizer(predictions, add_special_tokens=False)["input_ids"]
+    ref_ids = tokenizer(references, add_special_tokens=False)["input_ids"]
+    examples = list(zip(predictions, references, pred_ids, ref_ids))
+    if workers <= 1:
+        _init_worker()
+        return [score_example(e) for e in examples]
+    with mp.Pool(workers, initializer=_init_worker) as pool:
+        return pool.map(score_example, examples, chunksize=max(1, len(examples) // (workers * 4)))
+
+
+def aggregate(scores):
+    metrics = {k: round(float(np.mean([s[k] for s in scores])), 4) for k in ROUGE_TYPES}
+    correct = sum(s["token_correct"] for s in scores)
+    total = sum(s["token_total"] for s in scores)
+    metrics["token_accuracy"] = round(correct / total, 4) if total else 0.0
+    return metrics
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Đánh giá checkpoint tóm tắt trên tập test")
+    ap.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT,
+                    help="Checkpoint seq2seq dùng chung tokenizer ViT5 (mặc định model của infer.py)")
+    ap.add_argument("--data", default=DATA_PATH)
+    ap.add_argument("--split", choices=["train", "val", "test"], default="test")
+    ap.add_argument("--max_samples", type=int, default=None, help="Giới hạn số mẫu trước khi chia split")
+    ap.add_argument("--limit", type=int, default=None, help="Chỉ đánh giá N mẫu đầu của split")
+    ap.add_argument("--in_max_len", type=int, default=512)
+    ap.add_argument("--out_max_len", type=int, default=128)
+    ap.add_argument("--beams", type=int, default=4)
+    ap.add_argument("--batch_size", type=int, default=16)
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                    help="Số process tính metric")
+    ap.add_argument("--out_dir", default=None, help=f"Mặc định {RESULTS_DIR}/<tên checkpoint>")
+    args = ap.parse_args()
+
+    dataset = load_splits(args)[args.split]
+    if args.limit:
+        dataset = dataset.select(range(min(args.limit, len(dataset))))
+    texts, references = dataset["input"], dataset["target"]
+
+    tokenizer, model = load_checkpoint(args.checkpoint)
+
+    t0 = time.perf_counter()
+    predictions = generate_batched(
+        model,
+        tokenizer,
+        texts,
+        in_max_len=args.in_max_len,
+        out_max_len=args.out_max_len,
+        num_beams=args.beams,
+        batch_size=args.batch_size,
+    )
+    gen_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    scores = score_all(tokenizer, predictions, references, args.workers)
+    score_s = time.perf_counter() - t0
+
+    metrics = aggregate(scores)
+    metrics.update({
+        "checkpoint": args.checkpoint,
+        "split": args.split,
+        "n": len(texts),
+        "num_beams": args.beams,
+        "generation_s": round(gen_s, 1),
+        "samples_per_s": round(len(texts) / gen_s, 2) if gen_s else None,
+        "scoring_s": round(score_s, 1),
+    })
+    print(json.dumps(metrics, ensure_ascii=False, indent=2))
+
+    out_dir = args.out_dir or os.path.join(RESULTS_DIR, os.path.basename(os.path.normpath(args.checkpoint)))
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, f"{args.split}_predictions.jsonl"), "w", encoding="utf-8") as f:
+        for i, (text, ref, pred, score) in enumerate(zip(texts, references, predictions, scores)):
+            f.write(json.dumps({"id": i, "input": text, "reference": ref, "prediction": pred, **score},
+                               ensure_ascii=False) + "\n")
+    with open(os.path.join(out_dir, f"{args.split}_metrics.json"), "w", encoding="utf-8") as f:
+        json.dump(metrics, f, ensure_ascii=False, indent=2)
+    print("Saved ->", out_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import re
+from typing import Callable, List, Optional
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+_SENT_SPLIT_RE = re.compile(r"(?<=[.!?…])\s+|\n+")
+# Chú thích ảnh/biểu đồ mà crawler Vietnamnet để trong ngoặc vuông, và các dòng "Ảnh: ...", "Video: ..."
+_CAPTION_RE = re.compile(r"^\s*(\[.*\]|\(.*\)|(ảnh|video|nguồn|clip)\s*:.*)\s*$", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"\d+")
+MIN_SENTENCE_WORDS = 4
+
+_stop_words_re = None
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Tách văn bản thành các câu theo dấu kết câu và xuống dòng.
+    """
+    return [s.strip() for s in _SENT_SPLIT_RE.split(text or "") if s and s.strip()]
+
+
+def is_boilerplate(sentence: str) -> bool:
+    """Câu chú thích ảnh hoặc quá ngắn để mang thông tin."""
+    return bool(_CAPTION_RE.match(sentence)) or len(sentence.split()) < MIN_SENTENCE_WORDS
+
+
+def content_sentences(text: str) -> List[str]:
+    """Các câu của văn bản sau khi bỏ dòng chú thích và câu rác."""
+    # Bỏ chú thích theo dòng trước, vì chú thích có thể chứa nhiều câu
+    lines = [line for line in (text or "").split("\n") if not _CAPTION_RE.match(line)]
+    return [s for s in split_sentences("\n".join(lines)) if not is_boilerplate(s)]
+
+
+def _get_stop_words_re():
+    """Regex khớp các cụm stop word (dài trước), load lười từ config."""
+    global _stop_words_re
+    if _stop_words_re is None:
+        try:
+            with open("config.json", "r", encoding="utf-8") as f:
+                config = json.load(f)
+            with open(config["DATA"]["STOP_WORDS"], "r", encoding="utf-8") as f:
+                phrases = {line.strip() for line in f if line.strip()}
+        except (FileNotFoundError, KeyError):
+            phrases = set()
+        if phrases:
+            alternation = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+            _stop_words_re = re.compile(r"(?<!\w)(?:" + alternation + r")(?!\w)")
+        else:
+            _stop_words_re = re.compile(r"(?!x)x")
+    return _stop_words_re
+
+
+def _normalize(sentence: str) -> str:
+    text = _NUMBER_RE.sub(" ", sentence.lower())
+    return _get_stop_words_re().sub(" ", text)
+
+
+def sentence_vectors(sentences: List[str]):
+    """
+    Vector TF-IDF (chuẩn hóa L2) cho từng câu, dùng unigram + bigram âm tiết
+    để xấp xỉ từ ghép tiếng Việt. Trả về None nếu không còn từ nào sau khi lọc.
+    """
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), preprocessor=_normalize, sublinear_tf=True)
+    try:
+        return vectorizer.fit_transform(sentences)
+    except ValueError:
+        # Tất cả các câu chỉ gồm stop word
+        return None
+
+
+def centrality_scores(sentences: List[str]) -> np.ndarray:
+    """Độ tương đồng cosine giữa mỗi câu và vector trọng tâm của cả văn bản."""
+    vectors = sentence_vectors(sentences)
+    if vectors is None:
+        return np.zeros(len(sentences))
+    centroid = np.asarray(vectors.mean(axis=0)).ravel()
+    norm = np.linalg.norm(centroid)
+    if norm == 0:
+        return np.zeros(len(sentences))
+    return np.asarray(vectors @ (centroid / norm)).ravel()
+
+
+def preselect(
+    text: str,
+    token_budget: int,
+    token_lengths: Optional[Callable[[List[str]], List[int]]] = None,
+) -> str:
+    """
+    Giữ lại các câu có độ trung tâm TF-IDF cao nhất cho tới khi hết token_budget,
+    theo thứ tự xuất hiện ban đầu, để rút ngắn đầu vào cho encoder.
+    token_lengths: hàm đếm token cho danh sách câu (mặc định đếm theo khoảng trắng).
+    """
+    sentences = content_sentences(text)
+    if not sentences:
+        return text
+
+    if token_lengths is None:
+        lengths = [len(s.split()) for s in sentences]
+    else:
+        lengths = token_lengths(sentences)
+    if sum(lengths) <= token_budget:
+        return " ".join(sentences)
+
+    scores = centrality_scores(sentences)
+    keep, used = [], 0
+    for i in np.argsort(-scores, kind="stable"):
+        if used + lengths[i] > token_budget:
+            continue
+        keep.append(i)
+        used += lengths[i]
+    if not keep:
+        keep = [int(np.argmax(scores))]
+    return " ".join(sentences[i] for i in sorted(keep))
+
+
+def lexrank_scores(sentences: List[str], threshold: float = 0.1, damping: float = 0.85,
+                   max_iter: int = 50, tol: float = 1e-6) -> np.ndarray:
+    """
+    LexRank: PageRank trên đồ thị câu, cạnh nối hai câu có cosine TF-IDF >= threshold.
+    """
+    n = len(sentences)
+    vectors = sentence_vectors(sentences)
+    if vectors is None or n == 1:
+        return np.full(n, 1.0 / n)
+
+    sim = np.asarray((vectors @ vectors.T).todense())
+    adj = (sim >= threshold).astype(np.float64)
+    # Chuẩn hóa theo hàng để có ma trận chuyển trạng thái (mỗi câu luôn nối với chính nó)
+    transition = adj / adj.sum(axis=1, keepdims=True)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tol:
+            scores = updated
+            break
+        scores = updated
+    return scores
+
+
+def summarize_extractive(text: str, max_words: int = 128, max_sentences: int = 5) -> str:
+    """
+    Tóm tắt trích xuất: chọn các câu có điểm LexRank cao nhất trong giới hạn
+    max_words từ và max_sentences câu, giữ nguyên thứ tự xuất hiện.
+    """
+    sentences = content_sentences(text) or split_sentences(text)
+    if not sentences:
+        return ""
+
+    scores = lexrank_scores(sentences)
+    keep, used = [], 0
+    for i in np.argsort(-scores, kind="stable"):
+        n_words = len(sentences[i].split())
+        if used + n_words > max_words:
+            continue
+        keep.append(i)
+        used += n_words
+        if len(keep) >= max_sentences:
+            break
+    if not keep:
+        # Câu tốt nhất dài hơn giới hạn: cắt theo số từ
+        best = sentences[int(np.argmax(scores))].split()
+        return " ".join(best[:max_words])
+    return " ".join(sentences[i] for i in sorted(keep))
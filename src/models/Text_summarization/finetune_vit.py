@@ -1,96 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fine-tune ViT5 cho tóm tắt tin tức, chia thành các bước chạy độc lập:
+
+    python src/models/Text_summarization/finetune_vit.py prepare    # tokenize + cache dữ liệu
+    python src/models/Text_summarization/finetune_vit.py train      # train, tự resume từ checkpoint mới nhất
+    python src/models/Text_summarization/finetune_vit.py evaluate   # đánh giá trên tập test
+    python src/models/Text_summarization/finetune_vit.py export     # copy model cho infer.py
+
+Thêm --smoke để chạy thử cả pipeline trên model tí hon và vài chục mẫu.
+Thêm --lora để chỉ train adapter hạng thấp (chạy được trên CPU, cần cài peft);
+export khi đó ghi adapter vào vit5_adapter/ và infer.py merge vào model lúc load.
+"""
+
 #Configurations and Hyperparameters
+import os
+
 OUTPUT_DIR = '/data/vit5_finetuned/'
+# Thư mục infer.py đọc model
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vit5_finetuned")
+# Adapter LoRA, infer.py merge vào model trong EXPORT_DIR khi load
+ADAPTER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vit5_adapter")
 batch_size = 2
 learning_rate = 5e-5
 num_train_epochs = 3
 weight_decay = 0.01
 logging_steps = 500
-save_steps = 500    
+save_steps = 500
 eval_steps = 500
 warmup_steps = 500
+# LoRA: hạng thấp trên các ma trận attention của T5, learning rate cao hơn full fine-tune
+lora_r = 16
+lora_alpha = 32
+lora_dropout = 0.05
+lora_target_modules = ["q", "k", "v", "o"]
+lora_learning_rate = 1e-3
+# Số lần đánh giá liên tiếp không cải thiện ROUGE-2 trước khi dừng sớm
+early_stopping_patience = 2
 
 MODEL_NAME = "VietAI/vit5-large-vietnews-summarization"
-DATA_PATH = "data/processed_data/processed_data.json"  
-TEXT_FIELD = "input"               
-TARGET_FIELD = "target"            
+SMOKE_MODEL_NAME = "hf-internal-testing/tiny-random-t5"
+DATA_PATH = "data/processed_data/processed_data.json"
+TEXT_FIELD = "input"
+TARGET_FIELD = "target"
 
-PREFIX = "vietnews: "             
+PREFIX = "vietnews: "
 MAX_SOURCE_LEN = 512
 MAX_TARGET_LEN = 128
 SEED = 42
-encoder_max_length = MAX_SOURCE_LEN
-decoder_max_length = MAX_TARGET_LEN
+TOKENIZE_BATCH_SIZE = 1000
+NUM_PROC = max(1, (os.cpu_count() or 1) // 2)
+TOKENIZED_CACHE_DIR = "data/cache/tokenized"
+EPOCH_TIMES_PATH = "results/models/Text_summarization/epoch_times.json"
+TEST_METRICS_PATH = "results/models/Text_summarization/test_metrics.json"
+TRAINING_COST_PATH = "results/models/Text_summarization/training_cost_{mode}.json"
 
 
 # Import Libraries
-import os
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+import argparse
+import hashlib
+import json
+import resource
+import time
 import evaluate
 import numpy as np
 import torch
-from datasets import load_dataset
+from datasets import load_dataset, load_from_disk
 from transformers import (
     AutoTokenizer,
     AutoModelForSeq2SeqLM,
     DataCollatorForSeq2Seq,
+    EarlyStoppingCallback,
     Seq2SeqTrainingArguments,
     Seq2SeqTrainer,
+    TrainerCallback,
 )
-from datasets import load_dataset
+from transformers.trainer_utils import get_last_checkpoint
 import re
-import numpy as np
 
-# Load tokenizer and model
-tokenizer = AutoTokenizer.from_pretrained("VietAI/vit5-large-vietnews-summarization")  
-model = AutoModelForSeq2SeqLM.from_pretrained("VietAI/vit5-large-vietnews-summarization")
+try:
+    from peft import LoraConfig, PeftModel, TaskType, get_peft_model
+except ImportError:
+    # peft chỉ cần cho chế độ --lora
+    LoraConfig = PeftModel = TaskType = get_peft_model = None
+
 device = "cuda" if torch.cuda.is_available() else "cpu"
-model.to(device)
-
-# from collections import Counter
-# import random
-
-# def preview_examples(ds, name, n=3, text_key=TEXT_FIELD, target_key=TARGET_FIELD, max_chars=200):
-#     print(f"\n=== {name} (size={len(ds)}) ===")
-#     for i in random.sample(range(len(ds)), k=min(n, len(ds))):
-#         ex = ds[i]
-#         x = str(ex.get(text_key, ""))[:max_chars].replace("\n", " ")
-#         y = str(ex.get(target_key, ""))[:max_chars].replace("\n", " ")
-#         print(f"\n-- idx {i} --")
-#         print(f"INPUT  ({len(ex.get(text_key,''))} chars): {x}{'…' if len(ex.get(text_key,''))>max_chars else ''}")
-#         print(f"TARGET ({len(ex.get(target_key,''))} chars): {y}{'…' if len(ex.get(target_key,''))>max_chars else ''}")
-
-# def split_stats(ds, text_key=TEXT_FIELD, target_key=TARGET_FIELD):
-#     n = len(ds)
-#     empty_x = sum(1 for ex in ds if not str(ex.get(text_key, "")).strip())
-#     empty_y = sum(1 for ex in ds if not str(ex.get(target_key, "")).strip())
-#     len_x = [len(str(ex.get(text_key, ""))) for ex in ds]
-#     len_y = [len(str(ex.get(target_key, ""))) for ex in ds]
-
-#     def _pct(x): return f"{100.0*x/n:.2f}%" if n else "0%"
-#     stats = {
-#         "num_samples": n,
-#         "empty_inputs": f"{empty_x} ({_pct(empty_x)})",
-#         "empty_targets": f"{empty_y} ({_pct(empty_y)})",
-#         "input_len_avg": sum(len_x)/n if n else 0,
-#         "input_len_min": min(len_x) if n else 0,
-#         "input_len_max": max(len_x) if n else 0,
-#         "target_len_avg": sum(len_y)/n if n else 0,
-#         "target_len_min": min(len_y) if n else 0,
-#         "target_len_max": max(len_y) if n else 0,
-#     }
-#     return stats
-
-# def print_stats(name, ds):
-#     s = split_stats(ds)
-#     print(f"\n--- Stats: {name} ---")
-#     for k,v in s.items():
-#         print(f"{k:>16}: {v}")
 
 
 # Data Preparation
-dataset = load_dataset("json", data_files=DATA_PATH)  
-
 def _clean_text(s):
     if s is None: return ""
     s = str(s).replace("\u00a0", " ")
@@ -100,120 +98,208 @@ def _clean_text(s):
 
 def build_input_target(example):
     content = _clean_text(example.get("content", ""))
-    desc    = _clean_text(example.get("description", "")) 
+    desc    = _clean_text(example.get("description", ""))
 
     # input = prefix + title + content
     inp = f"{content}".strip()
     return { "input": inp, "target": desc }
 
-# Tạo cột input/target
-dataset = dataset.map(build_input_target)
-
 # Lọc bỏ các mẫu thiếu target rỗng
 def has_target(example):
     return bool(example.get("target", "").strip())
 
-dataset = dataset.filter(has_target)
-
-# Split dataset
-full = dataset["train"]
-splits = full.train_test_split(test_size=0.2, seed=SEED)
-train_dataset = splits["train"]
-tmp = splits["test"].train_test_split(test_size=0.5, seed=SEED)
-val_dataset = tmp["train"]
-test_dataset = tmp["test"]
+def load_splits(args):
+    """Chia train/val/test 80/10/10 với seed cố định."""
+    dataset = load_dataset("json", data_files=args.data)
+    dataset = dataset.map(build_input_target)
+    dataset = dataset.filter(has_target)
 
-# print(f"Train size: {len(train_dataset)}")
-# print(f"Validation size: {len(val_dataset)}")
-# print(f"Test size: {len(test_dataset)}")
-
-# Preview a few raw examples
-# preview_examples(train_dataset, "TRAIN", n=3)
-# preview_examples(val_dataset,   "VAL",   n=3)
-# preview_examples(test_dataset,  "TEST",  n=3)
+    full = dataset["train"]
+    if args.max_samples:
+        full = full.shuffle(seed=SEED).select(range(min(args.max_samples, len(full))))
+    splits = full.train_test_split(test_size=0.2, seed=SEED)
+    tmp = splits["test"].train_test_split(test_size=0.5, seed=SEED)
+    return {"train": splits["train"], "val": tmp["train"], "test": tmp["test"]}
 
 
 # Format data for model
-def process_data_to_model_inputs(batch):
-    sources = batch[TEXT_FIELD]
-    targets = batch[TARGET_FIELD]
-
-    inputs = tokenizer(
-        sources,
-        padding="max_length",
-        truncation=True,
-        max_length=encoder_max_length,
-    )
-    outputs = tokenizer(
-        targets,
-        padding="max_length",
-        truncation=True,
-        max_length=decoder_max_length,
+# Không pad ở đây: DataCollatorForSeq2Seq pad động theo batch (labels pad bằng -100)
+# và tự tạo decoder_input_ids từ labels.
+# Baseline --pad_to_max_length: pad như pipeline cũ (đầu vào tới max_source_len,
+# tóm tắt tới max_target_len, pad của labels thay bằng -100), collator không pad thêm.
+def make_preprocess_fn(tokenizer, args):
+    padding = "max_length" if args.pad_to_max_length else False
+
+    def process_data_to_model_inputs(batch):
+        inputs = tokenizer(
+            batch[TEXT_FIELD],
+            padding=padding,
+            truncation=True,
+            max_length=args.max_source_len,
+        )
+        labels = tokenizer(
+            text_target=batch[TARGET_FIELD],
+            padding=padding,
+            truncation=True,
+            max_length=args.max_target_len,
+        )["input_ids"]
+        if padding:
+            labels = [[-100 if t == tokenizer.pad_token_id else t for t in seq] for seq in labels]
+        inputs["labels"] = labels
+        return inputs
+    return process_data_to_model_inputs
+
+
+def tokenizer_fingerprint(tokenizer):
+    """
+    Định danh tokenizer theo vocab (không theo thư mục load): tokenizer của model gốc và bản
+    lưu trong output_dir cho cùng khóa, nên bước evaluate dùng lại cache của bước train.
+    """
+    vocab = sorted(tokenizer.get_vocab().items())
+    return hashlib.sha1(json.dumps(vocab, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def tokenized_cache_key(split_name, ds, tokenizer, args):
+    """Khóa cache: dữ liệu nguồn + tokenizer + độ dài cắt, đổi bất kỳ cái nào là tokenize lại."""
+    stat = os.stat(args.data)
+    parts = [
+        split_name, args.data, str(stat.st_size), str(int(stat.st_mtime)), str(SEED), str(len(ds)),
+        tokenizer_fingerprint(tokenizer), str(args.max_source_len), str(args.max_target_len),
+        str(args.pad_to_max_length),
+    ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def tokenize_split(ds, split_name, tokenizer, args):
+    """Tokenize một split với batch lớn + nhiều process, lưu kết quả ra đĩa cho các lần chạy sau."""
+    key = tokenized_cache_key(split_name, ds, tokenizer, args)
+    cache_path = os.path.join(TOKENIZED_CACHE_DIR, f"{split_name}_{key}")
+    if os.path.isdir(cache_path):
+        print(f"[data] Loaded tokenized {split_name} from {cache_path}")
+        return load_from_disk(cache_path)
+
+    t0 = time.perf_counter()
+    tokenized = ds.map(
+        make_preprocess_fn(tokenizer, args),
+        batched=True,
+        batch_size=TOKENIZE_BATCH_SIZE,
+        num_proc=min(NUM_PROC, max(1, len(ds) // TOKENIZE_BATCH_SIZE)),
+        remove_columns=ds.column_names,
     )
-
-    batch["input_ids"] = inputs["input_ids"]
-    batch["attention_mask"] = inputs["attention_mask"]
-    batch["decoder_input_ids"] = outputs["input_ids"]
-
-    # labels với pad=-100 để mask loss
-    pad_id = tokenizer.pad_token_id
-    labels = []
-    for seq in outputs["input_ids"]:
-        labels.append([-100 if t == pad_id else t for t in seq])
-    batch["labels"] = labels
-
-    batch["decoder_attention_mask"] = outputs["attention_mask"]
-    return batch
-# only use 32 training examples for notebook - DELETE LINE FOR FULL TRAINING
-# train_data = train_dataset.select(range(200))
-
-train_data_batch = train_dataset.map(
-    process_data_to_model_inputs, 
-    batched=True, 
-    batch_size=batch_size, 
-
-    remove_columns=train_dataset.column_names,
-)
-
-train_data_batch.set_format(
-    type="torch", columns=["input_ids", "attention_mask", "decoder_input_ids", "decoder_attention_mask", "labels"],
-)
-
-val_data_batch = val_dataset.map(
-    process_data_to_model_inputs, 
-    batched=True, 
-    batch_size=batch_size, 
-    remove_columns=val_dataset.column_names,
-)
-val_data_batch.set_format(
-    type="torch", columns=["input_ids", "attention_mask", "decoder_input_ids", "decoder_attention_mask", "labels"],
-)
-
-
-# Data Collator
-data_collator = DataCollatorForSeq2Seq(
-    tokenizer=tokenizer,
-    model=model
-)
+    tokenized.save_to_disk(cache_path)
+    print(f"[data] Tokenized {split_name} ({len(tokenized)} samples) in {time.perf_counter() - t0:.1f}s -> {cache_path}")
+    return tokenized
+
+
+def prepare(args, tokenizer=None):
+    """Bước 1: tokenize cả ba split (hoặc đọc lại từ cache)."""
+    tokenizer = tokenizer or AutoTokenizer.from_pretrained(args.model_name)
+    splits = load_splits(args)
+    for name, ds in splits.items():
+        print(f"{name} size: {len(ds)}")
+    return {name: tokenize_split(ds, name, tokenizer, args) for name, ds in splits.items()}
+
+
+# Tên các lần chạy trong báo cáo thời gian: pipeline cũ (pad tới max_length, không gom theo độ dài)
+# và pipeline hiện tại (pad động + group_by_length)
+BASELINE_RUN = "max_length_padding"
+OPTIMIZED_RUN = "dynamic_padding_grouped"
+
+
+def run_name(args):
+    padding = "max_length" if args.pad_to_max_length else "dynamic"
+    return f"{padding}_padding" + ("" if args.no_group_by_length else "_grouped")
+
+
+# Thời gian mỗi epoch, để so sánh trước / sau khi đổi pipeline dữ liệu.
+# Mỗi cấu hình pipeline ghi vào một mục riêng của báo cáo nên chạy cả hai để có speedup:
+#   finetune_vit.py train --pad_to_max_length --no_group_by_length   (baseline)
+#   finetune_vit.py train                                             (pipeline hiện tại)
+class EpochTimer(TrainerCallback):
+    def __init__(self, run, path=EPOCH_TIMES_PATH):
+        self.run = run
+        self.path = path
+        self.times = []
+        self._start = None
+
+    def on_epoch_begin(self, args, state, control, **kwargs):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, args, state, control, **kwargs):
+        elapsed = time.perf_counter() - self._start
+        self.times.append(round(elapsed, 1))
+        print(f"[timing] Epoch {len(self.times)}: {elapsed:.1f}s")
+        report = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        runs = report.get("runs", {})
+        runs[self.run] = {
+            "epoch_seconds": self.times,
+            "mean_epoch_s": round(float(np.mean(self.times)), 1),
+            "group_by_length": args.group_by_length,
+        }
+        report = {"runs": runs}
+        if BASELINE_RUN in runs and OPTIMIZED_RUN in runs:
+            report["speedup"] = round(runs[BASELINE_RUN]["mean_epoch_s"] / runs[OPTIMIZED_RUN]["mean_epoch_s"], 2)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+def count_parameters(model):
+    trainable = sum(p.numel() for p in model.parameters() if p.requires_grad)
+    total = sum(p.numel() for p in model.parameters())
+    return trainable, total
+
+
+def peak_memory_mb():
+    if torch.cuda.is_available():
+        return torch.cuda.max_memory_allocated() / 2 ** 20
+    # ru_maxrss tính theo KB trên Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# Chi phí train (số tham số train được, thời gian mỗi step, bộ nhớ đỉnh) để so LoRA với full fine-tune
+class TrainingCostReport(TrainerCallback):
+    def __init__(self, mode):
+        self.path = TRAINING_COST_PATH.format(mode=mode)
+        self.mode = mode
+        self.step_times = []
+        self._start = None
+
+    def on_step_begin(self, args, state, control, **kwargs):
+        self._start = time.perf_counter()
+
+    def on_step_end(self, args, state, control, **kwargs):
+        self.step_times.append(time.perf_counter() - self._start)
+
+    def on_train_end(self, args, state, control, model=None, **kwargs):
+        trainable, total = count_parameters(model)
+        # Bỏ step đầu (khởi tạo optimizer, warm-up kernel)
+        times = self.step_times[1:] or self.step_times
+        report = {
+            "mode": self.mode,
+            "trainable_params": trainable,
+            "total_params": total,
+            "trainable_pct": round(100 * trainable / total, 3),
+            "steps": len(self.step_times),
+            "step_time_mean_s": round(float(np.mean(times)), 3) if times else None,
+            "peak_memory_mb": round(peak_memory_mb(), 1),
+            "device": device,
+        }
+        print(f"[cost] {report}")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
 
 
 # Compute Metrics
-# load rouge for validation
-rouge = evaluate.load("rouge")
-
-def _to_int_ids(arr):
-    if isinstance(arr, tuple): arr = arr[0]
-    if isinstance(arr, np.ndarray): arr = arr.tolist()
-    cleaned = []
-    for seq in arr:
-        cleaned.append([int(t) for t in seq])
-    return cleaned
-
 def token_accuracy(pred_ids, label_ids, pad_id=-100):
     correct, total = 0, 0
     for p, l in zip(pred_ids, label_ids):
         for pp, ll in zip(p, l):
-            if ll == pad_id: 
+            if ll == pad_id:
                 continue
             total += 1
             if pp == ll:
@@ -221,16 +307,15 @@ def token_accuracy(pred_ids, label_ids, pad_id=-100):
     return correct / total if total > 0 else 0.0
 
 def _ensure_2d(arr):
-    import numpy as _np
     if isinstance(arr, tuple):
         arr = arr[0]
-    if hasattr(arr, "cpu"): 
+    if hasattr(arr, "cpu"):
         arr = arr.cpu().numpy()
-    arr = _np.asarray(arr, dtype=object)
+    arr = np.asarray(arr, dtype=object)
 
     if arr.ndim == 3:
         arr = arr[:, 0, :]
-  
+
     return arr.tolist()
 
 def sanitize_token_ids(arr, *, pad_id: int, vocab_size: int, replace_neg_with_pad: bool):
@@ -260,180 +345,272 @@ def sanitize_token_ids(arr, *, pad_id: int, vocab_size: int, replace_neg_with_pa
         cleaned.append(row)
     return cleaned
 
-def compute_metrics(eval_preds):
-    preds_raw, labels_raw = eval_preds
-
-    pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else 0
-    vocab_size = getattr(tokenizer, "vocab_size", None)
-    if vocab_size is None:
-        vocab_size = 32128
-
-    pred_ids  = _ensure_2d(preds_raw)
-    label_ids = _ensure_2d(labels_raw)
-
-    pred_ids  = sanitize_token_ids(pred_ids,  pad_id=pad_id, vocab_size=vocab_size, replace_neg_with_pad=False)
-    label_ids = sanitize_token_ids(label_ids, pad_id=pad_id, vocab_size=vocab_size, replace_neg_with_pad=True)
-
-    preds_txt = tokenizer.batch_decode(pred_ids,  skip_special_tokens=True)
-    refs_txt  = tokenizer.batch_decode(label_ids, skip_special_tokens=True)
-
-    # ROUGE-2 (F1)
-    out = rouge.compute(predictions=preds_txt, references=refs_txt, rouge_types=["rouge2"])
-    r2 = out["rouge2"]
-    if isinstance(r2, (float, np.floating)):
-        r2_f1 = float(r2)
-    elif isinstance(r2, dict) and "fmeasure" in r2:
-        r2_f1 = float(r2["fmeasure"])
-    else:
-        r2_f1 = float(np.mean(out["rouge2"])) if isinstance(out["rouge2"], list) else 0.0
-
-    correct, total = 0, 0
-    for p, l in zip(pred_ids, label_ids):
-        for pp, ll in zip(p, l):
-            if ll == pad_id: 
-                continue
-            total += 1
-            if pp == ll:
-                correct += 1
-    acc = correct / total if total > 0 else 0.0
-
-    return {
-        "rouge2_f1": round(r2_f1, 4),
-        "val_acc": round(acc, 4),  
-    }
-
-
-# # Training
-# training_args = Seq2SeqTrainingArguments(
-#     output_dir=OUTPUT_DIR,
-#     overwrite_output_dir=True,
-#     eval_strategy="epoch",   # "no" | "steps" | "epoch"
-#     save_strategy="epoch",
-#     logging_strategy="epoch",
-#     # eval_steps=eval_steps,
-#     # logging_steps=logging_steps,
-#     # save_steps=save_steps,
-#     save_total_limit=3,
-#     num_train_epochs=num_train_epochs,
-#     per_device_train_batch_size=batch_size,   
-#     per_device_eval_batch_size=batch_size,
-#     gradient_accumulation_steps=8,   
-#     learning_rate=learning_rate,
-#     weight_decay=weight_decay,
-#     warmup_ratio=0.1,
-#     lr_scheduler_type="linear",
-#     predict_with_generate=True,
-#     generation_max_length=MAX_TARGET_LEN,
-#     fp16=torch.cuda.is_available(),
-#     report_to=[]  # set to ["wandb"] if you use Weights & Biases
-# )
-
-# # -----------------------
-# # Trainer
-# # -----------------------
-# trainer = Seq2SeqTrainer(
-#     model=model,
-#     args=training_args,
-#     train_dataset=train_data_batch,
-#     eval_dataset=val_data_batch,
-#     tokenizer=tokenizer,
-#     data_collator=data_collator,
-#     compute_metrics=compute_metrics
-# )
-# trainer.train()
-
-
-training_args = Seq2SeqTrainingArguments(
-
-    # Core parameters
-    output_dir= OUTPUT_DIR,
-    per_device_train_batch_size=batch_size,
-    per_device_eval_batch_size=batch_size,
-    predict_with_generate=True,
-    # evaluate_during_training=True,
-    do_train=True,
-    eval_strategy="epoch",      
-    save_strategy="epoch",     
-    eval_on_start=True,         
-    do_eval=True,   
-    learning_rate=learning_rate,
-    generation_max_length=MAX_TARGET_LEN,   
-
-    # Regularzation & Optimization
-    gradient_accumulation_steps=8,
-    lr_scheduler_type="linear",
-    # warmup_ratio=0.1,
-    # warmup_steps=warmup_steps,
-    weight_decay=weight_decay,
-
-    # Logging & saving
-    logging_strategy="steps",
-    logging_steps=logging_steps,
-
-    save_total_limit=5,
-    load_best_model_at_end=True,
-    metric_for_best_model="eval_loss",
-    greater_is_better=False,
-
-    warmup_steps=3000,  
-    num_train_epochs=num_train_epochs, 
-    overwrite_output_dir=True,
-    fp16=True, 
-
-    # eval_strategy="steps",        # "no" | "steps" | "epoch"
-    # eval_steps=eval_steps,
-    # logging_strategy="steps",
-    # logging_steps=logging_steps,
-    # save_strategy="steps",
-    # save_steps=save_steps,
-    
-)
-
-# instantiate trainer
-trainer = Seq2SeqTrainer(
-    model=model,
-    args=training_args,
-    compute_metrics=compute_metrics,
-    train_dataset=train_data_batch,
-    eval_dataset=val_data_batch,
-)
-trainer.train()
+def make_compute_metrics(tokenizer):
+    # load rouge for validation
+    rouge = evaluate.load("rouge")
+
+    def compute_metrics(eval_preds):
+        preds_raw, labels_raw = eval_preds
+
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else 0
+        vocab_size = getattr(tokenizer, "vocab_size", None)
+        if vocab_size is None:
+            vocab_size = 32128
+
+        pred_ids  = _ensure_2d(preds_raw)
+        label_ids = _ensure_2d(labels_raw)
+
+        pred_ids  = sanitize_token_ids(pred_ids,  pad_id=pad_id, vocab_size=vocab_size, replace_neg_with_pad=False)
+        label_ids = sanitize_token_ids(label_ids, pad_id=pad_id, vocab_size=vocab_size, replace_neg_with_pad=True)
+
+        preds_txt = tokenizer.batch_decode(pred_ids,  skip_special_tokens=True)
+        refs_txt  = tokenizer.batch_decode(label_ids, skip_special_tokens=True)
+
+        # ROUGE-2 (F1)
+        out = rouge.compute(predictions=preds_txt, references=refs_txt, rouge_types=["rouge2"])
+        r2 = out["rouge2"]
+        if isinstance(r2, (float, np.floating)):
+            r2_f1 = float(r2)
+        elif isinstance(r2, dict) and "fmeasure" in r2:
+            r2_f1 = float(r2["fmeasure"])
+        else:
+            r2_f1 = float(np.mean(out["rouge2"])) if isinstance(out["rouge2"], list) else 0.0
+
+        acc = token_accuracy(pred_ids, label_ids, pad_id=pad_id)
+
+        return {
+            "rouge2_f1": round(r2_f1, 4),
+            "val_acc": round(acc, 4),
+        }
+
+    return compute_metrics
+
+
+def build_trainer(args, model, tokenizer, train_dataset=None, eval_dataset=None, callbacks=None):
+    # Smoke mode đánh giá / lưu theo step để vòng train vài step vẫn chạy qua early stopping
+    strategy = "steps" if args.smoke else "epoch"
+    training_args = Seq2SeqTrainingArguments(
+
+        # Core parameters
+        output_dir=args.output_dir,
+        per_device_train_batch_size=args.batch_size,
+        per_device_eval_batch_size=args.batch_size,
+        predict_with_generate=True,
+        do_train=True,
+        eval_strategy=strategy,
+        save_strategy=strategy,
+        eval_steps=args.eval_steps,
+        save_steps=args.eval_steps,
+        do_eval=True,
+        learning_rate=args.learning_rate,
+        generation_max_length=args.max_target_len,
+
+        # Regularzation & Optimization
+        gradient_accumulation_steps=args.grad_accum,
+        lr_scheduler_type="linear",
+        # Gom các mẫu có độ dài gần nhau vào cùng batch để giảm padding
+        group_by_length=not args.no_group_by_length,
+        weight_decay=weight_decay,
+        warmup_steps=args.warmup_steps,
+        num_train_epochs=args.epochs,
+        max_steps=args.max_steps,
+
+        # Logging & saving
+        logging_strategy="steps",
+        logging_steps=args.logging_steps,
+
+        save_total_limit=5,
+        # Early stopping theo ROUGE-2 trên tập validation
+        load_best_model_at_end=True,
+        metric_for_best_model="rouge2_f1",
+        greater_is_better=True,
+
+        fp16=torch.cuda.is_available(),
+        use_cpu=args.smoke and not torch.cuda.is_available(),
+        seed=SEED,
+        report_to=[],
+    )
 
+    return Seq2SeqTrainer(
+        model=model,
+        args=training_args,
+        compute_metrics=make_compute_metrics(tokenizer),
+        train_dataset=train_dataset,
+        eval_dataset=eval_dataset,
+        data_collator=DataCollatorForSeq2Seq(tokenizer=tokenizer, model=model),
+        callbacks=callbacks,
+    )
 
-# Save the model
-trainer.save_model(OUTPUT_DIR)
-tokenizer.save_pretrained(OUTPUT_DIR) 
-from transformers import GenerationConfig
-model.generation_config.save_pretrained(OUTPUT_DIR)
 
-# Evaluate on the test set
-test_data_batch = test_dataset.map(
-    process_data_to_model_inputs,
-    batched=True, batch_size=batch_size,
-    remove_columns=test_dataset.column_names,
-)
-test_data_batch.set_format(
-    type="torch",
-    columns=["input_ids", "attention_mask", "decoder_input_ids", "decoder_attention_mask", "labels"],
-)
-
-test_metrics = trainer.evaluate(eval_dataset=test_data_batch, max_length=MAX_TARGET_LEN, num_beams=1)
-print("\n[TEST METRICS]")
-print(test_metrics)
-
-# Example inference
-def generate_summary(text):
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding="max_length", max_length=encoder_max_length).to(device)
-    outputs = model.generate(
-        input_ids=inputs["input_ids"], 
-        attention_mask=inputs["attention_mask"], 
-        max_length=decoder_max_length, 
-        num_beams=4, 
-        early_stopping=True
+def apply_lora(model, args):
+    """Đóng băng model gốc, chỉ train các adapter LoRA."""
+    lora_config = LoraConfig(
+        task_type=TaskType.SEQ_2_SEQ_LM,
+        r=args.lora_r,
+        lora_alpha=args.lora_alpha,
+        lora_dropout=lora_dropout,
+        target_modules=lora_target_modules,
     )
-    summary = tokenizer.decode(outputs[0], skip_special_tokens=True)
-    return summary
-
-text = "Hôm nay, trời đẹp và nắng ấm. Chúng ta sẽ đi dạo trong công viên và tận hưởng không khí trong lành."
-summary = generate_summary(text)
-print("Summary:", summary)
\ No newline at end of file
+    model = get_peft_model(model, lora_config)
+    model.print_trainable_parameters()
+    return model
+
+
+def load_trained_model(path):
+    """Model sau train: checkpoint đầy đủ, hoặc model gốc + adapter LoRA đã merge."""
+    if os.path.isfile(os.path.join(path, "adapter_config.json")):
+        if PeftModel is None:
+            raise SystemExit("Thư mục chứa adapter LoRA, cần cài peft: pip install peft")
+        with open(os.path.join(path, "adapter_config.json"), "r", encoding="utf-8") as f:
+            base_name = json.load(f)["base_model_name_or_path"]
+        base = AutoModelForSeq2SeqLM.from_pretrained(base_name)
+        return PeftModel.from_pretrained(base, path).merge_and_unload().to(device)
+    return AutoModelForSeq2SeqLM.from_pretrained(path).to(device)
+
+
+def train(args):
+    """Bước 2: train, tiếp tục từ checkpoint mới nhất trong output_dir nếu có."""
+    tokenizer = AutoTokenizer.from_pretrained(args.model_name)
+    data = prepare(args, tokenizer)
+    model = AutoModelForSeq2SeqLM.from_pretrained(args.model_name).to(device)
+    if args.lora:
+        model = apply_lora(model, args)
+
+    last_checkpoint = None
+    if os.path.isdir(args.output_dir) and not args.no_resume:
+        last_checkpoint = get_last_checkpoint(args.output_dir)
+    if last_checkpoint:
+        print(f"[train] Resuming from {last_checkpoint}")
+
+    trainer = build_trainer(
+        args, model, tokenizer, data["train"], data["val"],
+        callbacks=[
+            EpochTimer(run_name(args)),
+            EarlyStoppingCallback(early_stopping_patience=args.patience),
+            TrainingCostReport("lora" if args.lora else "full"),
+        ],
+    )
+    trainer.train(resume_from_checkpoint=last_checkpoint)
+
+    # Save the model (model tốt nhất theo ROUGE-2 nhờ load_best_model_at_end).
+    # Với LoRA chỉ lưu adapter (vài MB), không lưu lại model gốc.
+    trainer.save_model(args.output_dir)
+    tokenizer.save_pretrained(args.output_dir)
+    trainer.model.generation_config.save_pretrained(args.output_dir)
+    print("Saved model ->", args.output_dir)
+
+
+def evaluate_model(args):
+    """Bước 3: đánh giá model đã train trên tập test."""
+    tokenizer = AutoTokenizer.from_pretrained(args.output_dir)
+    data = prepare(args, tokenizer)
+    model = load_trained_model(args.output_dir)
+    trainer = build_trainer(args, model, tokenizer)
+
+    test_metrics = trainer.evaluate(eval_dataset=data["test"], max_length=args.max_target_len, num_beams=1)
+    print("\n[TEST METRICS]")
+    print(test_metrics)
+
+    metrics_path = os.path.join(args.output_dir, "test_metrics.json") if args.smoke else TEST_METRICS_PATH
+    os.makedirs(os.path.dirname(metrics_path), exist_ok=True)
+    with open(metrics_path, "w", encoding="utf-8") as f:
+        json.dump(test_metrics, f, indent=2)
+    return test_metrics
+
+
+def export(args):
+    """Bước 4: copy model + tokenizer + generation config sang thư mục infer.py đọc."""
+    if args.lora:
+        if PeftModel is None:
+            raise SystemExit("Chế độ --lora cần cài peft: pip install peft")
+        # Chỉ copy adapter, model gốc trong EXPORT_DIR giữ nguyên
+        base = AutoModelForSeq2SeqLM.from_pretrained(args.model_name)
+        PeftModel.from_pretrained(base, args.output_dir).save_pretrained(args.adapter_dir)
+        print("Exported LoRA adapter ->", args.adapter_dir)
+        return
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(args.output_dir)
+    tokenizer = AutoTokenizer.from_pretrained(args.output_dir)
+    model.save_pretrained(args.export_dir)
+    tokenizer.save_pretrained(args.export_dir)
+    model.generation_config.save_pretrained(args.export_dir)
+    print("Exported model ->", args.export_dir)
+
+
+STAGES = {
+    "prepare": prepare,
+    "train": train,
+    "evaluate": evaluate_model,
+    "export": export,
+}
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Fine-tune ViT5 cho tóm tắt tin tức")
+    p.add_argument("stage", choices=list(STAGES))
+    p.add_argument("--model_name", default=MODEL_NAME)
+    p.add_argument("--data", default=DATA_PATH)
+    p.add_argument("--output_dir", default=OUTPUT_DIR, help="Thư mục checkpoint và model sau train")
+    p.add_argument("--export_dir", default=EXPORT_DIR)
+    p.add_argument("--adapter_dir", default=ADAPTER_DIR)
+    p.add_argument("--max_samples", type=int, default=None)
+    p.add_argument("--max_source_len", type=int, default=MAX_SOURCE_LEN)
+    p.add_argument("--max_target_len", type=int, default=MAX_TARGET_LEN)
+    p.add_argument("--batch_size", type=int, default=batch_size)
+    p.add_argument("--grad_accum", type=int, default=8)
+    p.add_argument("--learning_rate", type=float, default=None)
+    p.add_argument("--epochs", type=float, default=num_train_epochs)
+    p.add_argument("--max_steps", type=int, default=-1)
+    p.add_argument("--warmup_steps", type=int, default=3000)
+    p.add_argument("--logging_steps", type=int, default=logging_steps)
+    p.add_argument("--eval_steps", type=int, default=eval_steps)
+    p.add_argument("--patience", type=int, default=early_stopping_patience)
+    p.add_argument("--no_resume", action="store_true", help="Train lại từ đầu, bỏ qua checkpoint cũ")
+    p.add_argument("--pad_to_max_length", action="store_true",
+                   help="Baseline đo thời gian: pad đầu vào tới max_source_len và tóm tắt tới max_target_len thay vì pad động")
+    p.add_argument("--no_group_by_length", action="store_true",
+                   help="Baseline đo thời gian: không gom các mẫu có độ dài gần nhau")
+    p.add_argument("--lora", action="store_true",
+                   help="Chỉ train adapter LoRA trên model gốc (mặc định là model infer.py đang dùng)")
+    p.add_argument("--lora_r", type=int, default=lora_r)
+    p.add_argument("--lora_alpha", type=int, default=lora_alpha)
+    p.add_argument("--smoke", action="store_true",
+                   help="Chạy thử nhanh trên model tí hon với vài chục mẫu (chạy được trên CPU)")
+    args = p.parse_args(argv)
+
+    if args.smoke:
+        if args.model_name == MODEL_NAME:
+            args.model_name = SMOKE_MODEL_NAME
+        if args.output_dir == OUTPUT_DIR:
+            args.output_dir = os.path.join("results", "models", "Text_summarization",
+                                           "smoke_lora" if args.lora else "smoke")
+        if args.export_dir == EXPORT_DIR:
+            args.export_dir = os.path.join(args.output_dir, "export")
+        if args.adapter_dir == ADAPTER_DIR:
+            args.adapter_dir = os.path.join(args.output_dir, "adapter")
+        args.max_samples = args.max_samples or 40
+        args.max_source_len, args.max_target_len = 64, 16
+        args.batch_size, args.grad_accum = 4, 1
+        args.max_steps = 6 if args.max_steps < 0 else args.max_steps
+        args.warmup_steps, args.logging_steps, args.eval_steps = 0, 1, 2
+
+    if args.lora:
+        if get_peft_model is None:
+            raise SystemExit("Chế độ --lora cần cài peft: pip install peft")
+        # Adapter phải train trên đúng model mà infer.py sẽ merge vào
+        if args.model_name == MODEL_NAME and os.path.isdir(EXPORT_DIR):
+            args.model_name = EXPORT_DIR
+        if args.output_dir == OUTPUT_DIR:
+            args.output_dir = OUTPUT_DIR.rstrip("/") + "_lora/"
+    if args.learning_rate is None:
+        args.learning_rate = lora_learning_rate if args.lora else learning_rate
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    STAGES[args.stage](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,30 +2,134 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import copy
 import json
 import os
 import sys
-from typing import Optional
+from typing import List, Optional
 
 import torch
 from transformers import (
     AutoTokenizer,
     AutoModelForSeq2SeqLM,
 )
+from transformers.modeling_outputs import BaseModelOutput
+
+SRC_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from models.Text_summarization.extractive import split_sentences, content_sentences, preselect as preselect_sentences
+from models.Text_summarization.encoder_cache import EncoderCache
+from models.Text_summarization.batching import generate_batched
 
 OUTPUT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__),
                                          "vit5_finetuned"))
+# Model nháp nhỏ dùng chung tokenizer ViT5 cho assisted decoding (xem select_draft.py)
+DRAFT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                        "vit5_draft"))
+# Adapter LoRA (finetune_vit.py --lora export), merge vào model chính khi load
+ADAPTER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                          "vit5_adapter"))
 
 DEVICE = "cuda" if torch.cuda.is_available() else ("mps" if torch.backends.mps.is_available() else "cpu")
 
+ENCODER_CACHE_MAX_MB = 256
+ENCODER_CACHE_TTL_S = 600
+# Số vòng reduce tối đa của summarize_long
+MAX_REDUCE_DEPTH = 4
+
+def merge_adapter(base, path: str = ADAPTER_DIR):
+    """
+    Merge adapter LoRA vào trọng số model gốc để suy luận không tốn thêm chi phí.
+    Không có adapter (hoặc chưa cài peft) thì trả về model gốc.
+    """
+    if not os.path.isfile(os.path.join(path, "adapter_config.json")):
+        return base
+    try:
+        from peft import PeftModel
+    except ImportError:
+        print(f"[startup] Found LoRA adapter at {path} but peft is not installed, skipping", file=sys.stderr)
+        return base
+    merged = PeftModel.from_pretrained(base, path).merge_and_unload()
+    print(f"[startup] Merged LoRA adapter from {path}")
+    return merged
+
 try:
     tokenizer = AutoTokenizer.from_pretrained(OUTPUT_DIR, use_fast=True)
-    model = AutoModelForSeq2SeqLM.from_pretrained(OUTPUT_DIR).to(DEVICE)
+    model = merge_adapter(AutoModelForSeq2SeqLM.from_pretrained(OUTPUT_DIR)).to(DEVICE)
     model.eval()
 except Exception as e:
     print(f"[startup] Failed to load model/tokenizer from {OUTPUT_DIR}: {e}", file=sys.stderr)
     raise
 
+# Các biến thể model dùng chung tokenizer ViT5: "default", "quantized" (int8 động, chỉ trên CPU)
+# và các model nhỏ hơn đăng ký qua register_model
+_model_registry = {"default": model}
+
+def register_model(name: str, path: str):
+    """
+    Đăng ký một checkpoint seq2seq dùng chung tokenizer với model chính.
+    """
+    m = AutoModelForSeq2SeqLM.from_pretrained(path).to(DEVICE)
+    m.eval()
+    _model_registry[name] = m
+    return m
+
+def available_variants() -> List[str]:
+    variants = list(_model_registry)
+    if DEVICE == "cpu" and "quantized" not in variants:
+        variants.append("quantized")
+    return variants
+
+def get_model(variant: str = "default"):
+    """
+    Trả về model theo tên biến thể, tạo bản lượng tử hóa int8 khi cần lần đầu.
+    """
+    if variant not in _model_registry:
+        if variant == "quantized" and DEVICE == "cpu":
+            _model_registry[variant] = torch.quantization.quantize_dynamic(
+                copy.deepcopy(model), {torch.nn.Linear}, dtype=torch.qint8
+            )
+        else:
+            raise KeyError(f"Unknown model variant '{variant}'")
+    return _model_registry[variant]
+
+_draft_model = None
+_draft_loaded = False
+
+def load_draft_model(path: str = DRAFT_DIR):
+    """
+    Load model nháp cho assisted decoding (một lần), trả về None nếu chưa có.
+    """
+    global _draft_model, _draft_loaded
+    if not _draft_loaded:
+        _draft_loaded = True
+        if os.path.isdir(path):
+            _draft_model = AutoModelForSeq2SeqLM.from_pretrained(path).to(DEVICE)
+            _draft_model.eval()
+        else:
+            print(f"[assisted] Draft model not found at {path}, using normal decoding", file=sys.stderr)
+    return _draft_model
+
+encoder_cache = EncoderCache(max_bytes=ENCODER_CACHE_MAX_MB * 2 ** 20, ttl_s=ENCODER_CACHE_TTL_S)
+
+def encode_cached(m, model_variant: str, enc) -> BaseModelOutput:
+    """
+    Chạy encoder hoặc lấy hidden state đã có trong cache cho cùng input_ids.
+    Luôn trả về BaseModelOutput mới vì generate() mở rộng encoder_outputs tại chỗ khi dùng beam.
+    """
+    key = EncoderCache.make_key(model_variant, enc["input_ids"])
+    hidden = encoder_cache.get(key)
+    if hidden is None:
+        hidden = m.get_encoder()(
+            input_ids=enc["input_ids"],
+            attention_mask=enc["attention_mask"],
+            return_dict=True,
+        ).last_hidden_state
+        encoder_cache.put(key, hidden)
+    return BaseModelOutput(last_hidden_state=hidden)
+
 @torch.inference_mode()
 def summarize_one(
     text: str,
@@ -35,33 +139,177 @@ def summarize_one(
     no_repeat_ngram_size: int = 3,
     do_sample: bool = False,
     temperature: float = 1.0,
+    preselect: bool = False,
+    preselect_len: int = 256,
+    model_variant: str = "default",
+    max_time: Optional[float] = None,
+    assisted: bool = False,
+    use_encoder_cache: bool = True,
 ) -> str:
     """
     Tóm tắt 1 văn bản, trả về chuỗi summary.
+    preselect: chỉ giữ các câu trung tâm nhất (TF-IDF) tối đa preselect_len token
+    trước khi đưa vào encoder.
+    model_variant: biến thể model (xem available_variants).
+    max_time: giới hạn thời gian sinh (giây), dừng sớm khi hết.
+    assisted: model nháp đề xuất nhiều token, model chính kiểm tra trong một lần forward
+    (chỉ áp dụng cho greedy/sampling, num_beams=1).
+    use_encoder_cache: False để luôn chạy encoder (đo latency, benchmark).
     """
     if text is None:
         text = ""
+    if preselect:
+        text = preselect_sentences(text, min(preselect_len, in_max_len - 1), token_lengths)
+    # Không pad tới in_max_len: encoder chỉ chạy trên số token thực tế
     enc = tokenizer(
         text,
         return_tensors="pt",
         truncation=True,
-        padding="max_length",
         max_length=in_max_len,
     ).to(DEVICE)
 
-    gen_ids = model.generate(
+    m = get_model(model_variant)
+    draft = load_draft_model() if assisted and num_beams == 1 else None
+    # Bỏ qua encoder khi cùng văn bản được tóm tắt lại với tham số giải mã khác
+    # (không truyền encoder_outputs=None: generate() sẽ coi như encoder đã chạy)
+    cached = {"encoder_outputs": encode_cached(m, model_variant, enc)} if use_encoder_cache else {}
+    gen_ids = m.generate(
         input_ids=enc["input_ids"],
-        attention_mask=enc.get("attention_mask", None),
+        attention_mask=enc["attention_mask"],
+        **cached,
         max_length=out_max_len,
         num_beams=num_beams,
         no_repeat_ngram_size=no_repeat_ngram_size,
         early_stopping=True,
         do_sample=do_sample,
         temperature=temperature,
+        max_time=max_time,
+        assistant_model=draft,
     )
     summary = tokenizer.decode(gen_ids[0], skip_special_tokens=True)
     return summary
 
+@torch.inference_mode()
+def draft_acceptance(text: str, draft, in_max_len: int = 512, out_max_len: int = 128) -> dict:
+    """
+    Tỉ lệ token model nháp đoán trùng với model chính: sinh greedy bằng model chính,
+    rồi cho model nháp dự đoán từng token tiếp theo trên cùng tiền tố (một lần forward).
+    """
+    enc = tokenizer(text, return_tensors="pt", truncation=True, max_length=in_max_len).to(DEVICE)
+    target = model.generate(**enc, max_length=out_max_len, num_beams=1, do_sample=False)
+    logits = draft(
+        input_ids=enc["input_ids"],
+        attention_mask=enc["attention_mask"],
+        decoder_input_ids=target[:, :-1],
+    ).logits
+    matches = (logits.argmax(-1) == target[:, 1:]).float()
+    return {"accepted": int(matches.sum().item()), "total": int(matches.numel())}
+
+def token_lengths(texts: List[str]) -> List[int]:
+    """
+    Số token (không tính token đặc biệt) của từng văn bản.
+    """
+    return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+def chunk_by_tokens(text: str, chunk_len: int) -> List[str]:
+    """
+    Gom các câu liên tiếp thành các đoạn có tổng số token <= chunk_len.
+    Câu dài hơn chunk_len đứng riêng một đoạn (sẽ bị cắt khi tokenize).
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+    lengths = token_lengths(sentences)
+
+    chunks, current, current_len = [], [], 0
+    for sent, n in zip(sentences, lengths):
+        if current and current_len + n > chunk_len:
+            chunks.append(" ".join(current))
+            current, current_len = [], 0
+        current.append(sent)
+        current_len += n
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+@torch.inference_mode()
+def summarize_batch(
+    texts: List[str],
+    in_max_len: int = 512,
+    out_max_len: int = 128,
+    num_beams: int = 4,
+    no_repeat_ngram_size: int = 3,
+    do_sample: bool = False,
+    temperature: float = 1.0,
+    batch_size: int = 8,
+    model_variant: str = "default",
+) -> List[str]:
+    """
+    Tóm tắt nhiều văn bản theo batch bằng model/tokenizer đã load (xem batching.generate_batched),
+    kết quả trả về đúng thứ tự đầu vào.
+    """
+    return generate_batched(
+        get_model(model_variant),
+        tokenizer,
+        texts,
+        in_max_len=in_max_len,
+        out_max_len=out_max_len,
+        num_beams=num_beams,
+        no_repeat_ngram_size=no_repeat_ngram_size,
+        do_sample=do_sample,
+        temperature=temperature,
+        batch_size=batch_size,
+    )
+
+def summarize_long(
+    text: str,
+    in_max_len: int = 512,
+    out_max_len: int = 128,
+    num_beams: int = 4,
+    no_repeat_ngram_size: int = 3,
+    do_sample: bool = False,
+    temperature: float = 1.0,
+    chunk_len: Optional[int] = None,
+    batch_size: int = 8,
+    preselect: bool = False,
+    assisted: bool = False,
+) -> str:
+    """
+    Tóm tắt văn bản dài theo kiểu map-reduce:
+    chia văn bản theo ranh giới câu thành các đoạn <= chunk_len token,
+    tóm tắt các đoạn theo batch (map), rồi tóm tắt phần nối các bản tóm tắt (reduce).
+    Chi phí encoder tăng tuyến tính theo độ dài văn bản thay vì bậc hai.
+    preselect: bỏ chú thích ảnh và câu rác trước khi chia đoạn.
+    assisted: dùng assisted decoding cho bước reduce cuối cùng.
+    """
+    if preselect:
+        text = "\n".join(content_sentences(text)) or text
+    gen_kwargs = dict(
+        out_max_len=out_max_len,
+        num_beams=num_beams,
+        no_repeat_ngram_size=no_repeat_ngram_size,
+        do_sample=do_sample,
+        temperature=temperature,
+    )
+    chunk_len = chunk_len or in_max_len
+    n_tokens = len(tokenizer(text, add_special_tokens=False)["input_ids"])
+    for _ in range(MAX_REDUCE_DEPTH):
+        chunks = chunk_by_tokens(text, chunk_len)
+        if len(chunks) <= 1:
+            break
+        partials = summarize_batch(chunks, in_max_len=chunk_len, batch_size=batch_size, **gen_kwargs)
+        joined = " ".join(partials)
+        joined_tokens = len(tokenizer(joined, add_special_tokens=False)["input_ids"])
+        # Bản tóm tắt không ngắn hơn đầu vào (vd. out_max_len >= chunk_len): reduce tiếp cũng vô ích
+        if joined_tokens >= n_tokens:
+            break
+        text, n_tokens = joined, joined_tokens
+        # Phần nối đã vừa ngân sách token thì tóm tắt lần cuối
+        if n_tokens <= in_max_len:
+            break
+    # Phần vượt in_max_len (nếu còn) bị cắt khi tokenize
+    return summarize_one(text, in_max_len=in_max_len, assisted=assisted, **gen_kwargs)
+
 def main():
     ap = argparse.ArgumentParser(description="Summarization inference (JSON I/O).")
     g = ap.add_mutually_exclusive_group(required=True)
@@ -73,11 +321,18 @@ def main():
     ap.add_argument("--nrng", type=int, default=3, help="no_repeat_ngram_size")
     ap.add_argument("--sample", action="store_true", help="Bật sampling (mặc định tắt)")
     ap.add_argument("--temp", type=float, default=1.0, help="temperature khi sampling")
+    ap.add_argument("--long", action="store_true", help="Tóm tắt văn bản dài theo kiểu map-reduce")
+    ap.add_argument("--preselect", action="store_true", help="Lọc trước các câu trung tâm (TF-IDF) để rút ngắn đầu vào")
+    ap.add_argument("--preselect_len", type=int, default=256, help="Ngân sách token cho bước lọc câu (không dùng với --long)")
+    ap.add_argument("--assisted", action="store_true", help="Assisted decoding với model nháp (cần --beams 1)")
 
     args = ap.parse_args()
+    summarize_fn = summarize_long if args.long else summarize_one
+    # --preselect_len chỉ áp dụng cho summarize_one; với --long, --preselect chỉ bỏ chú thích ảnh và câu rác
+    extra = {} if args.long else {"preselect_len": args.preselect_len}
 
     if args.text:
-        s = summarize_one(
+        s = summarize_fn(
             args.text,
             in_max_len=args.in_max_len,
             out_max_len=args.out_max_len,
@@ -85,6 +340,9 @@ def main():
             no_repeat_ngram_size=args.nrng,
             do_sample=args.sample,
             temperature=args.temp,
+            preselect=args.preselect,
+            assisted=args.assisted,
+            **extra,
         )
         print(json.dumps({"text": args.text, "summary": s}, ensure_ascii=False, indent=2))
         return
@@ -95,7 +353,7 @@ def main():
             line = input("\nNhập văn bản: ").strip()
             if not line:
                 continue
-            s = summarize_one(
+            s = summarize_fn(
                 line,
                 in_max_len=args.in_max_len,
                 out_max_len=args.out_max_len,
@@ -103,6 +361,9 @@ def main():
                 no_repeat_ngram_size=args.nrng,
                 do_sample=args.sample,
                 temperature=args.temp,
+                preselect=args.preselect,
+                assisted=args.assisted,
+                **extra,
             )
             print(json.dumps({"text": line, "summary": s}, ensure_ascii=False, indent=2))
     except (KeyboardInterrupt, EOFError):
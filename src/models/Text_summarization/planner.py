@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SRC_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from models.Text_summarization import infer
+from models.Text_summarization.extractive import summarize_extractive
+
+CALIBRATION_LENGTHS = (64, 256, 512)
+# Chỉ dùng một phần ngân sách cho dự đoán, phần còn lại dự phòng sai số
+SAFETY_FACTOR = 0.8
+_CALIBRATION_TEXT = (
+    "Theo báo cáo mới công bố, tốc độ tăng trưởng kinh tế trong quý vừa qua đạt mức cao "
+    "nhờ xuất khẩu và đầu tư công phục hồi mạnh, trong khi lạm phát vẫn được kiểm soát. "
+)
+
+
+@dataclass
+class GenerationPlan:
+    """Một mức sinh: model, số beam và độ dài đầu ra. model_variant=None là tóm tắt trích xuất."""
+    name: str
+    model_variant: Optional[str]
+    num_beams: int
+    out_max_len: int
+
+
+# Xếp từ chất lượng cao nhất tới nhanh nhất.
+# "quantized" tạo thêm một bản vit5 int8 cạnh model đầy đủ nên chỉ bật khi
+# SUMMARIZATION.QUANTIZED_PLAN = true (vd. trong worker pool, không bật ở mọi web process)
+DEFAULT_PLANS = [
+    GenerationPlan("full", "default", 4, 128),
+    GenerationPlan("beam2", "default", 2, 128),
+    GenerationPlan("greedy", "default", 1, 96),
+    GenerationPlan("quantized", "quantized", 1, 96),
+    GenerationPlan("small", "small", 1, 64),
+    GenerationPlan("extractive", None, 0, 96),
+]
+
+
+class LatencyModel:
+    """Latency (ms) của từng plan xấp xỉ tuyến tính theo số token đầu vào."""
+
+    def __init__(self, coefs: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.coefs = coefs or {}
+
+    def fit(self, plan: GenerationPlan, in_tokens: List[int], latencies_ms: List[float]):
+        slope, intercept = np.polyfit(in_tokens, latencies_ms, deg=1)
+        self.coefs[plan.name] = (max(float(intercept), 0.0), max(float(slope), 0.0))
+
+    def predict(self, plan: GenerationPlan, in_tokens: int) -> float:
+        if plan.model_variant is None:
+            return 10.0
+        intercept, slope = self.coefs[plan.name]
+        return intercept + slope * in_tokens
+
+
+def _summarization_config(config_path: str = "config.json") -> Dict:
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("SUMMARIZATION", {})
+    except FileNotFoundError:
+        return {}
+
+
+def register_configured_models(config_path: str = "config.json"):
+    """Đăng ký các model nhỏ khai báo trong SUMMARIZATION.MODELS của config.json."""
+    models = _summarization_config(config_path).get("MODELS", {})
+    for name, path in models.items():
+        if os.path.isdir(path):
+            infer.register_model(name, path)
+            print(f"[planner] Registered summarization model '{name}' from {path}")
+
+
+def calibrate(plans: List[GenerationPlan], text: str = _CALIBRATION_TEXT * 40) -> LatencyModel:
+    """Đo latency của từng plan trên các độ dài đầu vào khác nhau để fit LatencyModel."""
+    latency_model = LatencyModel()
+    ids = infer.tokenizer(text, add_special_tokens=False)["input_ids"]
+    samples = [infer.tokenizer.decode(ids[:n]) for n in CALIBRATION_LENGTHS]
+
+    for plan in plans:
+        if plan.model_variant is None:
+            continue
+        # Chạy nóng một lần (bản lượng tử hóa được tạo ở đây)
+        infer.summarize_one(samples[0], num_beams=plan.num_beams, out_max_len=plan.out_max_len,
+                            model_variant=plan.model_variant, use_encoder_cache=False)
+        in_tokens, latencies = [], []
+        for sample, n in zip(samples, CALIBRATION_LENGTHS):
+            t0 = time.perf_counter()
+            # Không dùng cache encoder: latency đo được phải gồm cả thời gian encoder
+            infer.summarize_one(sample, num_beams=plan.num_beams, out_max_len=plan.out_max_len,
+                                model_variant=plan.model_variant, use_encoder_cache=False)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            in_tokens.append(n)
+        latency_model.fit(plan, in_tokens, latencies)
+        print(f"[planner] {plan.name}: " + ", ".join(
+            f"{n} tok -> {lat:.0f}ms" for n, lat in zip(in_tokens, latencies)))
+    return latency_model
+
+
+class DeadlinePlanner:
+    """Chọn plan chất lượng cao nhất mà latency dự đoán nằm trong ngân sách."""
+
+    def __init__(self, plans: List[GenerationPlan], latency_model: LatencyModel):
+        self.plans = plans
+        self.latency_model = latency_model
+
+    def choose(self, deadline_ms: float, in_tokens: int) -> Tuple[GenerationPlan, float]:
+        for plan in self.plans:
+            predicted = self.latency_model.predict(plan, in_tokens)
+            if predicted <= deadline_ms * SAFETY_FACTOR:
+                return plan, predicted
+        fastest = self.plans[-1]
+        return fastest, self.latency_model.predict(fastest, in_tokens)
+
+    def summarize(self, text: str, deadline_ms: float, in_max_len: int = 512,
+                  no_repeat_ngram_size: int = 3, preselect: bool = False,
+                  do_sample: bool = False, temperature: float = 1.0,
+                  **_) -> Tuple[str, Dict]:
+        """
+        Tóm tắt trong ngân sách deadline_ms, trả về (summary, thông tin plan đã dùng).
+        Plan chỉ quyết định model, số beam và độ dài đầu ra; do_sample/temperature của người gọi được giữ nguyên.
+        """
+        started = time.perf_counter()
+        in_tokens = min(infer.token_lengths([text])[0], in_max_len)
+        plan, predicted = self.choose(deadline_ms, in_tokens)
+
+        if plan.model_variant is None:
+            summary = summarize_extractive(text, max_words=plan.out_max_len)
+        else:
+            remaining_s = max(deadline_ms / 1000 - (time.perf_counter() - started), 0.01)
+            summary = infer.summarize_one(
+                text,
+                in_max_len=in_max_len,
+                out_max_len=plan.out_max_len,
+                num_beams=plan.num_beams,
+                no_repeat_ngram_size=no_repeat_ngram_size,
+                do_sample=do_sample,
+                temperature=temperature,
+                preselect=preselect,
+                model_variant=plan.model_variant,
+                # Giới hạn cứng để không vượt ngân sách dù dự đoán sai
+                max_time=remaining_s,
+            )
+        info = asdict(plan)
+        info["predicted_ms"] = round(predicted, 1)
+        info["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return summary, info
+
+
+_planner = None
+
+
+def get_planner() -> DeadlinePlanner:
+    """Planner dùng chung của tiến trình, hiệu chỉnh latency ở lần gọi đầu tiên."""
+    global _planner
+    if _planner is None:
+        register_configured_models()
+        variants = infer.available_variants()
+        if not _summarization_config().get("QUANTIZED_PLAN", False):
+            variants = [v for v in variants if v != "quantized"]
+        plans = [p for p in DEFAULT_PLANS if p.model_variant is None or p.model_variant in variants]
+        _planner = DeadlinePlanner(plans, calibrate(plans))
+    return _planner
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+from typing import Dict, List
+
+from rouge_score import rouge_scorer
+
+ROUGE_TYPES = ["rouge1", "rouge2", "rougeL"]
+
+
+class VietnameseWordTokenizer:
+    """
+    Tokenizer mặc định của rouge_score bỏ mọi ký tự ngoài [a-z0-9], làm mất dấu tiếng Việt.
+    Ở đây chỉ lowercase và tách theo \\w (Unicode) nên giữ nguyên dấu.
+    """
+
+    def tokenize(self, text):
+        return re.findall(r"\w+", text.lower())
+
+
+def make_scorer(rouge_types: List[str] = ROUGE_TYPES) -> rouge_scorer.RougeScorer:
+    return rouge_scorer.RougeScorer(rouge_types, tokenizer=VietnameseWordTokenizer())
+
+
+def rouge_f1(predictions: List[str], references: List[str], rouge_types: List[str] = ROUGE_TYPES) -> Dict[str, float]:
+    """ROUGE F1 trung bình trên các cặp (dự đoán, tham chiếu), tách từ giữ dấu tiếng Việt."""
+    scorer = make_scorer(rouge_types)
+    scores = [scorer.score(ref, pred) for pred, ref in zip(predictions, references)]
+    return {k: sum(s[k].fmeasure for s in scores) / max(len(scores), 1) for k in rouge_types}
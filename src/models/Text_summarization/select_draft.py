@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import torch
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+SRC_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from models.Text_summarization import infer
+from models.Text_summarization.bench_preselect import load_samples
+
+DEFAULT_CANDIDATES = [
+    "VietAI/vit5-base-vietnews-summarization",
+    "VietAI/vit5-base",
+]
+NUM_ASSISTANT_TOKENS = 5
+RESULTS_PATH = "results/models/Text_summarization/draft_selection.json"
+
+
+def tokenizer_compatible(name: str) -> bool:
+    """Model nháp phải dùng đúng bộ từ vựng của ViT5 để model chính kiểm tra token của nó."""
+    tok = AutoTokenizer.from_pretrained(name, use_fast=True)
+    return tok.get_vocab() == infer.tokenizer.get_vocab()
+
+
+@torch.inference_mode()
+def per_token_ms(m, texts, out_max_len: int) -> float:
+    """Thời gian sinh greedy trung bình cho mỗi token đầu ra."""
+    elapsed, tokens = 0.0, 0
+    for text in texts:
+        enc = infer.tokenizer(text, return_tensors="pt", truncation=True, max_length=512).to(infer.DEVICE)
+        t0 = time.perf_counter()
+        out = m.generate(**enc, max_length=out_max_len, num_beams=1, do_sample=False)
+        elapsed += time.perf_counter() - t0
+        tokens += out.shape[1]
+    return elapsed * 1000 / max(tokens, 1)
+
+
+def expected_speedup(alpha: float, cost_ratio: float, gamma: int = NUM_ASSISTANT_TOKENS) -> float:
+    """
+    Tăng tốc kỳ vọng của speculative decoding với tỉ lệ chấp nhận alpha,
+    gamma token nháp mỗi vòng và tỉ lệ chi phí model nháp / model chính.
+    """
+    if alpha >= 1.0:
+        accepted = gamma + 1
+    else:
+        accepted = (1 - alpha ** (gamma + 1)) / (1 - alpha)
+    return accepted / (gamma * cost_ratio + 1)
+
+
+def evaluate_candidate(name: str, texts, out_max_len: int, target_ms: float) -> dict:
+    draft = AutoModelForSeq2SeqLM.from_pretrained(name).to(infer.DEVICE)
+    draft.eval()
+    accepted, total = 0, 0
+    for text in texts:
+        stats = infer.draft_acceptance(text, draft, out_max_len=out_max_len)
+        accepted += stats["accepted"]
+        total += stats["total"]
+    alpha = accepted / max(total, 1)
+    draft_ms = per_token_ms(draft, texts, out_max_len)
+    return {
+        "name": name,
+        "num_parameters": sum(p.numel() for p in draft.parameters()),
+        "acceptance_rate": round(alpha, 4),
+        "draft_ms_per_token": round(draft_ms, 2),
+        "expected_speedup": round(expected_speedup(alpha, draft_ms / target_ms), 3),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Chọn model nháp cho assisted decoding của ViT5")
+    ap.add_argument("--candidates", nargs="+", default=DEFAULT_CANDIDATES,
+                    help="Tên HF hoặc đường dẫn các model nháp (vd. model chưng cất từ distill.py)")
+    ap.add_argument("--n", type=int, default=20, help="Số bài báo dùng để đo")
+    ap.add_argument("--out_max_len", type=int, default=128)
+    ap.add_argument("--save", action="store_true", help=f"Lưu model tốt nhất vào {infer.DRAFT_DIR}")
+    args = ap.parse_args()
+
+    texts = [content for content, _ in load_samples(args.n)]
+    target_ms = per_token_ms(infer.model, texts, args.out_max_len)
+    print(f"Target model: {target_ms:.2f} ms/token")
+
+    results = []
+    for name in args.candidates:
+        if not tokenizer_compatible(name):
+            print(f"[skip] {name}: tokenizer khác ViT5")
+            continue
+        res = evaluate_candidate(name, texts, args.out_max_len, target_ms)
+        print(f"[{name}] acceptance={res['acceptance_rate']} "
+              f"draft={res['draft_ms_per_token']}ms/token speedup~{res['expected_speedup']}x")
+        results.append(res)
+
+    if not results:
+        print("Không có model nháp nào tương thích.")
+        return
+
+    best = max(results, key=lambda r: r["expected_speedup"])
+    report = {
+        "target_ms_per_token": round(target_ms, 2),
+        "candidates": results,
+        "best": best["name"],
+    }
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Best draft: {best['name']} (report -> {RESULTS_PATH})")
+
+    if args.save:
+        if best["expected_speedup"] <= 1.0:
+            print("Model nháp tốt nhất không nhanh hơn decoding thường, không lưu.")
+            return
+        AutoModelForSeq2SeqLM.from_pretrained(best["name"]).save_pretrained(infer.DRAFT_DIR)
+        infer.tokenizer.save_pretrained(infer.DRAFT_DIR)
+        print("Saved draft model ->", infer.DRAFT_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import sys
+import time
+import multiprocessing as mp
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+# Tuner và các module nó gọi được import theo gốc src/ (models., utils.) giống SummationService
+HERE = os.path.dirname(__file__)
+SRC_ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+# Text_cluster tự import các module cùng gói theo gốc repo (src.models...), không phụ thuộc cwd
+REPO_ROOT = os.path.dirname(SRC_ROOT)
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+# Backend import module này là utils.ThreadTuner, Text_cluster là src.utils.ThreadTuner:
+# dùng chung một module object để _applied_workload là trạng thái của cả tiến trình
+for _name in ("utils.ThreadTuner", "src.utils.ThreadTuner"):
+    sys.modules.setdefault(_name, sys.modules[__name__])
+
+THREAD_CONFIG_PATH = "results/models/thread_config.json"
+SWEEP_DIR = "results/models/thread_tuning"
+WORKLOADS = ("summarization", "embedding")
+
+# Workload đã đặt số luồng torch trong tiến trình này (torch.set_num_threads có hiệu lực toàn tiến trình)
+_applied_workload = None
+
+
+def load_thread_config(workload: str, path: str = THREAD_CONFIG_PATH) -> Optional[Dict[str, Any]]:
+    """Trả về cấu hình luồng đã tune cho workload, hoặc None nếu chưa tune."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get(workload)
+
+
+def pin_threads(workload: str, num_threads: int, num_interop_threads: int = 1):
+    """Đặt số luồng torch cho tiến trình này và ghi nhận workload sở hữu thiết lập đó."""
+    global _applied_workload
+    _applied_workload = workload
+
+    import torch
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(num_interop_threads)
+    except RuntimeError:
+        # Chỉ đặt được trước khi torch bắt đầu chạy song song inter-op
+        pass
+    print(f"[threads] {workload}: {num_threads} intra-op threads")
+
+
+def apply_thread_config(workload: str, path: str = THREAD_CONFIG_PATH) -> Optional[Dict[str, Any]]:
+    """
+    Đặt số luồng intra-op/inter-op của torch theo cấu hình đã tune (gọi trước khi load model).
+    Số luồng là thiết lập của cả tiến trình: khi web process chạy cả tóm tắt lẫn embedding thì
+    cấu hình được áp dụng trước giữ nguyên, cấu hình sau bị bỏ qua (có log). Worker pool tóm tắt
+    chạy ở tiến trình riêng nên luôn dùng cấu hình summarization.
+    """
+    config = load_thread_config(workload, path)
+    if config is None:
+        return None
+    if _applied_workload is not None and _applied_workload != workload:
+        print(f"[threads] Ignoring {workload} thread config: this process already uses the "
+              f"{_applied_workload} config (torch threads are per process)")
+        return None
+    pin_threads(workload, int(config["num_threads"]), int(config.get("num_interop_threads", 1)))
+    return config
+
+
+def _load_workload(workload: str):
+    """Load model trong tiến trình con, trả về hàm xử lý một batch văn bản."""
+    if workload == "summarization":
+        from models.Text_summarization import infer
+        return lambda texts: [infer.summarize_one(t) for t in texts]
+
+    from sentence_transformers import SentenceTransformer
+    from models.Text_Clustering.Text_cluster import EMBEDDING_MODEL
+    encoder = SentenceTransformer(EMBEDDING_MODEL)
+    return lambda texts: encoder.encode(texts, batch_size=len(texts), convert_to_numpy=True,
+                                        normalize_embeddings=True)
+
+
+def _bench_process(workload, num_threads, texts, batch_size, barrier, out_queue):
+    import torch
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    run = _load_workload(workload)
+    run(texts[:batch_size])  # warm-up
+
+    barrier.wait()
+    latencies = []
+    started = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        t0 = time.perf_counter()
+        run(texts[i:i + batch_size])
+        latencies.append((time.perf_counter() - t0) * 1000)
+    out_queue.put((time.perf_counter() - started, latencies))
+
+
+def bench_config(workload: str, texts: List[str], num_workers: int, num_threads: int,
+                 batch_size: int) -> Dict[str, Any]:
+    """Đo throughput và latency cho một cặp (số worker, số luồng mỗi worker)."""
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(num_workers)
+    out_queue = ctx.Queue()
+    shares = [texts[i::num_workers] for i in range(num_workers)]
+
+    processes = [
+        ctx.Process(target=_bench_process,
+                    args=(workload, num_threads, share, batch_size, barrier, out_queue))
+        for share in shares
+    ]
+    for p in processes:
+        p.start()
+    results = [out_queue.get() for _ in processes]
+    for p in processes:
+        p.join()
+
+    wall = max(r[0] for r in results)
+    latencies = np.array([lat for r in results for lat in r[1]])
+    return {
+        "num_workers": num_workers,
+        "num_threads": num_threads,
+        "throughput": round(len(texts) / wall, 3),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "latency_p99_ms": round(float(np.percentile(latencies, 99)), 1),
+    }
+
+
+def candidate_grid(max_cores: int) -> List[tuple]:
+    """Các cặp (worker, thread) là lũy thừa của 2 với tổng số luồng không vượt quá số core."""
+    powers = [1]
+    while powers[-1] * 2 <= max_cores:
+        powers.append(powers[-1] * 2)
+    return [(w, t) for w in powers for t in powers if w * t <= max_cores]
+
+
+def recommend(curve: List[Dict[str, Any]], latency_slo_ms: Optional[float]) -> Dict[str, Any]:
+    """Chọn cấu hình có throughput cao nhất thỏa mãn SLO p99 (nếu có)."""
+    eligible = curve
+    if latency_slo_ms is not None:
+        eligible = [c for c in curve if c["latency_p99_ms"] <= latency_slo_ms] or curve
+    best = max(eligible, key=lambda c: (c["throughput"], -c["latency_p99_ms"]))
+    return {
+        "num_workers": best["num_workers"],
+        "num_threads": best["num_threads"],
+        "num_interop_threads": 1,
+        "throughput": best["throughput"],
+        "latency_p99_ms": best["latency_p99_ms"],
+    }
+
+
+def load_sample_texts(workload: str, n: int, seed: int = 42) -> List[str]:
+    with open("config.json", "r", encoding="utf-8") as f:
+        config = json.load(f)
+    with open(config["DATA"]["PROCESSED_DATA_DASH"], "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    field = "content" if workload == "summarization" else "content_clean"
+    texts = [item[field] for item in data if item.get(field)]
+    rng = np.random.default_rng(seed)
+    idx = rng.choice(len(texts), size=min(n, len(texts)), replace=False)
+    return [texts[i] for i in idx]
+
+
+def tune(workload: str, n_texts: int, batch_size: int, max_cores: int,
+         latency_slo_ms: Optional[float]) -> Dict[str, Any]:
+    texts = load_sample_texts(workload, n_texts)
+    curve = []
+    for num_workers, num_threads in candidate_grid(max_cores):
+        point = bench_config(workload, texts, num_workers, num_threads, batch_size)
+        print(f"[{workload}] workers={num_workers} threads={num_threads} "
+              f"throughput={point['throughput']}/s p50={point['latency_p50_ms']}ms "
+              f"p99={point['latency_p99_ms']}ms")
+        curve.append(point)
+
+    os.makedirs(SWEEP_DIR, exist_ok=True)
+    with open(os.path.join(SWEEP_DIR, f"{workload}_sweep.json"), "w", encoding="utf-8") as f:
+        json.dump({"n_texts": len(texts), "batch_size": batch_size, "curve": curve}, f, indent=2)
+
+    return recommend(curve, latency_slo_ms)
+
+
+def save_thread_config(workload: str, recommendation: Dict[str, Any], path: str = THREAD_CONFIG_PATH):
+    config = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    config[workload] = recommendation
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    print(f"Saved {workload} thread config -> {path}")
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Tune torch CPU threads for summarization and embedding")
+    p.add_argument("--workload", choices=WORKLOADS + ("all",), default="all")
+    p.add_argument("--n_texts", type=int, default=32, help="Số văn bản mẫu từ corpus")
+    p.add_argument("--max_cores", type=int, default=os.cpu_count(), help="Số core tối đa được dùng")
+    p.add_argument("--latency_slo_ms", type=float, default=None, help="Ngưỡng p99 latency (ms) khi chọn cấu hình")
+    p.add_argument("--embed_batch_size", type=int, default=16, help="Batch size cho SentenceTransformer.encode")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    workloads = WORKLOADS if args.workload == "all" else (args.workload,)
+    for workload in workloads:
+        batch_size = 1 if workload == "summarization" else args.embed_batch_size
+        recommendation = tune(workload, args.n_texts, batch_size, args.max_cores, args.latency_slo_ms)
+        save_thread_config(workload, recommendation)
+
+
+if __name__ == "__main__":
+    main()